@@ -1,3 +1,49 @@
+# analytics/admin.py
+
 from django.contrib import admin
+from .models import Event, ProductDailyStats, ReportSnapshot
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    """Admin de solo lectura para eventos de analítica"""
+    
+    list_display = ['id', 'name', 'user_id', 'object_id', 'occurred_at']
+    list_filter = ['name', 'occurred_at']
+    search_fields = ['=user_id', '=object_id', 'session_key']
+    ordering = ['-occurred_at']
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ProductDailyStats)
+class ProductDailyStatsAdmin(admin.ModelAdmin):
+    """Admin para rollups diarios (se recalculan con rebuild_sales_rollups)"""
+    
+    list_display = ['date', 'product', 'seller', 'revenue_mxn', 'units', 'orders', 'views']
+    list_filter = ['date']
+    search_fields = ['seller__email', 'product__common_name']
+    list_select_related = ['product', 'seller']
+    raw_id_fields = ['product', 'seller']
+    ordering = ['-date']
+
 
-# Register your models here.
+@admin.register(ReportSnapshot)
+class ReportSnapshotAdmin(admin.ModelAdmin):
+    """Snapshots inmutables (se recalculan con refresh_report_snapshots)"""
+    
+    list_display = ['report', 'granularity', 'period_start', 'created_at']
+    list_filter = ['report', 'granularity']
+    ordering = ['report', 'granularity', '-period_start']
+    readonly_fields = ['report', 'granularity', 'period_start', 'data', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
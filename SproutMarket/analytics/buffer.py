@@ -0,0 +1,188 @@
+# analytics/buffer.py
+
+"""
+Buffer en memoria de eventos de analítica.
+
+track() solo agrega el evento a una cola acotada (sin I/O); un thread de
+fondo lo escribe con bulk_create cada ANALYTICS_FLUSH_BATCH_SIZE eventos o
+cada ANALYTICS_FLUSH_INTERVAL segundos. Si la cola está llena el evento se
+descarta (y se cuenta): la analítica nunca agrega latencia al request.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer:
+    """
+    Cola acotada + thread escritor
+    
+    Args:
+        max_size (int): Eventos en memoria antes de empezar a descartar
+        batch_size (int): Eventos por bulk_create
+        flush_interval (float): Segundos máximos entre escrituras
+    """
+    
+    def __init__(self, max_size, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+    
+    def _ensure_thread(self):
+        # Después de un fork (gunicorn --preload) el thread no existe en el hijo
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='analytics-buffer', daemon=True
+            )
+            self._thread.start()
+    
+    def record(self, event):
+        """
+        Encola un evento (dict con los campos de Event)
+        
+        Returns:
+            bool: False si se descartó por cola llena
+        """
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+    
+    def _drain(self):
+        events = []
+        while len(events) < self.batch_size:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+    
+    def flush(self):
+        """Escribe todo lo pendiente; retorna el número de eventos escritos"""
+        from .models import Event
+        
+        total = 0
+        with self._flush_lock:
+            while True:
+                events = self._drain()
+                if not events:
+                    break
+                try:
+                    Event.objects.bulk_create(
+                        [Event(**event) for event in events],
+                        batch_size=self.batch_size
+                    )
+                    total += len(events)
+                except Exception as e:
+                    # Sin reintentos: el lote se pierde, no se acumula memoria
+                    self.dropped += len(events)
+                    logger.error(f"Error writing {len(events)} analytics events: {str(e)}")
+        self.written += total
+        return total
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Analytics flush failed: {str(e)}")
+            finally:
+                close_old_connections()
+    
+    def stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+        }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Buffer compartido del proceso"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = EventBuffer(
+                    max_size=settings.ANALYTICS_BUFFER_SIZE,
+                    batch_size=settings.ANALYTICS_FLUSH_BATCH_SIZE,
+                    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL,
+                )
+                atexit.register(_flush_at_exit)
+    return _buffer
+
+
+def _flush_at_exit():
+    try:
+        _buffer.flush()
+    except Exception:
+        pass
+
+
+def track(name, request=None, user=None, object_id=None, properties=None, **extra):
+    """
+    Registra un evento de analítica sin bloquear al request
+    
+    Args:
+        name (str): Evento (Event.NAME_CHOICES)
+        request (Request, optional): De aquí se toman usuario y sesión
+        user (User, optional): Usuario si no hay request
+        object_id (int, optional): Producto, exchange, orden...
+        properties (dict, optional): Datos adicionales con llaves arbitrarias
+            (ej: las que manda el cliente; nunca se expanden como kwargs)
+        **extra: Datos adicionales desde el código (JSON serializable)
+    
+    Returns:
+        bool: False si está deshabilitado o se descartó
+    """
+    if not settings.ANALYTICS_ENABLED:
+        return False
+    
+    session_key = ''
+    if request is not None:
+        user = user or getattr(request, 'user', None)
+        session_key = request.headers.get('X-Session-Id', '')[:64]
+    
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    
+    return get_buffer().record({
+        'name': name,
+        'user_id': user_id,
+        'session_key': session_key,
+        'object_id': object_id,
+        'properties': {**(properties or {}), **extra},
+        'occurred_at': timezone.now(),
+    })
@@ -0,0 +1,67 @@
+# analytics/management/commands/export_transactions.py
+
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.reports import iter_transactions, write_csv, write_parquet
+from payments.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Exporta transacciones a CSV o Parquet leyendo en chunks (sin cargar la tabla en memoria)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            required=True,
+            help='Primer día (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--end',
+            help='Último día (YYYY-MM-DD, default: hoy)'
+        )
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            choices=[choice for choice, _ in Transaction.TYPE_CHOICES],
+            help='Solo este tipo de transacción (se puede repetir)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'parquet'],
+            default='csv',
+            help='Formato de salida (parquet requiere pyarrow)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Archivo de salida (default: stdout, solo CSV)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start'])
+            end = date.fromisoformat(options['end']) if options['end'] else timezone.localdate()
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        
+        rows = iter_transactions(start, end, options['types'])
+        
+        if options['format'] == 'parquet':
+            if not options['output']:
+                raise CommandError('--output es requerido para Parquet')
+            try:
+                count = write_parquet(rows, options['output'])
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        elif options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as stream:
+                count = write_csv(rows, stream)
+        else:
+            count = write_csv(rows, sys.stdout)
+        
+        # A stderr para no mezclarse con el CSV en stdout
+        self.stderr.write(self.style.SUCCESS(f'✓ {count} transacciones exportadas ({start} a {end})'))
@@ -0,0 +1,54 @@
+# analytics/management/commands/rebuild_sales_rollups.py
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los rollups diarios de ventas por producto; conserva las vistas contadas (idempotente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Reconstruir los últimos N días, incluyendo hoy (default: 30)'
+        )
+        parser.add_argument(
+            '--since',
+            help='Primer día a reconstruir (YYYY-MM-DD); tiene prioridad sobre --days'
+        )
+        parser.add_argument(
+            '--until',
+            help='Último día a reconstruir (YYYY-MM-DD, default: hoy)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['until']) if options['until'] else timezone.localdate()
+            if options['since']:
+                start = date.fromisoformat(options['since'])
+            else:
+                start = end - timedelta(days=options['days'] - 1)
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        
+        if start > end:
+            raise CommandError('--since debe ser anterior a --until')
+        
+        # Un día a la vez: transacciones cortas y memoria acotada
+        total = 0
+        day = start
+        while day <= end:
+            rows = rebuild(day, day)
+            total += rows
+            self.stdout.write(f'↻ {day}: {rows} productos')
+            day += timedelta(days=1)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'\n✓ Rollups reconstruidos: {start} a {end}, {total} filas')
+        )
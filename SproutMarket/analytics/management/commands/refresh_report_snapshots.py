@@ -0,0 +1,38 @@
+# analytics/management/commands/refresh_report_snapshots.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.reports import GRANULARITIES, REPORTS, get_report, invalidate_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los snapshots de reportes de un rango (ej: después de corregir transacciones)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help='Primer día (YYYY-MM-DD)')
+        parser.add_argument('--end', required=True, help='Último día (YYYY-MM-DD)')
+        parser.add_argument(
+            '--report',
+            choices=REPORTS,
+            help='Solo este reporte (default: todos)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start'])
+            end = date.fromisoformat(options['end'])
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        
+        deleted = invalidate_snapshots(start, end, options['report'])
+        self.stdout.write(self.style.WARNING(f'↻ {deleted} snapshots eliminados'))
+        
+        reports = [options['report']] if options['report'] else REPORTS
+        for report in reports:
+            for granularity in GRANULARITIES:
+                periods = get_report(report, granularity, start, end)
+                self.stdout.write(f'✓ {report} ({granularity}): {len(periods)} periodos')
+        
+        self.stdout.write(self.style.SUCCESS('\n✓ Snapshots recalculados'))
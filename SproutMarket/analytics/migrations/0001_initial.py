@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(choices=[('product_view', 'Vista de producto'), ('search', 'Búsqueda'), ('cart_add', 'Agregado al carrito'), ('checkout', 'Checkout'), ('exchange_offer', 'Oferta de intercambio')], max_length=30, verbose_name='evento')),
+                ('user_id', models.BigIntegerField(blank=True, null=True, verbose_name='usuario')),
+                ('session_key', models.CharField(blank=True, help_text='Identificador anónimo del cliente (visitantes sin login)', max_length=64, verbose_name='sesión')),
+                ('object_id', models.BigIntegerField(blank=True, null=True, verbose_name='objeto')),
+                ('properties', models.JSONField(blank=True, default=dict, help_text='Datos adicionales (query, cantidad, total...)', verbose_name='propiedades')),
+                ('occurred_at', models.DateTimeField(verbose_name='ocurrió en')),
+            ],
+            options={
+                'verbose_name': 'evento',
+                'verbose_name_plural': 'eventos',
+                'db_table': 'analytics_events',
+                'ordering': ['-occurred_at'],
+                'indexes': [models.Index(fields=['name', 'occurred_at'], name='analytics_e_name_8429a0_idx'), models.Index(fields=['user_id', 'occurred_at'], name='analytics_e_user_id_d1afb9_idx'), models.Index(fields=['object_id', 'name'], name='analytics_e_object__576016_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('products', '0002_product_image_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='fecha')),
+                ('revenue_mxn', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='ingresos (MXN)')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='unidades')),
+                ('orders', models.PositiveIntegerField(default=0, help_text='Órdenes que incluyeron el producto', verbose_name='órdenes')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='vistas')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='products.product', verbose_name='producto')),
+                ('seller', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL, verbose_name='vendedor')),
+            ],
+            options={
+                'verbose_name': 'estadística diaria de producto',
+                'verbose_name_plural': 'estadísticas diarias de productos',
+                'db_table': 'analytics_product_daily_stats',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['seller', 'date'], name='analytics_p_seller__71349a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'date'), name='unique_product_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_productdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report', models.CharField(choices=[('revenue', 'Ingresos de la plataforma'), ('categories', 'Ventas por categoría')], max_length=20, verbose_name='reporte')),
+                ('granularity', models.CharField(choices=[('day', 'Día'), ('week', 'Semana'), ('month', 'Mes')], max_length=10, verbose_name='granularidad')),
+                ('period_start', models.DateField(verbose_name='inicio del periodo')),
+                ('data', models.JSONField(default=dict, verbose_name='datos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creado en')),
+            ],
+            options={
+                'verbose_name': 'snapshot de reporte',
+                'verbose_name_plural': 'snapshots de reportes',
+                'db_table': 'analytics_report_snapshots',
+                'ordering': ['report', 'granularity', '-period_start'],
+                'constraints': [models.UniqueConstraint(fields=('report', 'granularity', 'period_start'), name='unique_report_snapshot')],
+            },
+        ),
+    ]
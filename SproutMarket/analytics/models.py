@@ -1,3 +1,171 @@
+# analytics/models.py
+
 from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+
+class Event(models.Model):
+    """
+    Eventos de analítica (append-only): vistas, búsquedas, carrito,
+    checkout y ofertas de intercambio. Se escriben en lotes desde
+    analytics.buffer, nunca en el request.
+    """
+    
+    NAME_CHOICES = [
+        ('product_view', 'Vista de producto'),
+        ('search', 'Búsqueda'),
+        ('cart_add', 'Agregado al carrito'),
+        ('checkout', 'Checkout'),
+        ('exchange_offer', 'Oferta de intercambio'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    
+    name = models.CharField(
+        _('evento'),
+        max_length=30,
+        choices=NAME_CHOICES
+    )
+    
+    # Usuario (null para visitantes anónimos); sin FK para no bloquear
+    # ni encarecer los inserts masivos
+    user_id = models.BigIntegerField(
+        _('usuario'),
+        null=True,
+        blank=True
+    )
+    session_key = models.CharField(
+        _('sesión'),
+        max_length=64,
+        blank=True,
+        help_text='Identificador anónimo del cliente (visitantes sin login)'
+    )
+    
+    # Objeto relacionado (producto, exchange...) según el evento
+    object_id = models.BigIntegerField(
+        _('objeto'),
+        null=True,
+        blank=True
+    )
+    
+    properties = models.JSONField(
+        _('propiedades'),
+        default=dict,
+        blank=True,
+        help_text='Datos adicionales (query, cantidad, total...)'
+    )
+    
+    occurred_at = models.DateTimeField(_('ocurrió en'))
+    
+    class Meta:
+        db_table = 'analytics_events'
+        verbose_name = _('evento')
+        verbose_name_plural = _('eventos')
+        ordering = ['-occurred_at']
+        indexes = [
+            models.Index(fields=['name', 'occurred_at']),
+            models.Index(fields=['user_id', 'occurred_at']),
+            models.Index(fields=['object_id', 'name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} - {self.occurred_at}"
+
+
+class ProductDailyStats(models.Model):
+    """
+    Rollup diario por vendedor y producto: ingresos, unidades, órdenes y
+    vistas. Se actualiza de forma incremental (analytics.rollups) y se
+    puede reconstruir con el comando rebuild_sales_rollups.
+    """
+    
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name=_('vendedor'),
+        db_index=False  # Cubierto por el índice (seller, date)
+    )
+    product = models.ForeignKey(
+        'products.Product',
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name=_('producto'),
+        db_index=False  # Cubierto por la restricción única (product, date)
+    )
+    date = models.DateField(_('fecha'))
+    
+    revenue_mxn = models.DecimalField(
+        _('ingresos (MXN)'),
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    units = models.PositiveIntegerField(_('unidades'), default=0)
+    orders = models.PositiveIntegerField(
+        _('órdenes'),
+        default=0,
+        help_text='Órdenes que incluyeron el producto'
+    )
+    views = models.PositiveIntegerField(_('vistas'), default=0)
+    
+    class Meta:
+        db_table = 'analytics_product_daily_stats'
+        verbose_name = _('estadística diaria de producto')
+        verbose_name_plural = _('estadísticas diarias de productos')
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'date'],
+                name='unique_product_daily_stats'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['seller', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.date}"
+
 
-# Create your models here.
+class ReportSnapshot(models.Model):
+    """
+    Resultado de un reporte de plataforma para un periodo ya cerrado.
+    Los periodos cerrados no cambian, así que se calculan una sola vez
+    (analytics.reports); el periodo en curso siempre se calcula en vivo.
+    """
+    
+    REPORT_CHOICES = [
+        ('revenue', 'Ingresos de la plataforma'),
+        ('categories', 'Ventas por categoría'),
+    ]
+    
+    GRANULARITY_CHOICES = [
+        ('day', 'Día'),
+        ('week', 'Semana'),
+        ('month', 'Mes'),
+    ]
+    
+    report = models.CharField(_('reporte'), max_length=20, choices=REPORT_CHOICES)
+    granularity = models.CharField(_('granularidad'), max_length=10, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField(_('inicio del periodo'))
+    
+    data = models.JSONField(_('datos'), default=dict)
+    
+    created_at = models.DateTimeField(_('creado en'), auto_now_add=True)
+    
+    class Meta:
+        db_table = 'analytics_report_snapshots'
+        verbose_name = _('snapshot de reporte')
+        verbose_name_plural = _('snapshots de reportes')
+        ordering = ['report', 'granularity', '-period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['report', 'granularity', 'period_start'],
+                name='unique_report_snapshot'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.report} ({self.granularity}) - {self.period_start}"
@@ -0,0 +1,16 @@
+# analytics/permissions.py
+
+from rest_framework import permissions
+
+
+class IsPremium(permissions.BasePermission):
+    """Solo usuarios con plan premium (estadísticas avanzadas)"""
+    
+    message = 'Las estadísticas avanzadas de ventas son parte del plan premium'
+    
+    def has_permission(self, request, view):
+        return bool(
+            request.user
+            and request.user.is_authenticated
+            and request.user.is_premium
+        )
@@ -0,0 +1,307 @@
+# analytics/reports.py
+
+"""
+Reportes de plataforma: GMV, comisiones, publicaciones de intercambio y
+suscripciones por día/semana/mes, y ventas por categoría.
+
+Las filas se leen con .iterator(chunk_size=...) (cursor del lado del
+servidor en PostgreSQL) y se acumulan por periodo, así que la memoria
+depende del número de periodos y no del tamaño de transactions. Los
+periodos cerrados se guardan como ReportSnapshot y no se recalculan.
+"""
+
+import csv
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ReportSnapshot
+
+REPORTS = ('revenue', 'categories')
+GRANULARITIES = ('day', 'week', 'month')
+
+# Tipo de Transaction -> métrica del reporte de ingresos
+REVENUE_TYPES = {
+    'purchase': 'gmv',
+    'commission': 'commission',
+    'exchange_publication': 'exchange_fees',
+    'subscription': 'subscriptions',
+}
+
+EXPORT_COLUMNS = [
+    'id', 'created_at', 'type', 'amount_mxn', 'user_id',
+    'reference_type', 'reference_id', 'stripe_id',
+]
+
+
+def _chunk_size():
+    return getattr(settings, 'REPORTS_CHUNK_SIZE', 2000)
+
+
+def period_start(day, granularity):
+    """Primer día del periodo que contiene a day"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start, granularity):
+    """Primer día del periodo siguiente"""
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _periods(start, end, granularity):
+    periods = []
+    current = period_start(start, granularity)
+    while current <= end:
+        periods.append(current)
+        current = next_period(current, granularity)
+    return periods
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def _money(value):
+    return float(value.quantize(Decimal('0.01')))
+
+
+def _compute_revenue(start, end, granularity):
+    """{period_start: métricas} para [start, end)"""
+    from payments.models import Transaction
+    
+    buckets = defaultdict(lambda: defaultdict(Decimal))
+    counts = defaultdict(int)
+    
+    rows = Transaction.objects.filter(
+        type__in=REVENUE_TYPES,
+        created_at__gte=_aware(start),
+        created_at__lt=_aware(end)
+    ).order_by().values_list('type', 'amount_mxn', 'created_at')
+    
+    for tx_type, amount, created_at in rows.iterator(chunk_size=_chunk_size()):
+        period = period_start(timezone.localdate(created_at), granularity)
+        buckets[period][REVENUE_TYPES[tx_type]] += amount
+        if tx_type == 'purchase':
+            counts[period] += 1
+    
+    result = {}
+    for period, metrics in buckets.items():
+        data = {metric: _money(metrics[metric]) for metric in REVENUE_TYPES.values()}
+        data['orders'] = counts[period]
+        data['platform_revenue'] = _money(
+            metrics['commission'] + metrics['exchange_fees'] + metrics['subscriptions']
+        )
+        result[period] = data
+    return result
+
+
+def _primary_categories(product_ids):
+    """product_id -> nombre de su categoría principal (menor Category.order)"""
+    from products.models import Product
+    
+    through = Product.categories.through
+    categories = {}
+    rows = through.objects.filter(
+        product_id__in=product_ids
+    ).order_by('product_id', 'category__order').values_list('product_id', 'category__name')
+    for product_id, name in rows.iterator(chunk_size=_chunk_size()):
+        categories.setdefault(product_id, name)
+    return categories
+
+
+def _compute_categories(start, end, granularity):
+    """{period_start: {categoría: métricas}} para [start, end)"""
+    from products.models import Order
+    
+    # Primero por producto (acotado por productos vendidos x periodos)
+    by_product = defaultdict(lambda: [Decimal('0.00'), 0])
+    
+    orders = Order.objects.filter(
+        status='completed',
+        created_at__gte=_aware(start),
+        created_at__lt=_aware(end)
+    ).order_by().values_list('items', 'created_at')
+    
+    for items, created_at in orders.iterator(chunk_size=_chunk_size()):
+        period = period_start(timezone.localdate(created_at), granularity)
+        for item in items:
+            totals = by_product[(period, item['product_id'])]
+            totals[0] += Decimal(str(item['subtotal']))
+            totals[1] += item['quantity']
+    
+    categories = _primary_categories({product_id for _, product_id in by_product})
+    
+    buckets = defaultdict(lambda: defaultdict(lambda: [Decimal('0.00'), 0]))
+    for (period, product_id), (gmv, units) in by_product.items():
+        totals = buckets[period][categories.get(product_id, 'Sin categoría')]
+        totals[0] += gmv
+        totals[1] += units
+    
+    return {
+        period: {
+            name: {
+                'gmv': _money(gmv),
+                'commission': _money(gmv * Decimal('0.10')),
+                'units': units,
+            }
+            for name, (gmv, units) in by_category.items()
+        }
+        for period, by_category in buckets.items()
+    }
+
+
+COMPUTE = {
+    'revenue': _compute_revenue,
+    'categories': _compute_categories,
+}
+
+
+def get_report(report, granularity, start, end):
+    """
+    Reporte por periodo entre start y end (inclusive)
+    
+    Los periodos cerrados se leen de ReportSnapshot o se calculan y se
+    guardan; el periodo en curso se calcula sin guardar.
+    
+    Args:
+        report (str): 'revenue' o 'categories'
+        granularity (str): 'day', 'week' o 'month'
+        start (date): Primer día
+        end (date): Último día
+    
+    Returns:
+        list: [{'period': 'YYYY-MM-DD', 'data': {...}}, ...]
+    """
+    periods = _periods(start, end, granularity)
+    if not periods:
+        return []
+    
+    today = timezone.localdate()
+    closed = [p for p in periods if next_period(p, granularity) <= today]
+    
+    stored = dict(
+        ReportSnapshot.objects.filter(
+            report=report,
+            granularity=granularity,
+            period_start__in=closed
+        ).values_list('period_start', 'data')
+    )
+    
+    missing = [p for p in periods if p not in stored]
+    if missing:
+        # Una sola pasada sobre el rango de los periodos faltantes
+        computed = COMPUTE[report](
+            missing[0], next_period(missing[-1], granularity), granularity
+        )
+        snapshots = []
+        for period in missing:
+            data = computed.get(period, {})
+            stored[period] = data
+            if period in closed:
+                snapshots.append(ReportSnapshot(
+                    report=report,
+                    granularity=granularity,
+                    period_start=period,
+                    data=data
+                ))
+        if snapshots:
+            ReportSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    
+    return [
+        {'period': period.isoformat(), 'data': stored[period]}
+        for period in periods
+    ]
+
+
+def invalidate_snapshots(start, end, report=None):
+    """Elimina snapshots de los periodos que empiezan entre start y end"""
+    queryset = ReportSnapshot.objects.filter(
+        period_start__gte=start,
+        period_start__lte=end
+    )
+    if report:
+        queryset = queryset.filter(report=report)
+    return queryset.delete()[0]
+
+
+def iter_transactions(start, end, types=None):
+    """
+    Filas de transactions (tuplas en el orden de EXPORT_COLUMNS) en un
+    cursor del lado del servidor
+    """
+    from payments.models import Transaction
+    
+    queryset = Transaction.objects.filter(
+        created_at__gte=_aware(start),
+        created_at__lt=_aware(end + timedelta(days=1))
+    )
+    if types:
+        queryset = queryset.filter(type__in=types)
+    
+    return queryset.order_by('id').values_list(*EXPORT_COLUMNS).iterator(
+        chunk_size=_chunk_size()
+    )
+
+
+def write_csv(rows, stream):
+    """Escribe las filas como CSV; retorna el número de filas"""
+    writer = csv.writer(stream)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_parquet(rows, path):
+    """
+    Escribe las filas como Parquet, un row group por chunk
+    
+    Requiere pyarrow (dependencia opcional, no está en requirements.txt).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('La exportación a Parquet requiere pyarrow (pip install pyarrow)')
+    
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+        ('type', pa.string()),
+        ('amount_mxn', pa.decimal128(10, 2)),
+        ('user_id', pa.int64()),
+        ('reference_type', pa.string()),
+        ('reference_id', pa.int64()),
+        ('stripe_id', pa.string()),
+    ])
+    
+    count = 0
+    chunk = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= _chunk_size():
+                writer.write_table(pa.Table.from_pylist(
+                    [dict(zip(EXPORT_COLUMNS, r)) for r in chunk], schema=schema
+                ))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            writer.write_table(pa.Table.from_pylist(
+                [dict(zip(EXPORT_COLUMNS, r)) for r in chunk], schema=schema
+            ))
+            count += len(chunk)
+    return count
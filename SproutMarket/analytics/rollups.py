@@ -0,0 +1,156 @@
+# analytics/rollups.py
+
+"""
+Mantenimiento de los rollups diarios (ProductDailyStats).
+
+Las órdenes se acumulan dentro de la transacción que crea la orden y las
+vistas junto con Product.increment_views; ambos son UPDATE ... SET x = x + n
+sobre la fila (producto, día), creándola si no existe. rebuild() recalcula
+un rango de días desde las órdenes, así que cualquier desfase de ventas se
+corrige reconstruyendo.
+
+Las vistas tienen una sola fuente: el conteo incremental. rebuild() las
+conserva en lugar de recalcularlas desde los eventos product_view (que el
+buffer de analytics puede descartar y que no coincidirían con este conteo).
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ProductDailyStats
+
+
+def _increment(product_id, seller_id, date, **deltas):
+    """UPSERT incremental de la fila (producto, día)"""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    updated = ProductDailyStats.objects.filter(
+        product_id=product_id,
+        date=date
+    ).update(**updates)
+    if updated:
+        return
+    
+    try:
+        # Savepoint: si otro proceso la creó primero, solo se repite el UPDATE
+        with transaction.atomic():
+            ProductDailyStats.objects.create(
+                product_id=product_id,
+                seller_id=seller_id,
+                date=date,
+                **deltas
+            )
+    except IntegrityError:
+        ProductDailyStats.objects.filter(
+            product_id=product_id,
+            date=date
+        ).update(**updates)
+
+
+def record_order(order):
+    """
+    Suma una orden completada a los rollups de sus productos
+    
+    Llamar dentro de la transacción que crea la orden.
+    """
+    date = timezone.localdate(order.created_at)
+    
+    totals = {}
+    for item in order.items:
+        key = (item['product_id'], item['seller_id'])
+        revenue, units = totals.get(key, (Decimal('0.00'), 0))
+        totals[key] = (
+            revenue + Decimal(str(item['subtotal'])),
+            units + item['quantity']
+        )
+    
+    for (product_id, seller_id), (revenue, units) in totals.items():
+        _increment(
+            product_id, seller_id, date,
+            revenue_mxn=revenue, units=units, orders=1
+        )
+
+
+def record_view(product_id, seller_id):
+    """Suma una vista del día al rollup del producto"""
+    _increment(product_id, seller_id, timezone.localdate(), views=1)
+
+
+def rebuild(start, end):
+    """
+    Recalcula los rollups de los días [start, end] (idempotente)
+    
+    Ingresos, unidades y órdenes salen de las órdenes completadas; las
+    vistas se conservan tal como las contó record_view.
+    
+    Args:
+        start (date): Primer día
+        end (date): Último día (inclusive)
+    
+    Returns:
+        int: Filas escritas
+    """
+    from products.models import Order, Product
+    
+    tz = timezone.get_current_timezone()
+    start_dt = timezone.make_aware(datetime.combine(start, time.min), tz)
+    end_dt = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    
+    rows = defaultdict(lambda: {
+        'revenue_mxn': Decimal('0.00'), 'units': 0, 'orders': 0, 'views': 0
+    })
+    
+    orders = Order.objects.filter(
+        status='completed',
+        created_at__gte=start_dt,
+        created_at__lt=end_dt
+    ).only('items', 'created_at')
+    
+    for order in orders.iterator(chunk_size=1000):
+        date = timezone.localdate(order.created_at)
+        seen = set()
+        for item in order.items:
+            row = rows[(item['product_id'], date)]
+            row['revenue_mxn'] += Decimal(str(item['subtotal']))
+            row['units'] += item['quantity']
+            if item['product_id'] not in seen:
+                row['orders'] += 1
+                seen.add(item['product_id'])
+    
+    with transaction.atomic():
+        # Vistas actuales del rango; el bloqueo evita perder las que se
+        # cuenten sobre estas filas mientras se reconstruye
+        views = ProductDailyStats.objects.select_for_update().filter(
+            date__gte=start,
+            date__lte=end,
+            views__gt=0
+        ).values_list('product_id', 'date', 'views')
+        for product_id, date, count in views:
+            rows[(product_id, date)]['views'] = count
+        
+        # Seller de cada producto (solo productos que aún existen)
+        sellers = dict(
+            Product.objects.filter(
+                id__in={product_id for product_id, _ in rows}
+            ).values_list('id', 'seller_id')
+        )
+        
+        objects = [
+            ProductDailyStats(
+                product_id=product_id,
+                seller_id=sellers[product_id],
+                date=date,
+                **values
+            )
+            for (product_id, date), values in rows.items()
+            if product_id in sellers
+        ]
+        
+        ProductDailyStats.objects.filter(date__gte=start, date__lte=end).delete()
+        ProductDailyStats.objects.bulk_create(objects, batch_size=1000)
+    
+    return len(objects)
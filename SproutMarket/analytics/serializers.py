@@ -0,0 +1,32 @@
+# analytics/serializers.py
+
+from rest_framework import serializers
+from .models import Event
+
+
+# product_view lo registra el servidor al servir el detalle (y alimenta los
+# rollups de vistas): el cliente no lo puede enviar
+SERVER_ONLY_EVENTS = {'product_view'}
+
+CLIENT_EVENT_CHOICES = [
+    (name, label) for name, label in Event.NAME_CHOICES if name not in SERVER_ONLY_EVENTS
+]
+
+
+class EventSerializer(serializers.Serializer):
+    """Evento enviado por el cliente"""
+    
+    name = serializers.ChoiceField(choices=CLIENT_EVENT_CHOICES)
+    object_id = serializers.IntegerField(required=False, allow_null=True)
+    properties = serializers.DictField(required=False, default=dict)
+    
+    def validate_properties(self, value):
+        if len(str(value)) > 2000:
+            raise serializers.ValidationError('Propiedades demasiado grandes')
+        return value
+
+
+class EventBatchSerializer(serializers.Serializer):
+    """Lote de eventos (máximo 50 por request)"""
+    
+    events = EventSerializer(many=True, allow_empty=False, max_length=50)
@@ -0,0 +1,16 @@
+# analytics/urls.py
+
+from django.urls import path
+from .views import EventIngestView, PlatformReportView, SalesTimeSeriesView
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('events/', EventIngestView.as_view(), name='event-ingest'),
+    path('sales/', SalesTimeSeriesView.as_view(), name='sales-timeseries'),
+    path('reports/', PlatformReportView.as_view(), name='platform-reports'),
+]
+
+# POST /api/analytics/events/   - Registrar eventos del cliente (lote)
+# GET  /api/analytics/sales/    - Serie diaria de ventas del vendedor (premium, ?window=7|30|365)
+# GET  /api/analytics/reports/  - Reportes de ingresos/categorías de la plataforma (staff)
@@ -1,3 +1,206 @@
-from django.shortcuts import render
+# analytics/views.py
 
-# Create your views here.
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import status, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.db_router import run_on_replica
+
+from .buffer import track
+from .models import ProductDailyStats
+from .permissions import IsPremium
+from .reports import GRANULARITIES, REPORTS, get_report
+from .serializers import EventBatchSerializer
+
+SALES_WINDOWS = (7, 30, 365)
+MAX_REPORT_PERIODS = 400
+
+
+class EventIngestView(APIView):
+    """
+    POST /api/analytics/events/
+    Recibe eventos del cliente y los encola (se escriben en lote)
+    
+    Body: {"events": [{"name": "search", "properties": {"query": "..."}}]}
+    (product_view solo lo registra el servidor)
+    Respuesta 202: accepted / dropped
+    """
+    permission_classes = [permissions.AllowAny]
+    # Los eventos no son datos que el cliente lea después: no pegarlo al primario
+    replica_sticky = False
+    
+    def post(self, request):
+        serializer = EventBatchSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        accepted = 0
+        for event in serializer.validated_data['events']:
+            if track(
+                event['name'],
+                request=request,
+                object_id=event.get('object_id'),
+                properties=event['properties']
+            ):
+                accepted += 1
+        
+        return Response({
+            'accepted': accepted,
+            'dropped': len(serializer.validated_data['events']) - accepted
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class SalesTimeSeriesView(APIView):
+    """
+    GET /api/analytics/sales/?window=30&product=12
+    Serie diaria de ingresos, unidades, órdenes y vistas del vendedor
+    (plan premium)
+    
+    Una sola consulta por rango sobre el índice (seller, date) de los
+    rollups; los días sin actividad se rellenan con ceros.
+    
+    Query params:
+    - window: 7, 30 o 365 días (default 30)
+    - product: ID de producto (opcional, solo productos propios)
+    """
+    permission_classes = [IsPremium]
+    
+    def get(self, request):
+        try:
+            window = int(request.query_params.get('window', 30))
+        except ValueError:
+            window = None
+        if window not in SALES_WINDOWS:
+            return Response(
+                {'detail': f'window debe ser uno de {list(SALES_WINDOWS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        end = timezone.localdate()
+        start = end - timedelta(days=window - 1)
+        
+        queryset = ProductDailyStats.objects.filter(
+            seller=request.user,
+            date__gte=start,
+            date__lte=end
+        )
+        product_id = request.query_params.get('product')
+        if product_id:
+            if not product_id.isdigit():
+                return Response(
+                    {'detail': 'product debe ser un ID'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(product_id=product_id)
+        
+        rows = run_on_replica(lambda: {
+            row['date']: row
+            for row in queryset.values('date').annotate(
+                revenue=Sum('revenue_mxn'),
+                units_sold=Sum('units'),
+                order_count=Sum('orders'),
+                view_count=Sum('views')
+            ).order_by('date')
+        })
+        
+        series = []
+        totals = {'revenue': Decimal('0.00'), 'units': 0, 'orders': 0, 'views': 0}
+        for offset in range(window):
+            day = start + timedelta(days=offset)
+            row = rows.get(day)
+            point = {
+                'date': day.isoformat(),
+                'revenue': float(row['revenue']) if row else 0.0,
+                'units': row['units_sold'] if row else 0,
+                'orders': row['order_count'] if row else 0,
+                'views': row['view_count'] if row else 0,
+            }
+            if row:
+                totals['revenue'] += row['revenue']
+                totals['units'] += row['units_sold']
+                totals['orders'] += row['order_count']
+                totals['views'] += row['view_count']
+            series.append(point)
+        
+        totals['revenue'] = float(totals['revenue'])
+        totals['earnings'] = round(totals['revenue'] * 0.90, 2)
+        totals['conversion_rate'] = (
+            round(totals['orders'] / totals['views'], 4) if totals['views'] else 0
+        )
+        
+        return Response({
+            'window': window,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'totals': totals,
+            'series': series
+        })
+
+
+class PlatformReportView(APIView):
+    """
+    GET /api/analytics/reports/?report=revenue&granularity=month&start=2025-01-01&end=2025-12-31
+    Reportes de la plataforma (solo staff)
+    
+    - report: revenue (GMV, comisión, publicaciones, suscripciones) o
+      categories (GMV y comisión por categoría)
+    - granularity: day, week o month (default month)
+    - start / end: rango de fechas (default: últimos 12 meses)
+    
+    Los periodos cerrados se sirven desde snapshots (ReportSnapshot).
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        report = request.query_params.get('report', 'revenue')
+        granularity = request.query_params.get('granularity', 'month')
+        
+        if report not in REPORTS:
+            return Response(
+                {'detail': f'report debe ser uno de {list(REPORTS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if granularity not in GRANULARITIES:
+            return Response(
+                {'detail': f'granularity debe ser uno de {list(GRANULARITIES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(request.query_params.get('end', today.isoformat()))
+            start = date.fromisoformat(
+                request.query_params.get('start', (end - timedelta(days=365)).isoformat())
+            )
+        except ValueError:
+            return Response(
+                {'detail': 'Fechas inválidas, usa YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if start > end:
+            return Response(
+                {'detail': 'start debe ser anterior a end'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if granularity == 'day' and (end - start).days >= MAX_REPORT_PERIODS:
+            return Response(
+                {'detail': f'Máximo {MAX_REPORT_PERIODS} días por consulta'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        periods = run_on_replica(get_report, report, granularity, start, end)
+        
+        return Response({
+            'report': report,
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'periods': periods
+        })
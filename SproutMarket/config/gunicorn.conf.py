@@ -0,0 +1,19 @@
+# config/gunicorn.conf.py
+
+"""
+Configuración de gunicorn: gunicorn -c config/gunicorn.conf.py config.wsgi
+
+Solo hooks del proceso maestro; workers, bind y timeouts se pasan por
+línea de comandos o GUNICORN_CMD_ARGS.
+"""
+
+from decouple import config
+
+
+def on_starting(server):
+    """Vacía METRICS_DIR antes de lanzar los workers (core/metrics.py)"""
+    directory = config('METRICS_DIR', default='')
+    if directory:
+        from core.metrics import clear_directory
+        clear_directory(directory)
+        server.log.info(f"Cleared metrics directory {directory}")
@@ -4,7 +4,7 @@ Django settings for SproutMarket project.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,7 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',  # Debe ir primero
+    'core.structured_logging.RequestIDMiddleware',  # Primero: request_id en todos los logs
+    'core.instrumentation.InstrumentationMiddleware',  # Mide el request completo
+    'core.metrics.MetricsMiddleware',  # Latencia por ruta (/metrics)
+    'corsheaders.middleware.CorsMiddleware',  # Antes de cualquier middleware que responda
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.ReplicaStickinessMiddleware',  # Read-your-writes con réplicas
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -111,6 +115,51 @@ else:
         }
     }
 
+# Conexiones a PostgreSQL: persistentes (CONN_MAX_AGE) o pool de psycopg 3.
+# Sin esto cada request abre una conexión nueva (con TLS en RDS).
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].setdefault('OPTIONS', {})
+    DATABASES['default']['OPTIONS']['connect_timeout'] = config('DB_CONNECT_TIMEOUT', default=5, cast=int)
+    
+    if DB_POOL:
+        # Requiere psycopg 3 con pool: pip install "psycopg[binary,pool]"
+        # PostgresBroker (NOTIFICATIONS_BROKER) usa psycopg2 para su conexión
+        # de LISTEN: con ese broker también hay que instalar psycopg2-binary
+        # El pool reemplaza a las conexiones persistentes (CONN_MAX_AGE debe ser 0)
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),  # por proceso/worker
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),  # espera máxima por conexión
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=int),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)  # segundos; 0 = por request
+        # Verifica la conexión reutilizada al inicio de cada request (RDS reinicia/failover)
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+# Réplicas de lectura (core/db_router.py): DB_REPLICAS=host1,host2
+# (con SQLite cada elemento es la ruta del archivo, útil para probar localmente)
+REPLICA_DATABASES = []
+for _index, _target in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    _replica = dict(DATABASES['default'])
+    if _replica['ENGINE'] == 'django.db.backends.sqlite3':
+        _replica['NAME'] = _target
+    else:
+        _replica['HOST'] = _target
+    # En tests la réplica es la misma DB que default
+    _replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica{_index}'] = _replica
+    REPLICA_DATABASES.append(f'replica{_index}')
+
+if REPLICA_DATABASES:
+    DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)  # read-your-writes
+REPLICA_RETRY_SECONDS = config('REPLICA_RETRY_SECONDS', default=30, cast=int)  # réplica caída antes de reintentar
+
 # Password validation
 
 
@@ -160,6 +209,34 @@ AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default='')
 AWS_REGION = config('AWS_REGION', default='us-east-2')
 AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME', default='')
 
+# Clientes boto3 compartidos (core/utils/aws_clients.py)
+# AWS_ENDPOINT_URL permite apuntar a un endpoint local (ej: moto_server en http://localhost:5000)
+AWS_ENDPOINT_URL = config('AWS_ENDPOINT_URL', default='')
+AWS_MAX_POOL_CONNECTIONS = config('AWS_MAX_POOL_CONNECTIONS', default=10, cast=int)
+AWS_CLIENT_POOL_SIZES = {
+    's3': config('AWS_S3_MAX_POOL_CONNECTIONS', default=25, cast=int),
+}
+AWS_CONNECT_TIMEOUT = config('AWS_CONNECT_TIMEOUT', default=5, cast=int)
+AWS_READ_TIMEOUT = config('AWS_READ_TIMEOUT', default=30, cast=int)
+AWS_MAX_ATTEMPTS = config('AWS_MAX_ATTEMPTS', default=3, cast=int)
+# Threads del pool compartido de subidas (core/utils/s3_utils.py); no mayor que el pool de S3
+S3_UPLOAD_MAX_WORKERS = config('S3_UPLOAD_MAX_WORKERS', default=8, cast=int)
+# GC de imágenes (python manage.py gc_images): espera antes de borrar objetos encolados
+IMAGE_GC_GRACE_SECONDS = config('IMAGE_GC_GRACE_SECONDS', default=3600, cast=int)
+# Procesos para generar miniaturas/WebP (core/utils/images.py)
+IMAGE_PROCESSING_WORKERS = config('IMAGE_PROCESSING_WORKERS', default=2, cast=int)
+# Threads que descargan, suben y guardan las versiones (pool propio, no el de subidas)
+IMAGE_RENDITION_WORKERS = config('IMAGE_RENDITION_WORKERS', default=2, cast=int)
+
+# Subidas directas del cliente (core/utils/direct_uploads.py); sin bucket se usa el stand-in local
+DIRECT_UPLOAD_BACKEND = config(
+    'DIRECT_UPLOAD_BACKEND',
+    default='core.utils.direct_uploads.S3DirectUploadBackend' if AWS_STORAGE_BUCKET_NAME
+    else 'core.utils.direct_uploads.LocalDirectUploadBackend'
+)
+DIRECT_UPLOAD_MAX_SIZE = config('DIRECT_UPLOAD_MAX_SIZE', default=10 * 1024 * 1024, cast=int)  # bytes
+DIRECT_UPLOAD_EXPIRES = config('DIRECT_UPLOAD_EXPIRES', default=600, cast=int)  # segundos
+
 # Media files (user uploads)
 USE_S3 = config('USE_S3', default=False, cast=bool)
 
@@ -184,6 +261,12 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
     
+# Hash SHA-256 de los archivos mientras se reciben (subidas direccionadas por contenido)
+FILE_UPLOAD_HANDLERS = [
+    'core.upload_handlers.HashingMemoryFileUploadHandler',
+    'core.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -193,7 +276,8 @@ AUTH_USER_MODEL = 'core.User'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CognitoJWTAuthentication',  # Authorization: Bearer <token de Cognito>
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -207,6 +291,53 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache
+# LocMem es por proceso: en producción usar un cache compartido (Redis/Memcached)
+# para que los contadores de notificaciones sean consistentes entre workers
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='sproutmarket'),
+    }
+}
+
+# Snapshot de usuario por token (core/auth_cache.py); se invalida al guardar el usuario y en logout.
+# Con un cache compartido (CACHE_BACKEND Redis/Memcached) vale AUTH_CACHE_TTL; con LocMem cada
+# worker guarda su copia y un logout/desactivación tarda hasta AUTH_CACHE_LOCAL_TTL en verse en los demás
+AUTH_CACHE_TTL = config('AUTH_CACHE_TTL', default=60, cast=int)
+AUTH_CACHE_LOCAL_TTL = config('AUTH_CACHE_LOCAL_TTL', default=5, cast=int)
+
+# Analítica (analytics/buffer.py): cola en memoria escrita en lotes por un thread de fondo
+ANALYTICS_ENABLED = config('ANALYTICS_ENABLED', default=True, cast=bool)
+ANALYTICS_BUFFER_SIZE = config('ANALYTICS_BUFFER_SIZE', default=10000, cast=int)  # cola llena = se descartan eventos
+ANALYTICS_FLUSH_BATCH_SIZE = config('ANALYTICS_FLUSH_BATCH_SIZE', default=500, cast=int)
+ANALYTICS_FLUSH_INTERVAL = config('ANALYTICS_FLUSH_INTERVAL', default=5, cast=float)  # segundos
+
+# Reportes de plataforma (analytics/reports.py): filas por chunk del cursor del servidor
+REPORTS_CHUNK_SIZE = config('REPORTS_CHUNK_SIZE', default=2000, cast=int)
+
+# Exportaciones CSV en streaming (core/utils/csv_export.py): filas por viaje
+# al cursor del servidor y por bloque escrito a la respuesta
+CSV_EXPORT_ROWS_PER_CHUNK = config('CSV_EXPORT_ROWS_PER_CHUNK', default=500, cast=int)
+
+# Admin con tablas grandes (core/utils/admin.py)
+ADMIN_COUNT_LIMIT = config('ADMIN_COUNT_LIMIT', default=10000, cast=int)  # COUNT(*) máximo por listado
+ADMIN_FILTER_CACHE_TTL = config('ADMIN_FILTER_CACHE_TTL', default=3600, cast=int)
+
+# Contador de no leídas (notifications/counters.py); el TTL fuerza la reconciliación con DB
+NOTIFICATIONS_UNREAD_CACHE_TTL = config('NOTIFICATIONS_UNREAD_CACHE_TTL', default=300, cast=int)
+
+# Stream SSE de notificaciones (requiere servidor ASGI: uvicorn/daphne config.asgi:application)
+# 'notifications.streams.PostgresBroker' para varios procesos (LISTEN/NOTIFY)
+NOTIFICATIONS_BROKER = config('NOTIFICATIONS_BROKER', default='notifications.streams.InProcessBroker')
+NOTIFICATIONS_SSE_HEARTBEAT = config('NOTIFICATIONS_SSE_HEARTBEAT', default=15, cast=int)  # segundos
+NOTIFICATIONS_SSE_TICKET_TTL = config('NOTIFICATIONS_SSE_TICKET_TTL', default=60, cast=int)  # validez del ?ticket= del stream (segundos)
+
+# Retención de notificaciones (python manage.py prune_notifications)
+NOTIFICATIONS_RETENTION_DAYS = config('NOTIFICATIONS_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATIONS_ARCHIVE_DIR = config('NOTIFICATIONS_ARCHIVE_DIR', default=str(BASE_DIR / 'archive' / 'notifications'))
+NOTIFICATIONS_ARCHIVE_BUCKET = config('NOTIFICATIONS_ARCHIVE_BUCKET', default='')  # Opcional: copia en S3
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Solo en desarrollo
 CORS_ALLOW_CREDENTIALS = True
@@ -226,6 +357,11 @@ if EMAIL_BACKEND == 'django_ses.SESBackend':
     AWS_SES_REGION_NAME = AWS_SES_REGION  # ← Usar la variable ya definida
     AWS_SES_REGION_ENDPOINT = f'email.{AWS_SES_REGION_NAME}.amazonaws.com'
 
+# Envíos masivos con plantillas de SES (notifications/email_templates.py)
+SES_TEMPLATE_PREFIX = config('SES_TEMPLATE_PREFIX', default='sproutmarket')
+SES_MAX_SEND_RATE = config('SES_MAX_SEND_RATE', default=1, cast=float)  # Solo si falla get_send_quota
+EMAIL_SEND_MAX_WAIT = config('EMAIL_SEND_MAX_WAIT', default=0.5, cast=float)  # segundos que un request espera cupo de SES; después el email va al worker
+
 # Stripe Configuration
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
@@ -237,35 +373,98 @@ COGNITO_USER_POOL_ID = config('COGNITO_USER_POOL_ID', default='')
 COGNITO_APP_CLIENT_ID = config('COGNITO_APP_CLIENT_ID', default='')
 COGNITO_REGION = config('COGNITO_REGION', default='us-east-2')  # ← Cambiar a us-east-2
 
+# Verificación local de JWT de Cognito (core.authentication.CognitoJWTAuthentication)
+COGNITO_JWKS_REFRESH_INTERVAL = config('COGNITO_JWKS_REFRESH_INTERVAL', default=3600, cast=int)  # segundos
+# Mínimo entre refrescos disparados por tokens con kid desconocido
+COGNITO_JWKS_MIN_REFRESH_INTERVAL = config('COGNITO_JWKS_MIN_REFRESH_INTERVAL', default=60, cast=int)  # segundos
+COGNITO_JWT_CACHE_SIZE = config('COGNITO_JWT_CACHE_SIZE', default=1024, cast=int)
+COGNITO_JWT_LEEWAY = config('COGNITO_JWT_LEEWAY', default=30, cast=int)  # segundos de tolerancia de reloj
+
 # AWS SNS (configurar después del Día 7)
-SNS_TOPIC_ARN = config('SNS_TOPIC_ARN', default='')
+SNS_TOPIC_ARN = config('SNS_TOPIC_ARN', default='')  # Solo anuncios generales (broadcast)
+
+# Push por dispositivo: platform applications de SNS (FCM/APNs) y topic por usuario
+SNS_PLATFORM_APPLICATIONS = {
+    'android': config('SNS_PLATFORM_APPLICATION_ANDROID', default=''),
+    'ios': config('SNS_PLATFORM_APPLICATION_IOS', default=''),
+}
+SNS_USER_TOPIC_PREFIX = config('SNS_USER_TOPIC_PREFIX', default='sproutmarket-user')
+
+# Worker de notificaciones (python manage.py run_notification_worker)
+PUSH_WORKER_BATCH_SIZE = config('PUSH_WORKER_BATCH_SIZE', default=500, cast=int)
+PUSH_WORKER_POLL_INTERVAL = config('PUSH_WORKER_POLL_INTERVAL', default=2, cast=float)
+PUSH_WORKER_MAX_ATTEMPTS = config('PUSH_WORKER_MAX_ATTEMPTS', default=5, cast=int)  # después se descarta el push
+PUSH_WORKER_RETRY_BACKOFF = config('PUSH_WORKER_RETRY_BACKOFF', default=30, cast=int)  # segundos, se duplica por intento
+PUSH_WORKER_CLAIM_TIMEOUT = config('PUSH_WORKER_CLAIM_TIMEOUT', default=300, cast=int)  # segundos antes de que otro worker retome un lote tomado
+PUSH_PRUNE_INTERVAL = config('PUSH_PRUNE_INTERVAL', default=3600, cast=int)  # segundos
+
+# Instrumentación por request (core/instrumentation.py): consultas, tiempo en
+# DB, en servicios externos y en serialización. Apagada no tiene costo.
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=False, cast=bool)
+INSTRUMENTATION_SERVER_TIMING = config('INSTRUMENTATION_SERVER_TIMING', default=True, cast=bool)
+INSTRUMENTATION_SLOW_QUERY_MS = config('INSTRUMENTATION_SLOW_QUERY_MS', default=100, cast=float)
+INSTRUMENTATION_SLOW_QUERY_SAMPLE_RATE = config(
+    'INSTRUMENTATION_SLOW_QUERY_SAMPLE_RATE', default=0.2, cast=float
+)  # fracción de consultas lentas que se registran
+
+# Métricas en formato Prometheus (core/metrics.py), expuestas en /metrics.
+# METRICS_DIR: directorio compartido por los workers de gunicorn (archivos
+# mmap por proceso); vacío = valores en memoria del proceso (runserver).
+# Se vacía al arrancar gunicorn con config/gunicorn.conf.py (hook on_starting).
+METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Bearer token para el scrape
+# Sin METRICS_TOKEN y con DEBUG=False solo estas IPs (REMOTE_ADDR) pueden hacer scrape;
+# no incluir la IP del proxy inverso o /metrics quedaría público a través de él
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='', cast=Csv())
+
+# Logging sin bloquear requests (core/structured_logging.py): los records se
+# encolan y un thread los escribe a consola y archivo (JSON por línea)
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_FORMAT = config('LOG_FORMAT', default='json')  # json | text
+LOG_FILE = config('LOG_FILE', default=str(BASE_DIR / 'logs' / 'django.log'))  # vacío = solo consola
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', default=50 * 1024 * 1024, cast=int)  # rota al pasar de este tamaño
+LOG_ROTATE_WHEN = config('LOG_ROTATE_WHEN', default='midnight')  # ...o al cumplirse el intervalo
+LOG_BACKUP_COUNT = config('LOG_BACKUP_COUNT', default=14, cast=int)
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)  # llena = se descartan records
+# Muestreo de logs INFO/DEBUG (WARNING o mayor siempre se escribe)
+LOG_INFO_SAMPLE_RATE = config('LOG_INFO_SAMPLE_RATE', default=1.0, cast=float)
+LOG_SAMPLED_LOGGERS = config('LOG_SAMPLED_LOGGERS', default='', cast=Csv())  # vacío = todos
 
-# Logging (opcional pero recomendado)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
+    'filters': {
+        'request_id': {
+            '()': 'core.structured_logging.RequestIDFilter',
         },
-        'file': {
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'django.log',
+        'sampling': {
+            '()': 'core.structured_logging.SamplingFilter',
+            'rate': LOG_INFO_SAMPLE_RATE,
+            'loggers': LOG_SAMPLED_LOGGERS,
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'core.structured_logging.QueueLogHandler',
+            'filename': LOG_FILE,
+            'max_bytes': LOG_MAX_BYTES,
+            'when': LOG_ROTATE_WHEN,
+            'backup_count': LOG_BACKUP_COUNT,
+            'json_format': LOG_FORMAT == 'json',
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['request_id', 'sampling'],
         },
     },
     'root': {
-        'handlers': ['console'],
-        'level': 'INFO',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
     },
 }
-
-# Crear directorio de logs si no existe
-if not (BASE_DIR / 'logs').exists():
-    (BASE_DIR / 'logs').mkdir()
\ No newline at end of file
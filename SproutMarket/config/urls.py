@@ -20,6 +20,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include('core.urls')),  # API de autenticación
@@ -28,6 +30,8 @@ urlpatterns = [
     path("api/", include('exchanges.urls')),
     path('api/notifications/', include('notifications.urls')),
     path('api/subscriptions/', include('subscriptions.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),  # Scrape de Prometheus
 ]
 
 # Servir archivos media en desarrollo
@@ -3,11 +3,20 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User, Category
+from core.utils.admin import CachedValuesListFilter, OptimizedAdminMixin
+from .models import User, Category, StoredObject, PendingDeletion
+
+
+class CityListFilter(CachedValuesListFilter):
+    """Filtro por ciudad sin SELECT DISTINCT en cada carga de página"""
+    
+    title = _('ciudad')
+    parameter_name = 'city'
+    field = 'city'
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(OptimizedAdminMixin, BaseUserAdmin):
     """Admin personalizado para el modelo User"""
     
     list_display = [
@@ -16,9 +25,11 @@ class UserAdmin(BaseUserAdmin):
     ]
     list_filter = [
         'is_premium', 'is_email_verified', 'is_staff', 
-        'is_active', 'city'
+        'is_active', CityListFilter
     ]
-    search_fields = ['email', 'username', 'first_name', 'last_name', 'business_name']
+    search_fields = ['^username', 'first_name', 'last_name', 'business_name']
+    exact_search_fields = ['email']
+    prefix_search_fields = {'cus_': 'stripe_customer_id'}
     ordering = ['-created_at']
     
     fieldsets = (
@@ -83,4 +94,23 @@ class CategoryAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+
+@admin.register(StoredObject)
+class StoredObjectAdmin(admin.ModelAdmin):
+    """Admin para objetos de S3 deduplicados"""
+    
+    list_display = ['key', 'ref_count', 'size', 'content_type', 'created_at']
+    search_fields = ['key', 'sha256']
+    readonly_fields = ['key', 'sha256', 'size', 'content_type', 'created_at', 'updated_at']
+
+
+@admin.register(PendingDeletion)
+class PendingDeletionAdmin(admin.ModelAdmin):
+    """Admin para la cola de eliminaciones de S3"""
+    
+    list_display = ['key', 'reason', 'not_before', 'attempts', 'created_at']
+    list_filter = ['reason']
+    search_fields = ['key']
+    readonly_fields = ['created_at']
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        # Hooks de Stripe y DRF para la instrumentación (no-op si está apagada)
+        from core.instrumentation import install
+        install()
+
+        # Estado de las conexiones a DB al terminar cada request
+        from core import metrics
+        if metrics.is_enabled():
+            from django.core.signals import request_finished
+            request_finished.connect(metrics.record_db_connections)
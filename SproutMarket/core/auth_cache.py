@@ -0,0 +1,122 @@
+# core/auth_cache.py
+
+"""
+Cache de autenticación: token -> user id -> snapshot del usuario.
+
+TokenAuthentication hace un JOIN Token -> User (fila ancha) en cada request
+autenticado. Aquí se guarda en cache la fila completa del usuario (salvo el
+hash de la contraseña, que queda diferido) y se reconstruye con from_db():
+el perfil y los permisos no vuelven a consultar la DB.
+
+El snapshot se invalida al guardar/eliminar el usuario (User.save/delete)
+y el token al hacer logout; el TTL corto acota cualquier desfase restante
+(ej: tokens eliminados desde el admin).
+
+Con un cache compartido entre procesos (Redis, Memcached, DB) se usa
+AUTH_CACHE_TTL. Con LocMemCache cada worker tiene su propia copia y un
+logout o una desactivación solo se invalidan en el worker que la procesó:
+ahí el TTL baja a AUTH_CACHE_LOCAL_TTL (segundos), que es el desfase máximo
+en los demás workers. Con DummyCache se consulta la DB directamente (un
+JOIN, como TokenAuthentication).
+"""
+
+from functools import cache as memoize
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.metrics import record_cache_lookup
+
+
+@memoize
+def snapshot_fields():
+    """Campos del snapshot: toda la fila menos el hash de la contraseña"""
+    User = get_user_model()
+    return tuple(
+        f.attname for f in User._meta.concrete_fields if f.attname != 'password'
+    )
+
+
+def is_enabled():
+    """False con DummyCache (no guarda nada)"""
+    return not isinstance(caches['default'], DummyCache)
+
+
+def _token_key(token_key):
+    return f'auth:token:{token_key}'
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _timeout():
+    ttl = getattr(settings, 'AUTH_CACHE_TTL', 60)
+    if isinstance(caches['default'], LocMemCache):
+        # Cache por proceso: sin invalidación entre workers, TTL corto
+        return min(ttl, getattr(settings, 'AUTH_CACHE_LOCAL_TTL', 5))
+    return ttl
+
+
+def _build_user(values):
+    User = get_user_model()
+    # from_db() espera los valores en el orden de los campos del modelo
+    field_names = [
+        f.attname for f in User._meta.concrete_fields if f.attname in values
+    ]
+    return User.from_db('default', field_names, [values[f] for f in field_names])
+
+
+def get_user(user_id):
+    """
+    Usuario desde el snapshot en cache (solo password queda diferido)
+
+    Returns:
+        User o None si no existe
+    """
+    if not is_enabled():
+        return get_user_model().objects.filter(pk=user_id).first()
+
+    values = cache.get(_user_key(user_id))
+    record_cache_lookup('auth_user', values is not None)
+    if values is None:
+        User = get_user_model()
+        values = User.objects.filter(pk=user_id).values(*snapshot_fields()).first()
+        if values is None:
+            return None
+        cache.set(_user_key(user_id), values, _timeout())
+    return _build_user(values)
+
+
+def get_token_user(token_key):
+    """
+    Usuario dueño del token de DRF
+
+    Returns:
+        User o None si el token no existe
+    """
+    if not is_enabled():
+        from rest_framework.authtoken.models import Token
+        token = Token.objects.select_related('user').filter(key=token_key).first()
+        return token.user if token is not None else None
+
+    user_id = cache.get(_token_key(token_key))
+    record_cache_lookup('auth_token', user_id is not None)
+    if user_id is None:
+        from rest_framework.authtoken.models import Token
+        user_id = Token.objects.filter(key=token_key).values_list('user_id', flat=True).first()
+        if user_id is None:
+            return None
+        cache.set(_token_key(token_key), user_id, _timeout())
+    return get_user(user_id)
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+def invalidate_token(token_key):
+    cache.delete(_token_key(token_key))
@@ -1,23 +1,43 @@
 # core/authentication.py
 
-import boto3
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+import jwt
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from botocore.exceptions import ClientError
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+
+from core import auth_cache
+from core.metrics import record_cache_lookup
+from core.utils.aws_clients import get_client
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
 
+def _log_cognito_error(operation, error):
+    """Error de Cognito con el código como campo (filtrable sin parsear el mensaje)"""
+    code = error.response.get('Error', {}).get('Code', '')
+    logger.warning(
+        f"Cognito {operation} failed: {error}",
+        extra={'aws_operation': operation, 'aws_error_code': code}
+    )
+
+
 class CognitoClient:
     """Cliente para interactuar con AWS Cognito"""
     
     def __init__(self):
-        self.client = boto3.client(
-            'cognito-idp',
-            region_name=settings.COGNITO_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        )
+        self.client = get_client('cognito-idp', region_name=settings.COGNITO_REGION)
         self.user_pool_id = settings.COGNITO_USER_POOL_ID
         self.client_id = settings.COGNITO_APP_CLIENT_ID
     
@@ -55,7 +75,7 @@ class CognitoClient:
             return response
             
         except ClientError as e:
-            print(f"Error en sign_up: {e}")
+            _log_cognito_error('sign_up', e)
             return None
     
     def confirm_sign_up(self, username, confirmation_code):
@@ -78,7 +98,7 @@ class CognitoClient:
             return True
             
         except ClientError as e:
-            print(f"Error en confirm_sign_up: {e}")
+            _log_cognito_error('confirm_sign_up', e)
             return False
     
     def sign_in(self, username, password):
@@ -111,7 +131,7 @@ class CognitoClient:
             }
             
         except ClientError as e:
-            print(f"Error en sign_in: {e}")
+            _log_cognito_error('sign_in', e)
             return None
     
     def get_user(self, access_token):
@@ -140,7 +160,7 @@ class CognitoClient:
             }
             
         except ClientError as e:
-            print(f"Error en get_user: {e}")
+            _log_cognito_error('get_user', e)
             return None
     
     def forgot_password(self, username):
@@ -153,7 +173,7 @@ class CognitoClient:
             return True
             
         except ClientError as e:
-            print(f"Error en forgot_password: {e}")
+            _log_cognito_error('forgot_password', e)
             return False
     
     def confirm_forgot_password(self, username, confirmation_code, new_password):
@@ -168,15 +188,54 @@ class CognitoClient:
             return True
             
         except ClientError as e:
-            print(f"Error en confirm_forgot_password: {e}")
+            _log_cognito_error('confirm_forgot_password', e)
             return False
 
 
 # Helper function
+def get_user_data_from_id_token(id_token):
+    """
+    Atributos del usuario tomados del ID token (mismo formato que
+    CognitoClient.get_user), sin otra llamada a Cognito
+    
+    El token viene directo de la respuesta de initiate_auth (TLS contra
+    Cognito), por eso no se vuelve a verificar la firma aquí.
+    
+    Args:
+        id_token: ID token devuelto por sign_in
+    
+    Returns:
+        dict: {'username', 'attributes'} o None si el token no es válido
+    """
+    try:
+        claims = jwt.decode(id_token, options={'verify_signature': False})
+    except jwt.InvalidTokenError as e:
+        logger.warning(f"Invalid Cognito ID token: {str(e)}")
+        return None
+    
+    if claims.get('token_use') != 'id' or 'cognito:username' not in claims:
+        return None
+    
+    attributes = {
+        name: value for name, value in claims.items()
+        if name in ('sub', 'email', 'name', 'phone_number')
+    }
+    attributes['email_verified'] = str(claims.get('email_verified', False)).lower()
+    
+    return {
+        'username': claims['cognito:username'],
+        'attributes': attributes
+    }
+
+
 def sync_cognito_user_to_db(cognito_user_data):
     """
     Sincroniza usuario de Cognito con base de datos local
     
+    Solo escribe en DB si el usuario no existe o si cambió algún atributo
+    que viene de Cognito (email, email verificado). El token de DRF se trae
+    en la misma consulta (user.auth_token, ver get_login_token).
+    
     Args:
         cognito_user_data: Dict con información del usuario de Cognito
     
@@ -185,15 +244,294 @@ def sync_cognito_user_to_db(cognito_user_data):
     """
     username = cognito_user_data['username']
     attributes = cognito_user_data['attributes']
+    email = attributes.get('email', '')
+    is_email_verified = attributes.get('email_verified', 'false') == 'true'
+    
+    user = User.objects.select_related('auth_token').filter(username=username).first()
+    
+    if user is None:
+        user, created = User.objects.get_or_create(
+            username=username,
+            defaults={
+                'email': email,
+                'first_name': attributes.get('name', '').split()[0] if attributes.get('name') else '',
+                'is_email_verified': is_email_verified
+            }
+        )
+        if created:
+            # Queda cacheado en user.auth_token para get_login_token
+            Token.objects.create(user=user)
+        return user
     
-    # Buscar o crear usuario en DB
-    user, created = User.objects.get_or_create(
-        username=username,
-        defaults={
-            'email': attributes.get('email', ''),
-            'first_name': attributes.get('name', '').split()[0] if attributes.get('name') else '',
-            'is_email_verified': attributes.get('email_verified', 'false') == 'true'
+    changed = []
+    if email and user.email != email:
+        user.email = email
+        changed.append('email')
+    if user.is_email_verified != is_email_verified:
+        user.is_email_verified = is_email_verified
+        changed.append('is_email_verified')
+    
+    if changed:
+        user.save(update_fields=changed + ['updated_at'])
+    
+    return user
+
+
+def get_login_token(user):
+    """
+    Token de DRF del usuario; solo consulta/crea si no vino con
+    select_related('auth_token')
+    """
+    try:
+        return user.auth_token
+    except Token.DoesNotExist:
+        token, _ = Token.objects.get_or_create(user=user)
+        return token
+
+
+class CognitoJWKS:
+    """
+    Llaves públicas (JWKS) del user pool, cacheadas por proceso
+    
+    Se descargan una vez; después se refrescan en un thread de fondo cada
+    COGNITO_JWKS_REFRESH_INTERVAL segundos, así que verificar un token
+    nunca espera una llamada de red (salvo la primera descarga del proceso).
+    
+    Un kid desconocido también dispara un refresco (rotación de llaves), pero
+    como mucho uno cada COGNITO_JWKS_MIN_REFRESH_INTERVAL segundos: tokens
+    con kids inventados no pueden forzar descargas continuas del JWKS.
+    """
+    
+    def __init__(self):
+        self._keys = {}
+        self._fetched_at = 0
+        self._attempted_at = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+    
+    @property
+    def url(self):
+        return (
+            f'https://cognito-idp.{settings.COGNITO_REGION}.amazonaws.com/'
+            f'{settings.COGNITO_USER_POOL_ID}/.well-known/jwks.json'
+        )
+    
+    def _fetch(self):
+        with urllib.request.urlopen(self.url, timeout=settings.AWS_CONNECT_TIMEOUT) as response:
+            jwks = json.loads(response.read())
+        keys = {
+            key['kid']: jwt.PyJWK(key, algorithm='RS256')
+            for key in jwks.get('keys', [])
         }
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+    
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._attempted_at = time.monotonic()
+        
+        def run():
+            try:
+                self._fetch()
+            except Exception as e:
+                logger.warning(f"Error refreshing Cognito JWKS: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+        
+        threading.Thread(target=run, name='cognito-jwks', daemon=True).start()
+    
+    def get_key(self, kid):
+        """
+        Llave para el kid del token
+        
+        Returns:
+            PyJWK o None si el kid no está en el JWKS actual
+        """
+        if not self._keys:
+            self._fetch()
+        elif time.monotonic() - self._fetched_at > settings.COGNITO_JWKS_REFRESH_INTERVAL:
+            self._refresh_in_background()
+        
+        key = self._keys.get(kid)
+        if key is None:
+            # Posible rotación de llaves: refrescar para los siguientes tokens,
+            # salvo que ya se haya intentado hace poco
+            last_refresh = max(self._fetched_at, self._attempted_at)
+            if time.monotonic() - last_refresh >= settings.COGNITO_JWKS_MIN_REFRESH_INTERVAL:
+                self._refresh_in_background()
+        return key
+
+
+class VerifiedTokenCache:
+    """LRU thread-safe: SHA-256 del token completo -> (user id, expiración)"""
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, token_key):
+        with self._lock:
+            entry = self._entries.get(token_key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[token_key]
+                return None
+            self._entries.move_to_end(token_key)
+            return entry[0]
+    
+    def set(self, token_key, user_id, expires_at):
+        with self._lock:
+            self._entries[token_key] = (user_id, expires_at)
+            self._entries.move_to_end(token_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_jwks = CognitoJWKS()
+_verified_tokens = None
+
+
+def get_verified_token_cache():
+    global _verified_tokens
+    if _verified_tokens is None:
+        _verified_tokens = VerifiedTokenCache(settings.COGNITO_JWT_CACHE_SIZE)
+    return _verified_tokens
+
+
+def verify_cognito_token(token):
+    """
+    Verifica localmente un access token o ID token de Cognito
+    
+    Returns:
+        dict: Claims del token
+    
+    Raises:
+        jwt.InvalidTokenError: Si la firma, el emisor, la audiencia o la
+            expiración no son válidos
+    """
+    header = jwt.get_unverified_header(token)
+    key = _jwks.get_key(header.get('kid'))
+    if key is None:
+        raise jwt.InvalidTokenError('Llave de firma desconocida')
+    
+    claims = jwt.decode(
+        token,
+        key.key,
+        algorithms=['RS256'],
+        issuer=(
+            f'https://cognito-idp.{settings.COGNITO_REGION}.amazonaws.com/'
+            f'{settings.COGNITO_USER_POOL_ID}'
+        ),
+        leeway=settings.COGNITO_JWT_LEEWAY,
+        # El access token no trae aud (trae client_id): se valida abajo
+        options={'require': ['exp', 'iss', 'token_use'], 'verify_aud': False}
     )
     
-    return user
\ No newline at end of file
+    token_use = claims.get('token_use')
+    if token_use == 'access':
+        client_id = claims.get('client_id')
+    elif token_use == 'id':
+        client_id = claims.get('aud')
+    else:
+        raise jwt.InvalidTokenError('token_use inválido')
+    
+    if client_id != settings.COGNITO_APP_CLIENT_ID:
+        raise jwt.InvalidTokenError('El token no es de esta aplicación')
+    
+    return claims
+
+
+class CognitoJWTAuthentication(authentication.BaseAuthentication):
+    """
+    Autenticación DRF con "Authorization: Bearer <token de Cognito>"
+    
+    Verifica la firma localmente con el JWKS cacheado (sin llamadas a AWS
+    por request) y guarda en un LRU los tokens ya verificados.
+    """
+    
+    keyword = 'Bearer'
+    
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Header Authorization inválido')
+        if not settings.COGNITO_USER_POOL_ID:
+            return None
+        
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Token inválido')
+        
+        # Hash del token completo: la firma sola no liga header y payload
+        token_key = hashlib.sha256(token.encode()).hexdigest()
+        cache = get_verified_token_cache()
+        
+        user_id = cache.get(token_key)
+        record_cache_lookup('cognito_token', user_id is not None)
+        if user_id is not None:
+            user = auth_cache.get_user(user_id)
+            if user is None or not user.is_active:
+                raise exceptions.AuthenticationFailed('Usuario inactivo o eliminado')
+            return (user, token)
+        
+        try:
+            claims = verify_cognito_token(token)
+        except jwt.ExpiredSignatureError:
+            raise exceptions.AuthenticationFailed('El token expiró')
+        except jwt.InvalidTokenError as e:
+            raise exceptions.AuthenticationFailed(f'Token inválido: {str(e)}')
+        except Exception as e:
+            logger.error(f"Error verifying Cognito token: {str(e)}")
+            raise exceptions.AuthenticationFailed('No fue posible verificar el token')
+        
+        username = claims.get('username') or claims.get('cognito:username')
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            if claims['token_use'] != 'id':
+                raise exceptions.AuthenticationFailed('Usuario no registrado; inicia sesión')
+            # El ID token trae los atributos necesarios para crearlo
+            user = sync_cognito_user_to_db({
+                'username': username,
+                'attributes': {
+                    'email': claims.get('email', ''),
+                    'name': claims.get('name', ''),
+                    'email_verified': str(claims.get('email_verified', False)).lower(),
+                }
+            })
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('Usuario inactivo o eliminado')
+        
+        cache.set(token_key, user.pk, claims['exp'])
+        return (user, token)
+    
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """
+    TokenAuthentication que resuelve token -> usuario desde cache
+    (core.auth_cache) en lugar de hacer el JOIN Token -> User por request
+    """
+    
+    def authenticate_credentials(self, key):
+        user = auth_cache.get_token_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed('Token inválido.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('Usuario inactivo o eliminado.')
+        return (user, key)
@@ -0,0 +1,9 @@
+# core/benchmark/__init__.py
+
+"""
+Suite de benchmarks de la API REST (manage.py bench_api).
+
+- factories: datos sintéticos (usuarios, productos, órdenes, notificaciones...)
+- fakes: Stripe, S3, SES, SNS y Cognito en proceso, sin red
+- scenarios: endpoints públicos a medir
+"""
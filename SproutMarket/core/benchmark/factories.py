@@ -0,0 +1,271 @@
+# core/benchmark/factories.py
+
+"""
+Datos sintéticos para los benchmarks
+
+seed() llena la base de datos con N usuarios, productos, órdenes,
+intercambios y notificaciones usando bulk_create. Con la misma semilla los
+datos son idénticos entre corridas (mismo número de filas por página, mismas
+relaciones), para que las mediciones sean comparables con el baseline.
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from analytics import rollups
+from core.models import Category, User
+from exchanges.models import Exchange, ExchangeOffer
+from notifications.models import Notification, PushDevice
+from payments.models import Transaction
+from products.models import Cart, Order, Product
+
+
+PLANTS = [
+    ('Monstera', 'Monstera deliciosa'),
+    ('Potus', 'Epipremnum aureum'),
+    ('Sábila', 'Aloe vera'),
+    ('Lengua de suegra', 'Dracaena trifasciata'),
+    ('Helecho', 'Nephrolepis exaltata'),
+    ('Lavanda', 'Lavandula angustifolia'),
+    ('Echeveria', 'Echeveria elegans'),
+    ('Albahaca', 'Ocimum basilicum'),
+]
+
+CITIES = ['Chihuahua', 'Monterrey', 'Guadalajara', 'Puebla', 'Mérida']
+
+
+class Dataset:
+    """Referencias a los datos creados (usuarios y objetos de ejemplo)"""
+
+    def __init__(self):
+        self.admin = None
+        self.buyer = None
+        self.seller = None
+        self.tokens = {}
+        self.product = None
+        self.category = None
+        self.order = None
+        self.transaction = None
+        self.exchange = None
+        self.notification = None
+        self.device = None
+        self.cart_product_id = None
+        self.counts = {}
+
+    def token(self, user):
+        return self.tokens[user.pk]
+
+
+def _plant(rng):
+    return rng.choice(PLANTS)
+
+
+def seed(users=200, products=1000, orders=2000, notifications=5000, exchanges=200, seed=1):
+    """
+    Crea el conjunto de datos del benchmark
+
+    Args:
+        users (int): Usuarios (además del admin; mínimo 3)
+        products (int): Productos activos
+        orders (int): Órdenes completadas (con sus transacciones)
+        notifications (int): Notificaciones repartidas entre usuarios
+        exchanges (int): Intercambios activos (con una oferta cada uno)
+        seed (int): Semilla del generador aleatorio
+
+    Returns:
+        Dataset
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    data = Dataset()
+
+    call_command('init_categories', stdout=StringIO())
+    categories = list(Category.objects.order_by('order'))
+
+    # Usuarios (sin hash de contraseña: se autentican por token)
+    data.admin = User.objects.create_superuser(
+        username='bench-admin', email='bench-admin@example.com', password=None
+    )
+    User.objects.bulk_create([
+        User(
+            username=f'bench{i}',
+            email=f'bench{i}@example.com',
+            password='!',
+            city=rng.choice(CITIES),
+            is_email_verified=True,
+            is_premium=i % 5 == 0,
+            premium_expires_at=now + timedelta(days=30) if i % 5 == 0 else None,
+        )
+        for i in range(users)
+    ], batch_size=500)
+    people = list(User.objects.filter(username__startswith='bench').exclude(pk=data.admin.pk).order_by('pk'))
+    data.seller, data.buyer = people[0], people[1]
+    usernames = {user.pk: user.username for user in people}
+
+    tokens = [Token(key=Token.generate_key(), user=user) for user in people + [data.admin]]
+    Token.objects.bulk_create(tokens, batch_size=500)
+    data.tokens = {token.user_id: token.key for token in tokens}
+
+    # Productos: el vendedor principal (premium) tiene 20, por debajo de su
+    # límite de publicación para que products.create siga siendo válido
+    new_products = []
+    for i in range(products):
+        common_name, scientific_name = _plant(rng)
+        new_products.append(Product(
+            seller=data.seller if i < 20 else rng.choice(people[1:]),
+            common_name=f'{common_name} {i}',
+            scientific_name=scientific_name,
+            description=f'{common_name} sana, lista para trasplante.',
+            quantity=rng.randint(1, 50),
+            price_mxn=Decimal(rng.randint(50, 1500)),
+            width_cm=Decimal(rng.randint(5, 60)),
+            height_cm=Decimal(rng.randint(5, 120)),
+            image1=f'products/bench-{i}.jpg',
+            view_count=rng.randint(0, 500),
+        ))
+    Product.objects.bulk_create(new_products, batch_size=500)
+    catalog = list(Product.objects.order_by('pk'))
+    Product.categories.through.objects.bulk_create([
+        Product.categories.through(product_id=product.pk, category_id=rng.choice(categories).pk)
+        for product in catalog
+    ], batch_size=500)
+    data.product = catalog[0]
+    data.category = categories[0]
+
+    # Carritos con 1-3 productos
+    Cart.objects.bulk_create([
+        Cart(user=user, items=[
+            {'product_id': product.pk, 'quantity': 1}
+            for product in rng.sample(catalog, rng.randint(1, 3))
+        ])
+        for user in people
+    ], batch_size=500)
+    data.cart_product_id = Cart.objects.get(user=data.buyer).items[0]['product_id']
+
+    # Órdenes completadas con items de varios vendedores
+    new_orders = []
+    for i in range(orders):
+        items = []
+        subtotal = Decimal('0')
+        for product in rng.sample(catalog, rng.randint(1, 3)):
+            quantity = rng.randint(1, 3)
+            item_subtotal = product.price_mxn * quantity
+            subtotal += item_subtotal
+            items.append({
+                'product_id': product.pk,
+                'product_name': product.common_name,
+                'quantity': quantity,
+                'unit_price': float(product.price_mxn),
+                'subtotal': float(item_subtotal),
+                'seller_id': product.seller_id,
+                'seller_username': usernames[product.seller_id],
+            })
+        buyer = data.buyer if i % 10 == 0 else rng.choice(people)
+        new_orders.append(Order(
+            buyer=buyer,
+            buyer_name=buyer.username,
+            buyer_phone='6140000000',
+            buyer_address='Calle Principal #123',
+            items=items,
+            subtotal_mxn=subtotal,
+            commission_mxn=subtotal * Decimal('0.10'),
+            total_mxn=subtotal,
+            stripe_payment_id=f'pi_seed{i}',
+            status='completed',
+        ))
+    Order.objects.bulk_create(new_orders, batch_size=500)
+
+    # Fechas repartidas en el último año (auto_now_add no permite fijarlas al crear)
+    history = list(Order.objects.order_by('pk'))
+    for order in history:
+        order.created_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+    Order.objects.bulk_update(history, ['created_at'], batch_size=500)
+    data.order = next((order for order in history if order.buyer_id == data.buyer.pk), None)
+
+    Transaction.objects.bulk_create([
+        Transaction(
+            user_id=order.buyer_id, type='purchase', amount_mxn=order.total_mxn,
+            stripe_id=order.stripe_payment_id, reference_id=order.pk,
+            reference_type='order', description=f'Compra - Orden #{order.pk}'
+        )
+        for order in history
+    ], batch_size=500)
+    data.transaction = Transaction.objects.filter(user=data.buyer).first()
+
+    if history:
+        rollups.rebuild(
+            min(order.created_at for order in history).date(),
+            now.date()
+        )
+
+    # Intercambios con una oferta pendiente (de otro usuario)
+    Exchange.objects.bulk_create([
+        Exchange(
+            user=data.seller if i % 10 == 0 else rng.choice(people),
+            plant_common_name=_plant(rng)[0],
+            plant_scientific_name=_plant(rng)[1],
+            description='Busco intercambiar por otra planta.',
+            width_cm=Decimal(rng.randint(5, 60)),
+            height_cm=Decimal(rng.randint(5, 120)),
+            location=rng.choice(CITIES),
+            image1=f'exchanges/bench-{i}.jpg',
+            stripe_payment_id=f'pi_exchange{i}',
+            status='active',
+        )
+        for i in range(exchanges)
+    ], batch_size=500)
+    board = list(Exchange.objects.order_by('pk'))
+    ExchangeOffer.objects.bulk_create([
+        ExchangeOffer(
+            exchange=exchange,
+            # El comprador principal queda libre para ofertar en el primero
+            offeror=people[2] if exchange is board[0] else rng.choice(
+                [user for user in people[2:12] if user.pk != exchange.user_id]
+            ),
+            plant_common_name=_plant(rng)[0],
+            plant_scientific_name=_plant(rng)[1],
+            description='Te ofrezco esta planta.',
+            width_cm=Decimal('10'),
+            height_cm=Decimal('20'),
+            image1=f'exchanges/offer-{exchange.pk}.jpg',
+            status='pending',
+        )
+        for exchange in board
+    ], batch_size=500)
+    data.exchange = board[0] if board else None
+
+    # Notificaciones (el comprador principal tiene una parte fija)
+    types = [choice for choice, _ in Notification.TYPE_CHOICES]
+    Notification.objects.bulk_create([
+        Notification(
+            user=data.buyer if i % 10 == 0 else rng.choice(people),
+            type=rng.choice(types),
+            title='Notificación de prueba',
+            message='Mensaje de prueba para el benchmark.',
+            is_read=rng.random() < 0.5,
+        )
+        for i in range(notifications)
+    ], batch_size=500)
+    data.notification = Notification.objects.filter(user=data.buyer).first()
+    data.device = PushDevice.objects.create(
+        user=data.buyer,
+        platform='android',
+        token='bench-seed-device',
+        endpoint_arn='arn:aws:sns:bench:0:endpoint/seed',
+        subscription_arn='arn:aws:sns:bench:0:subscription/seed'
+    )
+
+    data.counts = {
+        'users': len(people) + 1,
+        'products': len(catalog),
+        'orders': len(history),
+        'exchanges': len(board),
+        'notifications': notifications,
+    }
+    return data
@@ -0,0 +1,238 @@
+# core/benchmark/fakes.py
+
+"""
+Servicios externos falsos en proceso para los benchmarks.
+
+Los clientes de AWS se reemplazan en core.utils.aws_clients (todo el código
+los obtiene con get_client) y Stripe parchando los métodos de clase que usa
+el proyecto. Las respuestas tienen la forma mínima que leen los servicios;
+ninguna llamada sale a la red, así que la latencia medida es solo la de
+Django, DRF y la base de datos.
+"""
+
+import itertools
+import json
+import time
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+import jwt
+import stripe
+
+from core.utils import aws_clients
+
+
+_ids = itertools.count(1)
+
+
+def _next_id(prefix):
+    return f'{prefix}_bench{next(_ids)}'
+
+
+class FakeStripeObject(dict):
+    """Objeto de Stripe: dict con acceso por atributo (metadata.get(...) incluido)"""
+
+    def __getattr__(self, name):
+        try:
+            value = self[name]
+        except KeyError:
+            raise AttributeError(name)
+        return FakeStripeObject(value) if isinstance(value, dict) else value
+
+
+class FakeStripe:
+    """
+    Stripe en memoria: PaymentIntent, Customer, Subscription y Webhook
+
+    Los PaymentIntent se crean ya 'succeeded' para que confirm/create de
+    intercambios sigan el camino exitoso.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = 0
+
+    def _store(self, prefix, **values):
+        self.calls += 1
+        obj = FakeStripeObject(id=_next_id(prefix), **values)
+        self.objects[obj['id']] = obj
+        return obj
+
+    def _retrieve(self, object_id, **kwargs):
+        self.calls += 1
+        if object_id not in self.objects:
+            raise stripe.error.InvalidRequestError(f'No such object: {object_id}', 'id')
+        return self.objects[object_id]
+
+    def create_payment_intent(self, amount, currency='mxn', metadata=None, **kwargs):
+        metadata = {key: str(value) for key, value in (metadata or {}).items()}
+        intent = self._store(
+            'pi', amount=amount, currency=currency, metadata=metadata,
+            status='succeeded'
+        )
+        intent['client_secret'] = f"{intent['id']}_secret"
+        return intent
+
+    def create_customer(self, email=None, **kwargs):
+        return self._store('cus', email=email)
+
+    def create_subscription(self, customer, metadata=None, **kwargs):
+        now = int(time.time())
+        return self._store(
+            'sub', customer=customer, status='incomplete',
+            current_period_start=now, current_period_end=now + 30 * 86400,
+            cancel_at_period_end=False, metadata=metadata or {},
+            latest_invoice={'payment_intent': {'client_secret': 'seti_bench_secret'}}
+        )
+
+    def modify_subscription(self, subscription_id, **values):
+        subscription = self._retrieve(subscription_id)
+        subscription.update(values)
+        return subscription
+
+    def construct_event(self, payload, sig_header, secret, **kwargs):
+        self.calls += 1
+        return FakeStripeObject(json.loads(payload))
+
+    def patches(self):
+        return [
+            mock.patch.object(stripe.PaymentIntent, 'create', self.create_payment_intent),
+            mock.patch.object(stripe.PaymentIntent, 'retrieve', self._retrieve),
+            mock.patch.object(stripe.Customer, 'create', self.create_customer),
+            mock.patch.object(stripe.Customer, 'retrieve', self._retrieve),
+            mock.patch.object(stripe.Subscription, 'create', self.create_subscription),
+            mock.patch.object(stripe.Subscription, 'retrieve', self._retrieve),
+            mock.patch.object(stripe.Subscription, 'modify', self.modify_subscription),
+            mock.patch.object(stripe.Webhook, 'construct_event', self.construct_event),
+        ]
+
+
+def fake_id_token(username, email, sub=None):
+    """ID token con los claims que lee get_user_data_from_id_token (sin firma válida)"""
+    claims = {
+        'token_use': 'id',
+        'cognito:username': username,
+        'sub': sub or _next_id('sub'),
+        'email': email,
+        'email_verified': True,
+        'exp': int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, 'sproutmarket-benchmark-signing-key', algorithm='HS256')
+
+
+class FakeAWSClient:
+    """
+    Cliente boto3 falso: cada operación devuelve una respuesta fija
+
+    Las operaciones sin respuesta definida devuelven {}. calls cuenta las
+    llamadas por operación.
+    """
+
+    def __init__(self, service_name):
+        self.service_name = service_name
+        self.calls = {}
+
+    def __getattr__(self, operation):
+        if operation.startswith('_'):
+            raise AttributeError(operation)
+
+        def call(*args, **kwargs):
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            handler = getattr(self, f'_{operation}', None)
+            return handler(**kwargs) if handler else {}
+        return call
+
+    # SES
+    def _send_email(self, **kwargs):
+        return {'MessageId': _next_id('ses')}
+
+    def _send_bulk_templated_email(self, Destinations=(), **kwargs):
+        return {'Status': [{'Status': 'Success'} for _ in Destinations]}
+
+    def _get_send_quota(self, **kwargs):
+        return {'Max24HourSend': 50000.0, 'MaxSendRate': 1000.0, 'SentLast24Hours': 0.0}
+
+    # SNS
+    def _publish(self, **kwargs):
+        return {'MessageId': _next_id('sns')}
+
+    def _publish_batch(self, PublishBatchRequestEntries=(), **kwargs):
+        return {'Successful': [{'Id': entry['Id']} for entry in PublishBatchRequestEntries]}
+
+    def _create_topic(self, Name='', **kwargs):
+        return {'TopicArn': f'arn:aws:sns:bench:0:{Name}'}
+
+    def _create_platform_endpoint(self, **kwargs):
+        return {'EndpointArn': _next_id('arn:aws:sns:bench:0:endpoint')}
+
+    def _subscribe(self, **kwargs):
+        return {'SubscriptionArn': _next_id('arn:aws:sns:bench:0:subscription')}
+
+    # S3
+    def _generate_presigned_post(self, Bucket='', Key='', **kwargs):
+        return {'url': f'https://{Bucket}.s3.amazonaws.com/', 'fields': {'key': Key}}
+
+    def _generate_presigned_url(self, **kwargs):
+        return 'https://bench.s3.amazonaws.com/presigned'
+
+    def _head_object(self, **kwargs):
+        return {'ContentLength': 1024, 'ContentType': 'image/jpeg'}
+
+    def _delete_objects(self, **kwargs):
+        return {'Deleted': []}
+
+    # Cognito
+    def _sign_up(self, Username='', **kwargs):
+        return {'UserConfirmed': False, 'UserSub': _next_id('sub')}
+
+    def _initiate_auth(self, AuthParameters=None, **kwargs):
+        username = (AuthParameters or {}).get('USERNAME', 'bench')
+        email = username if '@' in username else f'{username}@example.com'
+        return {'AuthenticationResult': {
+            'AccessToken': 'bench-access-token',
+            'IdToken': fake_id_token(username, email),
+            'RefreshToken': 'bench-refresh-token',
+            'ExpiresIn': 3600,
+        }}
+
+    def _get_user(self, AccessToken='', **kwargs):
+        return {'Username': 'bench', 'UserAttributes': [
+            {'Name': 'email', 'Value': 'bench@example.com'},
+            {'Name': 'email_verified', 'Value': 'true'},
+        ]}
+
+
+class FakeServices:
+    """Registro de los fakes instalados (para inspeccionar llamadas)"""
+
+    def __init__(self):
+        self.stripe = FakeStripe()
+        self.aws = {}
+
+    def aws_client(self, service_name, region_name):
+        client = self.aws.get(service_name)
+        if client is None:
+            client = self.aws[service_name] = FakeAWSClient(service_name)
+        return client
+
+
+@contextmanager
+def fake_services():
+    """
+    Instala Stripe y AWS falsos durante el bloque
+
+    Yields:
+        FakeServices
+    """
+    services = FakeServices()
+    aws_clients.reset_clients()
+    with ExitStack() as stack:
+        stack.enter_context(
+            mock.patch.object(aws_clients, '_create_client', services.aws_client)
+        )
+        for patch in services.stripe.patches():
+            stack.enter_context(patch)
+        try:
+            yield services
+        finally:
+            aws_clients.reset_clients()
@@ -0,0 +1,271 @@
+# core/benchmark/scenarios.py
+
+"""
+Endpoints públicos de la API a medir
+
+Cada escenario es un request (método, ruta, usuario y cuerpo) contra el
+Dataset de factories. Los escenarios de escritura se ejecutan dentro de una
+transacción que se revierte después de cada iteración, así que todos parten
+del mismo estado. prepare() corre dentro de esa transacción, antes de medir
+(ej: crear el PaymentIntent que confirma el checkout).
+
+No se miden:
+- GET /api/notifications/stream/: respuesta SSE de larga duración
+- POST /api/uploads/local/: solo existe con el backend local de subidas
+"""
+
+import json
+import time
+
+
+class Scenario:
+    """
+    Args:
+        name (str): Identificador en el reporte y el baseline
+        method (str): Método HTTP
+        path (str | callable): Ruta o función (data) -> ruta
+        user (str, optional): 'buyer', 'seller', 'admin' o None (anónimo)
+        body (dict | callable, optional): Cuerpo JSON o función
+            (data, services) -> cuerpo, llamada dentro de la transacción
+        status (int): Status esperado
+    """
+
+    def __init__(self, name, method, path, user=None, body=None, status=200):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.user = user
+        self.body = body
+        self.status = status
+
+    def get_path(self, data):
+        return self.path(data) if callable(self.path) else self.path
+
+    def prepare(self, data, services):
+        """Cuerpo del request (JSON) o None"""
+        body = self.body(data, services) if callable(self.body) else self.body
+        return None if body is None else json.dumps(body)
+
+
+def _direct_key(user, folder='products'):
+    # Mismo formato que direct_uploads.create_upload (el HEAD lo responde el fake)
+    return f'{folder}/direct/{user.pk}/bench.jpg'
+
+
+def _payment_intent(user, amount, **metadata):
+    def prepare(data, services):
+        intent = services.stripe.create_payment_intent(
+            amount=amount,
+            metadata={'user_id': getattr(data, user).pk, **metadata}
+        )
+        return intent['id']
+    return prepare
+
+
+def _confirm_body(data, services):
+    return {
+        'payment_intent_id': _payment_intent('buyer', 100)(data, services),
+        'buyer_name': 'Comprador',
+        'buyer_phone': '6140000000',
+        'buyer_address': 'Calle Principal #123',
+    }
+
+
+def _exchange_body(data, services):
+    return {
+        'plant_common_name': 'Monstera',
+        'plant_scientific_name': 'Monstera deliciosa',
+        'description': 'Busco intercambiar por suculentas.',
+        'width_cm': '20',
+        'height_cm': '40',
+        'location': 'Chihuahua',
+        'image_keys': [_direct_key(data.seller, 'exchanges')],
+        'stripe_payment_id': _payment_intent('seller', 9000)(data, services),
+    }
+
+
+def _deleted(model_name, status):
+    """Marca el objeto de ejemplo con otro status antes de reactivarlo"""
+    def prepare(data, services):
+        obj = getattr(data, model_name)
+        type(obj).objects.filter(pk=obj.pk).update(status=status)
+        return {}
+    return prepare
+
+
+def _with_subscription(data, services):
+    subscription = services.stripe.create_subscription(customer='cus_bench')
+    type(data.seller).objects.filter(pk=data.seller.pk).update(
+        stripe_customer_id='cus_bench',
+        stripe_subscription_id=subscription['id']
+    )
+    return {}
+
+
+def _webhook_body(data, services):
+    type(data.seller).objects.filter(pk=data.seller.pk).update(stripe_customer_id='cus_bench')
+    return {
+        'type': 'customer.subscription.created',
+        'data': {'object': {
+            'id': 'sub_bench',
+            'customer': 'cus_bench',
+            'current_period_end': int(time.time()) + 30 * 86400,
+        }},
+    }
+
+
+def _pending_offer(data, services):
+    return {'offer_id': data.exchange.offers.values_list('pk', flat=True).first(), 'action': 'reject'}
+
+
+SCENARIOS = [
+    # Autenticación (Cognito falso)
+    Scenario('auth.register', 'POST', '/api/auth/register/', body={
+        'username': 'nuevo', 'email': 'nuevo@example.com',
+        'password': 'BenchPass123!', 'password_confirm': 'BenchPass123!'
+    }, status=201),
+    Scenario('auth.verify_email', 'POST', '/api/auth/verify-email/', body=lambda d, s: {
+        'username': d.buyer.username, 'verification_code': '123456'
+    }),
+    Scenario('auth.login', 'POST', '/api/auth/login/', body=lambda d, s: {
+        'username': d.buyer.username, 'password': 'BenchPass123!'
+    }),
+    Scenario('auth.logout', 'POST', '/api/auth/logout/', user='buyer'),
+    Scenario('auth.profile', 'GET', '/api/auth/profile/', user='buyer'),
+    Scenario('auth.profile_update', 'PATCH', '/api/auth/profile/update/', user='buyer',
+             body={'city': 'Chihuahua'}),
+    Scenario('auth.password_reset', 'POST', '/api/auth/password-reset/', body=lambda d, s: {
+        'username': d.buyer.username
+    }),
+    Scenario('auth.password_reset_confirm', 'POST', '/api/auth/password-reset/confirm/',
+             body=lambda d, s: {
+                 'username': d.buyer.username, 'verification_code': '123456',
+                 'new_password': 'BenchPass456!', 'new_password_confirm': 'BenchPass456!'
+             }),
+    Scenario('uploads.presign', 'POST', '/api/uploads/presign/', user='seller',
+             body={'target': 'product', 'content_type': 'image/jpeg'}, status=201),
+    Scenario('uploads.finalize', 'POST', '/api/uploads/finalize/', user='seller',
+             body=lambda d, s: {
+                 'target': 'product', 'object_id': d.product.pk,
+                 'field': 'image2', 'key': _direct_key(d.seller)
+             }),
+
+    # Catálogo
+    Scenario('categories.list', 'GET', '/api/categories/'),
+    Scenario('categories.detail', 'GET', lambda d: f'/api/categories/{d.category.pk}/'),
+    Scenario('products.list', 'GET', '/api/products/'),
+    Scenario('products.search', 'GET', '/api/products/?search=monstera'),
+    Scenario('products.detail', 'GET', lambda d: f'/api/products/{d.product.pk}/'),
+    Scenario('products.featured', 'GET', '/api/products/featured/'),
+    Scenario('products.by_category', 'GET',
+             lambda d: f'/api/products/by_category/?category_slug={d.category.slug}'),
+    Scenario('products.my_products', 'GET', '/api/products/my_products/', user='seller'),
+    Scenario('products.create', 'POST', '/api/products/', user='seller', body=lambda d, s: {
+        'common_name': 'Monstera', 'scientific_name': 'Monstera deliciosa',
+        'description': 'Planta sana.', 'quantity': 5, 'price_mxn': '250.00',
+        'width_cm': '20', 'height_cm': '40', 'category_ids': [d.category.pk],
+        'image_keys': [_direct_key(d.seller)]
+    }, status=201),
+    Scenario('products.update', 'PATCH', lambda d: f'/api/products/{d.product.pk}/',
+             user='seller', body={'price_mxn': '199.00'}),
+    Scenario('products.destroy', 'DELETE', lambda d: f'/api/products/{d.product.pk}/',
+             user='seller', status=204),
+    Scenario('products.reactivate', 'POST', lambda d: f'/api/products/{d.product.pk}/reactivate/',
+             user='seller', body=_deleted('product', 'deleted')),
+
+    # Carrito
+    Scenario('cart.detail', 'GET', '/api/cart/', user='buyer'),
+    Scenario('cart.add', 'POST', '/api/cart/add/', user='buyer',
+             body=lambda d, s: {'product_id': d.product.pk, 'quantity': 1}),
+    Scenario('cart.update', 'PUT', lambda d: f'/api/cart/update/{d.cart_product_id}/',
+             user='buyer', body={'quantity': 1}),
+    Scenario('cart.remove', 'DELETE', lambda d: f'/api/cart/remove/{d.cart_product_id}/',
+             user='buyer'),
+    Scenario('cart.clear', 'DELETE', '/api/cart/clear/', user='buyer'),
+
+    # Pagos (Stripe falso)
+    Scenario('payments.checkout', 'POST', '/api/payments/checkout/', user='buyer', body={
+        'buyer_name': 'Comprador', 'buyer_phone': '6140000000',
+        'buyer_address': 'Calle Principal #123'
+    }),
+    Scenario('payments.confirm', 'POST', '/api/payments/confirm/', user='buyer',
+             body=_confirm_body, status=201),
+    Scenario('payments.balance', 'GET', '/api/payments/balance/', user='seller'),
+    Scenario('orders.list', 'GET', '/api/payments/orders/', user='buyer'),
+    Scenario('orders.recent', 'GET', '/api/payments/orders/recent/', user='buyer'),
+    Scenario('orders.stats', 'GET', '/api/payments/orders/stats/', user='buyer'),
+    Scenario('orders.detail', 'GET', lambda d: f'/api/payments/orders/{d.order.pk}/', user='buyer'),
+    Scenario('orders.export', 'GET', '/api/payments/orders/export/', user='buyer'),
+    Scenario('sales.list', 'GET', '/api/payments/sales/', user='seller'),
+    Scenario('sales.stats', 'GET', '/api/payments/sales/stats/', user='seller'),
+    Scenario('sales.export', 'GET', '/api/payments/sales/export/', user='seller'),
+    Scenario('transactions.list', 'GET', '/api/payments/transactions/', user='buyer'),
+    Scenario('transactions.by_type', 'GET', '/api/payments/transactions/by_type/?type=purchase', user='buyer'),
+    Scenario('transactions.detail', 'GET',
+             lambda d: f'/api/payments/transactions/{d.transaction.pk}/', user='buyer'),
+    Scenario('transactions.export', 'GET', '/api/payments/transactions/export/', user='buyer'),
+
+    # Intercambios
+    Scenario('exchanges.list', 'GET', '/api/exchanges/'),
+    Scenario('exchanges.detail', 'GET', lambda d: f'/api/exchanges/{d.exchange.pk}/'),
+    Scenario('exchanges.my_exchanges', 'GET', '/api/exchanges/my_exchanges/', user='seller'),
+    Scenario('exchanges.payment_intent', 'POST', '/api/exchanges/create_payment_intent/',
+             user='seller'),
+    Scenario('exchanges.create', 'POST', '/api/exchanges/', user='seller',
+             body=_exchange_body, status=201),
+    Scenario('exchanges.update', 'PATCH', lambda d: f'/api/exchanges/{d.exchange.pk}/',
+             user='seller', body={'description': 'Actualizado'}),
+    Scenario('exchanges.destroy', 'DELETE', lambda d: f'/api/exchanges/{d.exchange.pk}/',
+             user='seller', status=204),
+    Scenario('exchanges.reactivate', 'POST', lambda d: f'/api/exchanges/{d.exchange.pk}/reactivate/',
+             user='seller', body=_deleted('exchange', 'canceled')),
+    Scenario('offers.create', 'POST', '/api/exchange-offers/', user='buyer', body=lambda d, s: {
+        'exchange_id': d.exchange.pk, 'plant_common_name': 'Potus',
+        'plant_scientific_name': 'Epipremnum aureum', 'description': 'Te ofrezco un potus.',
+        'width_cm': '10', 'height_cm': '20',
+        'image_keys': [_direct_key(d.buyer, 'exchanges')]
+    }, status=201),
+    Scenario('offers.my_offers', 'GET', '/api/exchange-offers/my_offers/', user='buyer'),
+    Scenario('offers.respond', 'POST', '/api/exchange-offers/respond/', user='seller',
+             body=_pending_offer),
+
+    # Notificaciones
+    Scenario('notifications.list', 'GET', '/api/notifications/', user='buyer'),
+    Scenario('notifications.detail', 'GET',
+             lambda d: f'/api/notifications/{d.notification.pk}/', user='buyer'),
+    Scenario('notifications.recent', 'GET', '/api/notifications/recent/', user='buyer'),
+    Scenario('notifications.unread_count', 'GET', '/api/notifications/unread_count/', user='buyer'),
+    Scenario('notifications.stats', 'GET', '/api/notifications/stats/', user='buyer'),
+    Scenario('notifications.mark_as_read', 'PUT',
+             lambda d: f'/api/notifications/{d.notification.pk}/mark_as_read/', user='buyer'),
+    Scenario('notifications.mark_all_read', 'POST', '/api/notifications/mark_all_read/', user='buyer'),
+    Scenario('notifications.destroy', 'DELETE',
+             lambda d: f'/api/notifications/{d.notification.pk}/', user='buyer', status=204),
+    Scenario('notifications.clear_read', 'DELETE', '/api/notifications/clear_read/', user='buyer'),
+    Scenario('notifications.clear_all', 'DELETE', '/api/notifications/clear_all/', user='buyer'),
+    Scenario('devices.list', 'GET', '/api/notifications/devices/', user='buyer'),
+    Scenario('devices.create', 'POST', '/api/notifications/devices/', user='buyer',
+             body={'platform': 'android', 'token': 'bench-device-token'}, status=201),
+    Scenario('devices.destroy', 'DELETE',
+             lambda d: f'/api/notifications/devices/{d.device.pk}/', user='buyer', status=204),
+
+    # Suscripciones (Stripe falso)
+    Scenario('subscriptions.benefits', 'GET', '/api/subscriptions/benefits/', user='buyer'),
+    Scenario('subscriptions.status', 'GET', '/api/subscriptions/status/', user='buyer'),
+    Scenario('subscriptions.history', 'GET', '/api/subscriptions/history/', user='buyer'),
+    Scenario('subscriptions.create', 'POST', '/api/subscriptions/create_subscription/',
+             user='buyer', status=201),
+    Scenario('subscriptions.cancel', 'POST', '/api/subscriptions/cancel/', user='seller',
+             body=_with_subscription),
+    Scenario('subscriptions.reactivate', 'POST', '/api/subscriptions/reactivate/', user='seller',
+             body=_with_subscription),
+    Scenario('subscriptions.webhook', 'POST', '/api/subscriptions/webhook/', body=_webhook_body),
+
+    # Analítica
+    Scenario('analytics.events', 'POST', '/api/analytics/events/', body=lambda d, s: {
+        'events': [{'name': 'cart_add', 'object_id': d.product.pk}] * 10
+    }, status=202),
+    Scenario('analytics.sales', 'GET', '/api/analytics/sales/?window=30', user='seller'),
+    Scenario('analytics.reports', 'GET', '/api/analytics/reports/?report=revenue&granularity=month',
+             user='admin'),
+]
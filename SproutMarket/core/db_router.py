@@ -0,0 +1,245 @@
+# core/db_router.py
+
+"""
+Lecturas a réplicas de la base de datos.
+
+Por defecto todo va a 'default'. Las lecturas van a una réplica solo dentro
+de un contexto de réplica:
+
+- ReplicaReadMixin: acciones de solo lectura de un viewset (list, retrieve...)
+- run_on_replica(): código de analítica y reportes
+
+Read-your-writes: después de un write exitoso (POST/PUT/PATCH/DELETE) el
+usuario queda "pegado" al primario REPLICA_STICKY_SECONDS segundos, para
+que no lea datos anteriores a su propio cambio por el lag de replicación.
+Las vistas que no modifican datos del usuario (ej: ingesta de analítica)
+declaran replica_sticky = False para no pegarlo.
+
+Si una réplica no responde o una consulta falla en ella, se marca caída
+REPLICA_RETRY_SECONDS segundos; la lectura se repite en el primario y las
+siguientes usan otra réplica (o el primario).
+"""
+
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'db_primary'
+
+# Alias de réplica a usar en el contexto actual (None = primario)
+_replica = contextvars.ContextVar('db_replica', default=None)
+# alias -> time.monotonic() hasta el que se considera caída
+_down_until = {}
+
+
+def get_replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def mark_down(alias, error):
+    """Saca a la réplica de la rotación REPLICA_RETRY_SECONDS segundos"""
+    _down_until[alias] = time.monotonic() + getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+    logger.warning(f"Replica {alias} unavailable, falling back: {str(error)}")
+
+
+def pick_replica():
+    """
+    Réplica disponible al azar; verifica la conexión (no-op si ya está
+    abierta) y descarta las que fallan
+
+    Returns:
+        str: Alias de la réplica o None si no hay ninguna disponible
+    """
+    now = time.monotonic()
+    candidates = [alias for alias in get_replicas() if _down_until.get(alias, 0) <= now]
+    random.shuffle(candidates)
+
+    for alias in candidates:
+        try:
+            connections[alias].ensure_connection()
+            return alias
+        except Exception as e:
+            mark_down(alias, e)
+    return None
+
+
+def get_read_alias(request=None):
+    """
+    Alias para fijar con queryset.using() cuando la consulta se ejecuta
+    fuera del contexto del view (ej: StreamingHttpResponse)
+    """
+    if not get_replicas() or (request is not None and is_sticky(request)):
+        return DEFAULT_DB_ALIAS
+    return pick_replica() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_replica():
+    """Lecturas del bloque a una réplica (si hay alguna disponible)"""
+    token = _replica.set(pick_replica())
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def run_on_replica(func, *args, **kwargs):
+    """
+    Ejecuta func con lecturas a una réplica; si una consulta falla en la
+    réplica (conexión perdida, cancelada por recuperación, esquema atrasado...)
+    la marca caída y repite func en el primario
+
+    func debe ser de solo lectura y evaluar sus querysets dentro de la llamada.
+    """
+    with use_replica():
+        alias = _replica.get()
+        if alias is None:
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        except DatabaseError as e:
+            mark_down(alias, e)
+    with use_primary():
+        return func(*args, **kwargs)
+
+
+@contextmanager
+def use_primary():
+    """Lecturas del bloque al primario, aunque el contexto sea de réplica"""
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def _sticky_key(user_id):
+    return f'db:sticky:{user_id}'
+
+
+def mark_sticky(request, response):
+    """Pega al usuario al primario después de un write"""
+    seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        cache.set(_sticky_key(user.pk), True, seconds)
+    # La cookie cubre visitantes anónimos y caches locales por proceso
+    response.set_cookie(STICKY_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+
+
+def is_sticky(request):
+    if request.COOKIES.get(STICKY_COOKIE):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and cache.get(_sticky_key(user.pk)))
+
+
+class ReplicaRouter:
+    """Router de Django: lecturas según el contexto, escrituras al primario"""
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        # Dentro de una transacción se lee del primario (consistencia)
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas y primario tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Mixin para viewsets: las acciones de replica_actions leen de una
+    réplica, salvo que el usuario esté pegado al primario
+
+    Se aplica en initial() (después de autenticar) para conocer al usuario.
+    Si la acción falla con un error de la réplica se repite en el primario.
+    """
+
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            get_replicas()
+            and self.action in self.replica_actions
+            and not is_sticky(request)
+        ):
+            self._replica_token = _replica.set(pick_replica())
+
+    def handle_exception(self, exc):
+        token = getattr(self, '_replica_token', None)
+        alias = _replica.get()
+        if (
+            token is None
+            or alias is None
+            or not isinstance(exc, DatabaseError)
+            # Solo errores de la réplica: uno del primario (ej: un write) no se repite
+            or not connections[alias].errors_occurred
+        ):
+            return super().handle_exception(exc)
+
+        mark_down(alias, exc)
+        _replica.reset(token)
+        self._replica_token = None
+        # Acciones de solo lectura: repetirla en el primario es seguro
+        handler = getattr(self, self.request.method.lower())
+        try:
+            return handler(self.request, *self.args, **self.kwargs)
+        except Exception as retry_exc:
+            return super().handle_exception(retry_exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            # La respuesta ya se serializó: el resto del request va al primario
+            _replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Marca read-your-writes después de cada write exitoso
+
+    Las vistas con replica_sticky = False (atributo de la clase o de la
+    función) no pegan al usuario: sus POST no cambian datos que él lea
+    después (ej: ingesta de eventos de analítica, que se envía sin parar).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.replica_sticky = True
+        response = self.get_response(request)
+        if (
+            get_replicas()
+            and request.replica_sticky
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+        ):
+            mark_sticky(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'cls', view_func)
+        request.replica_sticky = getattr(view, 'replica_sticky', True)
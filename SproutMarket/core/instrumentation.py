@@ -0,0 +1,275 @@
+# core/instrumentation.py
+
+"""
+Instrumentación por request: consultas SQL, tiempo en DB, en llamadas
+externas (boto3, Stripe) y en serialización.
+
+Con INSTRUMENTATION_ENABLED=False el middleware se desactiva al arrancar
+(MiddlewareNotUsed) y no se instala ningún hook: costo cero.
+
+Con la instrumentación activa, cada request produce:
+- Header Server-Timing (db, ext, ser, total), visible en las devtools
+- Una línea de log 'request ...' con las métricas (key=value y en extra)
+- Log muestreado de consultas lentas con la vista que las ejecutó
+
+Las métricas viven en un ContextVar: los hooks de DB, boto3, Stripe y DRF
+solo suman si hay un request instrumentado en curso. Los hooks de boto3 y
+Stripe también alimentan el histograma de core.metrics (METRICS_ENABLED),
+dentro o fuera de un request (ej: el worker de notificaciones).
+"""
+
+import contextvars
+import functools
+import logging
+import random
+import time
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import metrics as prometheus
+
+logger = logging.getLogger(__name__)
+
+_metrics = contextvars.ContextVar('request_metrics', default=None)
+_installed = False
+
+
+class RequestMetrics:
+    """Acumuladores de un request"""
+
+    __slots__ = (
+        'view', 'queries', 'db_time', 'external_calls', 'external_time',
+        'serializer_time', 'serializer_depth', 'slow_queries',
+    )
+
+    def __init__(self):
+        self.view = ''
+        self.queries = 0
+        self.db_time = 0.0
+        self.external_calls = 0
+        self.external_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.slow_queries = []
+
+    def as_dict(self, total):
+        return {
+            'view': self.view,
+            'total_ms': round(total * 1000, 2),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'ext_calls': self.external_calls,
+            'ext_ms': round(self.external_time * 1000, 2),
+            'ser_ms': round(self.serializer_time * 1000, 2),
+        }
+
+
+def get_metrics():
+    """Métricas del request en curso, o None si no está instrumentado"""
+    return _metrics.get()
+
+
+def is_enabled():
+    return getattr(settings, 'INSTRUMENTATION_ENABLED', False)
+
+
+def _hooks_needed():
+    """Los hooks de servicios externos sirven a ambas: instrumentación y métricas"""
+    return is_enabled() or prometheus.is_enabled()
+
+
+def record_external(service, operation, elapsed):
+    metrics = _metrics.get()
+    if metrics is not None:
+        metrics.external_calls += 1
+        metrics.external_time += elapsed
+    prometheus.observe_external(service, operation, elapsed)
+
+
+# --- DB ----------------------------------------------------------------------
+
+def _db_wrapper(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.queries += 1
+        metrics.db_time += elapsed
+        if elapsed * 1000 >= settings.INSTRUMENTATION_SLOW_QUERY_MS:
+            # Sin params: el SQL con placeholders no expone datos de usuarios
+            metrics.slow_queries.append((
+                context['connection'].alias, round(elapsed * 1000, 1), sql[:1000]
+            ))
+
+
+# --- boto3 -------------------------------------------------------------------
+
+def _boto3_before_call(model=None, context=None, **kwargs):
+    if context is not None and model is not None:
+        # after-call-error no recibe model: servicio y operación viajan en context
+        context['instrumentation_call'] = (
+            model.service_model.service_name, model.name, time.perf_counter()
+        )
+
+
+def _boto3_after_call(context=None, **kwargs):
+    call = (context or {}).pop('instrumentation_call', None)
+    if call is not None:
+        service, operation, start = call
+        record_external(service, operation, time.perf_counter() - start)
+
+
+def register_boto3_hooks(session):
+    """Hooks de eventos en la sesión de boto3 (los clientes los heredan)"""
+    if not _hooks_needed():
+        return
+    session.events.register('before-call', _boto3_before_call)
+    session.events.register('after-call', _boto3_after_call)
+    session.events.register('after-call-error', _boto3_after_call)
+
+
+# --- Stripe y DRF ------------------------------------------------------------
+
+def _timed_stripe(func):
+    @functools.wraps(func)
+    def wrapper(method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(method, url, *args, **kwargs)
+        finally:
+            # Operación por recurso (/v1/payment_intents/pi_x -> payment_intents)
+            parts = urlsplit(url).path.split('/')
+            operation = f'{method.upper()} {parts[2] if len(parts) > 2 else ""}'
+            record_external('stripe', operation, time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_serializer(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = _metrics.get()
+        if metrics is None:
+            return func(*args, **kwargs)
+        # Serializers anidados (ej: SerializerMethodField): se mide solo el externo
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.serializer_depth -= 1
+            if metrics.serializer_depth == 0:
+                metrics.serializer_time += time.perf_counter() - start
+    return wrapper
+
+
+def _install_stripe():
+    import stripe
+
+    # Cliente HTTP propio (mismo que crearía Stripe) con las llamadas medidas
+    client = stripe.default_http_client or stripe.new_default_http_client(
+        verify_ssl_certs=stripe.verify_ssl_certs,
+        proxy=stripe.proxy
+    )
+    client.request_with_retries = _timed_stripe(client.request_with_retries)
+    client.request_stream_with_retries = _timed_stripe(client.request_stream_with_retries)
+    stripe.default_http_client = client
+
+
+def _install_drf():
+    from rest_framework import renderers, serializers
+
+    # Serialización = to_representation (serializer.data) + render a JSON
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__['data']
+        cls.data = property(_timed_serializer(prop.fget))
+    renderers.JSONRenderer.render = _timed_serializer(renderers.JSONRenderer.render)
+
+
+def install():
+    """Instala los hooks de Stripe y DRF (una vez, solo si hacen falta)"""
+    global _installed
+    if _installed or not _hooks_needed():
+        return
+    _install_stripe()
+    if is_enabled():
+        _install_drf()
+    _installed = True
+
+
+# --- Middleware --------------------------------------------------------------
+
+def _view_name(view_func, method):
+    """'módulo.Vista' o 'módulo.ViewSet.acción' (DRF)"""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+    name = f'{cls.__module__}.{cls.__name__}'
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return f'{name}.{action}' if action else name
+
+
+class InstrumentationMiddleware:
+    """
+    Mide cada request y publica las métricas (Server-Timing y log)
+
+    Va primero en MIDDLEWARE para que 'total' incluya a los demás.
+    """
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed()
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        total = time.perf_counter() - start
+
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f'ext;dur={metrics.external_time * 1000:.1f};desc="{metrics.external_calls} calls"',
+                f'ser;dur={metrics.serializer_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        data = metrics.as_dict(total)
+        data.update(method=request.method, path=request.path, status=response.status_code)
+        logger.info(
+            'request ' + ' '.join(f'{key}={value}' for key, value in data.items()),
+            extra={'metrics': data}
+        )
+        self.log_slow_queries(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _metrics.get()
+        if metrics is not None:
+            metrics.view = _view_name(view_func, request.method)
+
+    def log_slow_queries(self, metrics):
+        rate = settings.INSTRUMENTATION_SLOW_QUERY_SAMPLE_RATE
+        for alias, duration, sql in metrics.slow_queries:
+            if random.random() < rate:
+                logger.warning(
+                    f"Slow query {duration}ms on {alias} in {metrics.view or 'unknown view'}: {sql}",
+                    extra={'metrics': {'view': metrics.view, 'db': alias, 'duration_ms': duration}}
+                )
@@ -0,0 +1,324 @@
+# core/management/commands/bench_api.py
+
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from analytics import buffer
+from core.benchmark.factories import seed
+from core.benchmark.fakes import fake_services
+from core.benchmark.scenarios import SCENARIOS
+from core.utils import direct_uploads
+
+
+# Subidas directas y push contra los fakes de S3 y SNS
+BENCH_SETTINGS = {
+    'DEBUG': False,
+    'AWS_STORAGE_BUCKET_NAME': 'sproutmarket-bench',
+    'DIRECT_UPLOAD_BACKEND': 'core.utils.direct_uploads.S3DirectUploadBackend',
+    'SNS_PLATFORM_APPLICATIONS': {
+        'android': 'arn:aws:sns:bench:0:app/GCM/sproutmarket',
+        'ios': 'arn:aws:sns:bench:0:app/APNS/sproutmarket',
+    },
+}
+
+
+# Con menos requests el p95 es prácticamente el máximo y no se compara
+MIN_LATENCY_ITERATIONS = 20
+
+
+def percentile(values, p):
+    """Percentil por rango más cercano (values ordenados)"""
+    return values[max(0, math.ceil(p * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de la API REST: latencia (p50/p95/p99), consultas y memoria '
+        'por endpoint, comparado contra un baseline guardado'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Usuarios (default: 200)')
+        parser.add_argument('--products', type=int, default=1000, help='Productos (default: 1000)')
+        parser.add_argument('--orders', type=int, default=2000, help='Órdenes (default: 2000)')
+        parser.add_argument('--exchanges', type=int, default=200, help='Intercambios (default: 200)')
+        parser.add_argument(
+            '--notifications', type=int, default=5000, help='Notificaciones (default: 5000)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=30,
+            help='Requests medidos por endpoint (default: 30)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Requests de calentamiento por endpoint (default: 3)'
+        )
+        parser.add_argument(
+            '--only',
+            action='append',
+            help='Solo escenarios cuyo nombre empiece con este prefijo (se puede repetir)'
+        )
+        parser.add_argument(
+            '--baseline',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'api_baseline.json'),
+            help='Archivo JSON del baseline'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Guarda los resultados como nuevo baseline (sin comparar)'
+        )
+        parser.add_argument(
+            '--check-latency',
+            action='store_true',
+            help=(
+                'Compara también p50/p95 contra el baseline (por defecto solo '
+                'consultas, memoria y status). Requiere --iterations >= '
+                f'{MIN_LATENCY_ITERATIONS} y un baseline de la misma máquina'
+            )
+        )
+        parser.add_argument(
+            '--latency-tolerance',
+            type=float,
+            default=0.5,
+            help='Aumento relativo permitido en p50/p95 (default: 0.5 = +50%%)'
+        )
+        parser.add_argument(
+            '--latency-floor',
+            type=float,
+            default=2.0,
+            help='Aumento absoluto en ms que nunca cuenta como regresión (default: 2.0)'
+        )
+        parser.add_argument(
+            '--alloc-tolerance',
+            type=float,
+            default=0.25,
+            help='Aumento relativo permitido en memoria asignada (default: 0.25)'
+        )
+
+    def run_once(self, client, scenario, data, services, probe=nullcontext):
+        """
+        Un request dentro de una transacción que se revierte al terminar
+
+        Returns:
+            tuple: (response, segundos, resultado de probe)
+        """
+        with transaction.atomic():
+            body = scenario.prepare(data, services)
+            path = scenario.get_path(data)
+            with probe() as measured:
+                start = time.perf_counter()
+                response = client.generic(
+                    scenario.method, path, body or '', content_type='application/json'
+                )
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return response, elapsed, measured
+
+    def run_scenario(self, scenario, data, services, options):
+        client = APIClient()
+        # Un error del endpoint se reporta como status 500, no detiene la corrida
+        client.raise_request_exception = False
+        user = getattr(data, scenario.user) if scenario.user else None
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {data.token(user)}')
+
+        # Mismo punto de partida para todos: caches vacíos y luego calentados
+        cache.clear()
+        for _ in range(max(options['warmup'], 1)):
+            response, _, _ = self.run_once(client, scenario, data, services)
+
+        # Consultas: una pasada aparte (CaptureQueriesContext agrega overhead)
+        response, _, queries = self.run_once(
+            client, scenario, data, services,
+            probe=lambda: CaptureQueriesContext(connection)
+        )
+        # Contar ya: el siguiente request reinicia connection.queries
+        query_count = len(queries)
+        if response.status_code != scenario.status and not response.streaming:
+            self.stdout.write(self.style.WARNING(
+                f'↻ {scenario.name}: {response.content[:300].decode(errors="replace")}'
+            ))
+
+        latencies = sorted(
+            self.run_once(client, scenario, data, services)[1] * 1000
+            for _ in range(options['iterations'])
+        )
+
+        # Memoria: pico asignado durante el request (tracemalloc es lento)
+        allocations = []
+        tracemalloc.start()
+        try:
+            for _ in range(5):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                self.run_once(client, scenario, data, services)
+                allocations.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'queries': query_count,
+            'alloc_kb': round(statistics.median(allocations), 1),
+        }
+
+    def compare(self, result, previous, options):
+        """Lista de regresiones del escenario respecto al baseline"""
+        problems = []
+        if result['queries'] > previous['queries']:
+            problems.append(f"consultas {previous['queries']} -> {result['queries']}")
+
+        for metric in ('p50_ms', 'p95_ms') if options['check_latency'] else ():
+            limit = max(
+                previous[metric] * (1 + options['latency_tolerance']),
+                previous[metric] + options['latency_floor']
+            )
+            if result[metric] > limit:
+                problems.append(f'{metric} {previous[metric]:.2f} -> {result[metric]:.2f}')
+
+        limit = max(previous['alloc_kb'] * (1 + options['alloc_tolerance']), previous['alloc_kb'] + 64)
+        if result['alloc_kb'] > limit:
+            problems.append(f"memoria {previous['alloc_kb']:.0f} KB -> {result['alloc_kb']:.0f} KB")
+        return problems
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['only'] or scenario.name.startswith(tuple(options['only']))
+        ]
+        if not scenarios:
+            raise CommandError('Ningún escenario coincide con --only')
+        if options['check_latency'] and options['iterations'] < MIN_LATENCY_ITERATIONS:
+            raise CommandError(
+                f'--check-latency necesita al menos {MIN_LATENCY_ITERATIONS} iteraciones'
+            )
+
+        # Base de datos de prueba aislada: la de desarrollo no se toca
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        # Eventos de analítica solo en memoria (sin thread escribiendo a la DB)
+        events = buffer.EventBuffer(max_size=10 ** 6, batch_size=10 ** 6, flush_interval=3600)
+
+        try:
+            with override_settings(**BENCH_SETTINGS), fake_services() as services, \
+                    mock.patch.object(buffer, '_buffer', events), \
+                    mock.patch.object(direct_uploads, '_backend', None):
+                started = time.perf_counter()
+                data = seed(
+                    users=options['users'],
+                    products=options['products'],
+                    orders=options['orders'],
+                    notifications=options['notifications'],
+                    exchanges=options['exchanges'],
+                )
+                self.stdout.write(
+                    f'Datos: {data.counts} ({time.perf_counter() - started:.1f}s), '
+                    f'{connection.vendor}, {options["iterations"]} iteraciones\n'
+                )
+
+                results = {}
+                self.stdout.write(
+                    f'{"endpoint":<32}{"status":>7}{"p50 ms":>9}{"p95 ms":>9}'
+                    f'{"p99 ms":>9}{"queries":>9}{"KB":>8}'
+                )
+                for scenario in scenarios:
+                    result = self.run_scenario(scenario, data, services, options)
+                    results[scenario.name] = result
+                    self.stdout.write(
+                        f'{scenario.name:<32}{result["status"]:>7}{result["p50_ms"]:>9.2f}'
+                        f'{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+                        f'{result["queries"]:>9}{result["alloc_kb"]:>8.0f}'
+                    )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        failures = [
+            f'{scenario.name}: status {results[scenario.name]["status"]} (esperado {scenario.status})'
+            for scenario in scenarios
+            if results[scenario.name]['status'] != scenario.status
+        ]
+
+        report = {
+            'vendor': connection.vendor,
+            'dataset': data.counts,
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        baseline_path = Path(options['baseline'])
+
+        if options['save_baseline'] and failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f'✗ {failure}'))
+            raise CommandError('No se guarda un baseline con endpoints fallando')
+
+        if options['save_baseline']:
+            if baseline_path.exists():
+                # Se conservan los escenarios que no se corrieron (--only)
+                previous = json.loads(baseline_path.read_text())
+                report['results'] = {**previous.get('results', {}), **results}
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'\n✓ Baseline guardado en {baseline_path}'))
+        elif baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())
+            if baseline.get('dataset') != data.counts or baseline.get('vendor') != connection.vendor:
+                self.stdout.write(self.style.WARNING(
+                    f"\n↻ El baseline se generó con otros datos ({baseline.get('vendor')}, "
+                    f"{baseline.get('dataset')}): la comparación es aproximada"
+                ))
+            if options['check_latency'] and baseline.get('iterations', 0) < MIN_LATENCY_ITERATIONS:
+                raise CommandError(
+                    f"El baseline tiene {baseline.get('iterations')} iteraciones; "
+                    f'regenéralo con --iterations >= {MIN_LATENCY_ITERATIONS}'
+                )
+            for name, result in results.items():
+                previous = baseline['results'].get(name)
+                if previous is None:
+                    self.stdout.write(self.style.WARNING(f'↻ {name}: sin baseline'))
+                    continue
+                failures.extend(
+                    f'{name}: {problem}'
+                    for problem in self.compare(result, previous, options)
+                )
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'\n↻ No existe {baseline_path}; usa --save-baseline para crearlo'
+            ))
+
+        if failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f'✗ {failure}'))
+            raise CommandError(f'{len(failures)} regresiones de rendimiento')
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark terminado sin regresiones'))
@@ -0,0 +1,60 @@
+# core/management/commands/bench_auth.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from core.authentication import CachedTokenAuthentication
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark de autenticación por token: TokenAuthentication vs cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Requests autenticados por backend (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        # Usuario y token temporales: todo se revierte al terminar
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username='bench-auth',
+                email='bench-auth@example.com',
+                password=None
+            )
+            token = Token.objects.create(user=user)
+            request = APIRequestFactory().get(
+                '/', HTTP_AUTHORIZATION=f'Token {token.key}'
+            )
+
+            for backend in (TokenAuthentication(), CachedTokenAuthentication()):
+                # Calentar (en el caso cacheado, llena el cache)
+                backend.authenticate(request)
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for _ in range(iterations):
+                        backend.authenticate(request)
+                    elapsed = time.perf_counter() - start
+
+                self.stdout.write(
+                    f'{backend.__class__.__name__:<28} '
+                    f'{elapsed / iterations * 1e6:8.1f} µs/request  '
+                    f'{len(queries) / iterations:.2f} queries/request'
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark terminado'))
@@ -0,0 +1,135 @@
+# core/management/commands/db_loadtest.py
+
+import copy
+import statistics
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.utils import ConnectionHandler
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de conexiones a la DB: requests/seg con conexión por '
+        'request, conexiones persistentes y pool de psycopg'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Workers concurrentes (default: 8)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Requests simulados por worker (default: 500)'
+        )
+        parser.add_argument(
+            '--query',
+            default='SELECT 1',
+            help='Consulta por request (default: SELECT 1)'
+        )
+        parser.add_argument(
+            '--mode',
+            action='append',
+            choices=['per_request', 'persistent', 'pool'],
+            help='Modo a medir (se puede repetir; default: todos)'
+        )
+
+    def build_settings(self, mode):
+        """Copia de DATABASES['default'] con la estrategia de conexión del modo"""
+        db = copy.deepcopy(connections['default'].settings_dict)
+        db.setdefault('OPTIONS', {})
+        db['OPTIONS'].pop('pool', None)
+        db['CONN_HEALTH_CHECKS'] = mode == 'persistent'
+
+        if mode == 'per_request':
+            db['CONN_MAX_AGE'] = 0
+        elif mode == 'persistent':
+            db['CONN_MAX_AGE'] = None
+        else:
+            db['CONN_MAX_AGE'] = 0
+            db['OPTIONS']['pool'] = {'min_size': 1, 'max_size': self.threads}
+        return db
+
+    def run_mode(self, mode, requests, query):
+        handler = ConnectionHandler({'default': self.build_settings(mode)})
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.threads + 1)
+
+        def worker():
+            connection = handler['default']
+            local = []
+            barrier.wait()
+            try:
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    # Mismo ciclo que un request de Django: close_old_connections
+                    # al inicio y al final (request_started / request_finished)
+                    connection.close_if_unusable_or_obsolete()
+                    with connection.cursor() as cursor:
+                        cursor.execute(query)
+                        cursor.fetchall()
+                    connection.close_if_unusable_or_obsolete()
+                    local.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if mode == 'pool':
+            handler['default'].close_pool()
+
+        if errors:
+            raise errors[0]
+        return len(latencies) / elapsed, latencies
+
+    def handle(self, *args, **options):
+        self.threads = options['threads']
+        modes = options['mode'] or ['per_request', 'persistent', 'pool']
+
+        vendor = connections['default'].vendor
+        if vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'↻ Backend {vendor}: los resultados no representan a PostgreSQL'
+            ))
+            modes = [mode for mode in modes if mode != 'pool']
+
+        self.stdout.write(
+            f'{self.threads} workers x {options["requests"]} requests: {options["query"]}\n'
+        )
+        self.stdout.write(f'{"modo":<14}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}')
+
+        for mode in modes:
+            try:
+                rate, latencies = self.run_mode(mode, options['requests'], options['query'])
+            except (ImproperlyConfigured, ImportError) as e:
+                # Pool sin psycopg 3: pip install "psycopg[binary,pool]"
+                self.stdout.write(self.style.WARNING(f'{mode:<14} omitido: {e}'))
+                continue
+
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+            self.stdout.write(f'{mode:<14}{rate:>10.0f}{p50:>10.2f}{p95:>10.2f}')
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Prueba de carga terminada'))
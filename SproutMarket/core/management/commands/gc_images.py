@@ -0,0 +1,247 @@
+# core/management/commands/gc_images.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import PendingDeletion, StoredObject, User
+from core.utils.images import FORMATS, IMAGE_FIELDS, RENDITIONS, rendition_key, rendition_urls
+from core.utils.s3_utils import S3Handler
+from exchanges.models import Exchange, ExchangeOffer
+from products.models import Product
+
+
+# Límite de keys por llamada a delete_objects
+DELETE_BATCH_SIZE = 1000
+
+# Originales por consulta al revisar versiones (acota el tamaño del OR)
+SOURCE_CHUNK_SIZE = 100
+
+# Prefijos del bucket con imágenes de la aplicación
+IMAGE_PREFIXES = ['products/', 'exchanges/', 'profiles/']
+
+IMAGE_MODELS = [Product, Exchange, ExchangeOffer]
+
+
+class Command(BaseCommand):
+    help = 'Elimina de S3 las imágenes encoladas y, con --reconcile, los objetos huérfanos del bucket'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Listar el bucket y encolar los objetos que ningún registro usa'
+        )
+        parser.add_argument(
+            '--min-age-hours',
+            type=int,
+            default=24,
+            help='Antigüedad mínima de un objeto para considerarlo huérfano (--reconcile)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar lo que se eliminaría sin eliminar nada'
+        )
+
+    def handle(self, *args, **options):
+        self.handler = S3Handler()
+        self.dry_run = options['dry_run']
+        
+        if options['reconcile']:
+            self.reconcile(options['min_age_hours'])
+        
+        deleted_count, failed_count = self.process_queue()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Proceso completado: {deleted_count} objetos eliminados, {failed_count} con error'
+            )
+        )
+
+    def referenced_urls(self, urls):
+        """De un lote de URLs, las que algún registro sigue usando"""
+        referenced = set()
+        
+        for model in IMAGE_MODELS:
+            query = Q()
+            for field in IMAGE_FIELDS:
+                query |= Q(**{f'{field}__in': urls})
+            for row in model.objects.filter(query).values_list(*IMAGE_FIELDS):
+                referenced.update(row)
+        
+        referenced.update(
+            User.objects.filter(profile_image__in=urls).values_list('profile_image', flat=True)
+        )
+        return referenced
+
+    def rendition_references(self):
+        """Keys de todas las versiones guardadas en image_renditions (una pasada por corrida)"""
+        if getattr(self, '_rendition_references', None) is None:
+            referenced = set()
+            for model in IMAGE_MODELS:
+                for renditions in model.objects.values_list('image_renditions', flat=True).iterator(chunk_size=2000):
+                    for entry in (renditions or {}).values():
+                        referenced.update(self.handler.get_key_from_url(url) for url in rendition_urls(entry))
+            self._rendition_references = referenced
+        return self._rendition_references
+
+    def renditions_in_use(self, keys):
+        """
+        De un lote de keys, las versiones (<stem>/<nombre>.<ext>) que se deben
+        conservar: su original sigue referenciado (ej: la misma foto subida de
+        nuevo dentro del periodo de gracia regenera las versiones en los mismos
+        keys) o algún image_renditions las usa
+        """
+        rendition_names = {
+            rendition_key('stem.x', name, fmt).rpartition('/')[2]
+            for name in RENDITIONS for fmt in FORMATS
+        }
+        by_stem = {}
+        for key in keys:
+            stem, _, name = key.rpartition('/')
+            if stem and name in rendition_names:
+                by_stem.setdefault(stem, []).append(key)
+        if not by_stem:
+            return set()
+
+        referenced_stems = set()
+        stems = list(by_stem)
+        for start in range(0, len(stems), SOURCE_CHUNK_SIZE):
+            chunk = stems[start:start + SOURCE_CHUNK_SIZE]
+            query = Q()
+            for stem in chunk:
+                query |= Q(key__startswith=f'{stem}.')
+            for key in StoredObject.objects.filter(query, ref_count__gt=0).values_list('key', flat=True):
+                referenced_stems.add(key.rsplit('.', 1)[0])
+            
+            for model in IMAGE_MODELS:
+                query = Q()
+                for stem in chunk:
+                    prefix = f'{self.handler.get_public_url(stem)}.'
+                    for field in IMAGE_FIELDS:
+                        query |= Q(**{f'{field}__startswith': prefix})
+                for row in model.objects.filter(query).values_list(*IMAGE_FIELDS):
+                    for url in row:
+                        if url:
+                            referenced_stems.add(self.handler.get_key_from_url(url).rsplit('.', 1)[0])
+
+        in_use = {key for stem in referenced_stems for key in by_stem.get(stem, [])}
+        pending = [key for keys_ in by_stem.values() for key in keys_ if key not in in_use]
+        if pending:
+            references = self.rendition_references()
+            in_use.update(key for key in pending if key in references)
+        return in_use
+
+    def process_queue(self):
+        """Elimina los objetos encolados cuyo periodo de gracia terminó"""
+        deleted_count = 0
+        failed_count = 0
+        last_id = 0
+        
+        while True:
+            batch = list(
+                PendingDeletion.objects
+                .filter(id__gt=last_id, not_before__lte=timezone.now())
+                .order_by('id')[:DELETE_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            
+            # Un objeto se pudo volver a registrar (misma imagen subida de nuevo)
+            # o seguir en uso por algún registro: no eliminarlo
+            keys = [item.key for item in batch]
+            in_use = set(
+                StoredObject.objects
+                .filter(key__in=keys, ref_count__gt=0)
+                .values_list('key', flat=True)
+            )
+            urls = {self.handler.get_public_url(key): key for key in keys}
+            in_use.update(urls[url] for url in self.referenced_urls(list(urls)) if url in urls)
+            in_use.update(self.renditions_in_use([key for key in keys if key not in in_use]))
+            
+            to_delete = [key for key in keys if key not in in_use]
+            
+            if self.dry_run:
+                for key in to_delete:
+                    self.stdout.write(f'  [dry-run] {key}')
+                deleted_count += len(to_delete)
+                continue
+            
+            errors = {}
+            if to_delete:
+                response = self.handler.s3_client.delete_objects(
+                    Bucket=self.handler.bucket_name,
+                    Delete={
+                        'Objects': [{'Key': key} for key in to_delete],
+                        'Quiet': True
+                    }
+                )
+                errors = {
+                    error['Key']: f"{error.get('Code')}: {error.get('Message', '')}"
+                    for error in response.get('Errors', [])
+                }
+            
+            for key, message in errors.items():
+                PendingDeletion.objects.filter(key=key).update(
+                    attempts=F('attempts') + 1,
+                    last_error=message
+                )
+            PendingDeletion.objects.filter(id__in=[
+                item.id for item in batch if item.key not in errors
+            ]).delete()
+            
+            deleted_count += len(to_delete) - len(errors)
+            failed_count += len(errors)
+            self.stdout.write(
+                f'  Lote: {len(to_delete) - len(errors)} eliminados, '
+                f'{len(in_use)} en uso, {len(errors)} con error'
+            )
+        
+        return deleted_count, failed_count
+
+    def reconcile(self, min_age_hours):
+        """Encola los objetos del bucket que ningún registro referencia"""
+        referenced = set(
+            StoredObject.objects.filter(ref_count__gt=0).values_list('key', flat=True)
+        )
+        referenced.update(self.rendition_references())
+        
+        def add_url(url):
+            if url:
+                referenced.add(self.handler.get_key_from_url(url))
+        
+        for model in IMAGE_MODELS:
+            for row in model.objects.values_list(*IMAGE_FIELDS).iterator(chunk_size=2000):
+                for url in row:
+                    add_url(url)
+        
+        for url in User.objects.exclude(profile_image='').values_list('profile_image', flat=True).iterator():
+            add_url(url)
+        
+        # Los objetos recientes pueden ser subidas en curso (presigned) aún sin registro
+        cutoff = timezone.now() - timedelta(hours=min_age_hours)
+        paginator = self.handler.s3_client.get_paginator('list_objects_v2')
+        
+        orphans = []
+        listed_count = 0
+        for prefix in IMAGE_PREFIXES:
+            for page in paginator.paginate(Bucket=self.handler.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    listed_count += 1
+                    if obj['Key'] not in referenced and obj['LastModified'] < cutoff:
+                        orphans.append(obj['Key'])
+        
+        self.stdout.write(
+            self.style.WARNING(f'↻ Reconciliación: {listed_count} objetos revisados, {len(orphans)} huérfanos')
+        )
+        if not self.dry_run:
+            # Sin periodo de gracia adicional: ya superaron min_age_hours
+            PendingDeletion.enqueue(orphans, reason='orphan')
+            PendingDeletion.objects.filter(key__in=orphans, reason='orphan').update(not_before=timezone.now())
+        else:
+            for key in orphans:
+                self.stdout.write(f'  [dry-run] huérfano: {key}')
@@ -0,0 +1,45 @@
+# core/management/commands/generate_image_renditions.py
+
+from django.core.management.base import BaseCommand
+
+from core.utils.images import IMAGE_FIELDS, generate_renditions
+from exchanges.models import Exchange, ExchangeOffer
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Genera las versiones thumb/medium/full de las imágenes que aún no las tienen'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerar también las imágenes que ya tienen versiones'
+        )
+
+    def handle(self, *args, **options):
+        """Descarga de S3 cada original pendiente y genera sus versiones"""
+        
+        for model in (Product, Exchange, ExchangeOffer):
+            processed_count = 0
+            queryset = model.objects.only('id', 'image_renditions', *IMAGE_FIELDS)
+            
+            for instance in queryset.iterator(chunk_size=500):
+                renditions = instance.image_renditions or {}
+                sources = {
+                    field: (str(getattr(instance, field)), None)
+                    for field in IMAGE_FIELDS
+                    if getattr(instance, field) and (
+                        options['force']
+                        or renditions.get(field, {}).get('source') != str(getattr(instance, field))
+                    )
+                }
+                if not sources:
+                    continue
+                
+                generate_renditions(model, instance.pk, sources)
+                processed_count += 1
+            
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ {model._meta.verbose_name_plural}: {processed_count} procesados')
+            )
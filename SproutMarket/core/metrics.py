@@ -0,0 +1,516 @@
+# core/metrics.py
+
+"""
+Registro de métricas en proceso con exposición en formato Prometheus.
+
+Contadores, gauges e histogramas con labels. Con METRICS_DIR configurado
+(producción con gunicorn) cada proceso escribe sus valores en un archivo
+mapeado en memoria (mmap) dentro del directorio, y el endpoint /metrics
+suma los archivos de todos los workers. Sin METRICS_DIR los valores viven
+en memoria del proceso (runserver, tests).
+
+- Contadores e histogramas: counter_<pid>.db. Se conservan al morir el
+  worker (los totales no retroceden al reciclarse un proceso).
+- Gauges: gauge_<pid>.db. Solo se suman los de procesos vivos.
+- Gauges calculados al hacer scrape (ej: profundidad de la cola de push):
+  CallbackGauge, no se guardan.
+
+El directorio se vacía al arrancar gunicorn con clear_directory(), desde el
+hook on_starting de config/gunicorn.conf.py (una vez, en el proceso
+maestro). No se hace en AppConfig.ready(): sin --preload cada worker lo
+ejecuta y borraría los archivos de los workers que ya están corriendo.
+
+Con METRICS_ENABLED=False todas las operaciones son no-op.
+"""
+
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+_HEADER = struct.Struct('<I4x')  # bytes usados + padding (alinea los doubles)
+_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_SIZE = 1024 * 1024
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def is_enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+# --- Almacenamiento ----------------------------------------------------------
+
+def _read_entries(data, used):
+    """Entradas (llave, valor, posición del valor) de un archivo de métricas"""
+    pos = _HEADER.size
+    while pos < used:
+        length = _LENGTH.unpack_from(data, pos)[0]
+        pos += _LENGTH.size
+        key = bytes(data[pos:pos + length]).decode().rstrip(' ')
+        pos += length
+        yield key, _VALUE.unpack_from(data, pos)[0], pos
+        pos += _VALUE.size
+
+
+class MmapStore:
+    """
+    Valores de un proceso en un archivo mapeado en memoria
+
+    Formato: header (bytes usados) seguido de entradas
+    [longitud][llave JSON con padding a 8 bytes][double]. Solo el proceso
+    dueño escribe; las entradas nuevas se escriben completas antes de
+    actualizar el header, así un lector nunca ve una entrada a medias.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = _HEADER.unpack_from(self._mmap, 0)[0]
+        if self._used == 0:
+            self._used = _HEADER.size
+            _HEADER.pack_into(self._mmap, 0, self._used)
+        # Archivo existente (pid reutilizado): se continúa desde sus valores
+        self._positions = {
+            key: pos for key, _, pos in _read_entries(self._mmap, self._used)
+        }
+
+    def _position(self, key):
+        pos = self._positions.get(key)
+        if pos is None:
+            encoded = key.encode()
+            # Longitud + llave múltiplo de 8 para que el double quede alineado
+            encoded += b' ' * (-(len(encoded) + _LENGTH.size) % 8)
+            size = _LENGTH.size + len(encoded) + _VALUE.size
+            if self._used + size > self._capacity:
+                self._grow(self._used + size)
+            start = self._used
+            _LENGTH.pack_into(self._mmap, start, len(encoded))
+            self._mmap[start + _LENGTH.size:start + _LENGTH.size + len(encoded)] = encoded
+            pos = start + _LENGTH.size + len(encoded)
+            _VALUE.pack_into(self._mmap, pos, 0.0)
+            self._used += size
+            _HEADER.pack_into(self._mmap, 0, self._used)
+            self._positions[key] = pos
+        return pos
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._mmap.close()
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._mmap = mmap.mmap(self._file.fileno(), capacity)
+
+    def inc(self, key, amount):
+        with self._lock:
+            pos = self._position(key)
+            _VALUE.pack_into(self._mmap, pos, _VALUE.unpack_from(self._mmap, pos)[0] + amount)
+
+    def set(self, key, value):
+        with self._lock:
+            _VALUE.pack_into(self._mmap, self._position(key), value)
+
+
+class MemoryStore:
+    """Valores del proceso en un dict (sin METRICS_DIR)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, key, amount):
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+_stores = {}
+_stores_pid = None
+_stores_lock = threading.Lock()
+
+
+def _get_store(kind):
+    """Store del proceso actual ('counter' o 'gauge'); se reabre tras un fork"""
+    global _stores_pid
+    store = _stores.get(kind) if _stores_pid == os.getpid() else None
+    if store is not None:
+        return store
+
+    with _stores_lock:
+        if _stores_pid != os.getpid():
+            # Worker recién creado (gunicorn --preload): no heredar los del padre
+            _stores.clear()
+            _stores_pid = os.getpid()
+        if kind not in _stores:
+            directory = getattr(settings, 'METRICS_DIR', '')
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f'{kind}_{os.getpid()}.db')
+                _stores[kind] = MmapStore(path)
+            else:
+                _stores[kind] = MemoryStore()
+        return _stores[kind]
+
+
+def clear_directory(directory):
+    """
+    Borra los archivos de métricas de una corrida anterior
+
+    Sin esto los contadores de workers muertos de la corrida anterior se
+    siguen sumando, y un pid reutilizado continúa desde sus valores.
+    """
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _collect_values():
+    """Valores sumados de todos los procesos: {llave: valor}"""
+    totals = {}
+
+    def add(key, value):
+        totals[key] = totals.get(key, 0.0) + value
+
+    directory = getattr(settings, 'METRICS_DIR', '')
+    if not directory:
+        for store in list(_stores.values()) if _stores_pid == os.getpid() else []:
+            for key, value in list(store.values.items()):
+                add(key, value)
+        return totals
+
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        kind, _, pid = os.path.basename(path)[:-3].partition('_')
+        if kind == 'gauge' and not _pid_alive(int(pid)):
+            continue
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        if len(data) < _HEADER.size:
+            continue
+        used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+        for key, value, _ in _read_entries(data, used):
+            add(key, value)
+    return totals
+
+
+# --- Métricas ----------------------------------------------------------------
+
+_registry = []
+
+
+def _key(metric, sample, labels):
+    return json.dumps([metric, sample, labels], separators=(',', ':'))
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else f'{int(value)}'
+
+
+class Metric:
+    """Base: nombre, ayuda, nombres de labels e hijos por combinación de valores"""
+
+    kind = 'counter'
+    type_name = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        _registry.append(self)
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}')
+            child = self._children[values] = self._make_child(list(zip(self.labelnames, values)))
+        return child
+
+    def samples(self, values):
+        """Líneas de exposición a partir de los valores sumados"""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        prefix = f'["{self.name}",'
+        for key in sorted(values):
+            if key.startswith(prefix):
+                _, sample, labels = json.loads(key)
+                lines.append(f'{sample}{_format_labels(labels)} {_format_value(values[key])}')
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('_key',)
+
+    def __init__(self, key):
+        self._key = key
+
+    def inc(self, amount=1):
+        if is_enabled():
+            _get_store('counter').inc(self._key, amount)
+
+
+class Counter(Metric):
+    """Contador monótono (el nombre debe terminar en _total)"""
+
+    type_name = 'counter'
+
+    def _make_child(self, labels):
+        return _CounterChild(_key(self.name, self.name, labels))
+
+
+class _GaugeChild:
+    __slots__ = ('_key',)
+
+    def __init__(self, key):
+        self._key = key
+
+    def set(self, value):
+        if is_enabled():
+            _get_store('gauge').set(self._key, value)
+
+
+class Gauge(Metric):
+    """Valor actual por proceso; el scrape suma los procesos vivos"""
+
+    type_name = 'gauge'
+
+    def _make_child(self, labels):
+        return _GaugeChild(_key(self.name, self.name, labels))
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_bucket_keys', '_sum_key', '_count_key')
+
+    def __init__(self, name, labels, bounds):
+        self._bounds = bounds
+        self._bucket_keys = [
+            _key(name, f'{name}_bucket', labels + [['le', bound]])
+            for bound in [_format_value(b) for b in bounds] + ['+Inf']
+        ]
+        self._sum_key = _key(name, f'{name}_sum', labels)
+        self._count_key = _key(name, f'{name}_count', labels)
+
+    def observe(self, value):
+        if is_enabled():
+            store = _get_store('counter')
+            # Se guarda el conteo por bucket; el acumulado se arma al exponer
+            store.inc(self._bucket_keys[bisect.bisect_left(self._bounds, value)], 1)
+            store.inc(self._sum_key, value)
+            store.inc(self._count_key, 1)
+
+
+class Histogram(Metric):
+    """Distribución de valores (ej: latencias en segundos) en buckets fijos"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _make_child(self, labels):
+        return _HistogramChild(self.name, [list(pair) for pair in labels], self.buckets)
+
+    def samples(self, values):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        prefix = f'["{self.name}",'
+        series = {}
+        for key, value in values.items():
+            if not key.startswith(prefix):
+                continue
+            _, sample, labels = json.loads(key)
+            bound = labels.pop()[1] if sample.endswith('_bucket') else None
+            entry = series.setdefault(json.dumps(labels), {'buckets': {}, 'sum': 0.0, 'count': 0.0})
+            if bound is not None:
+                entry['buckets'][bound] = value
+            else:
+                entry['sum' if sample.endswith('_sum') else 'count'] = value
+
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for labels_json in sorted(series):
+            labels = json.loads(labels_json)
+            entry = series[labels_json]
+            cumulative = 0.0
+            for bound in bounds:
+                cumulative += entry['buckets'].get(bound, 0.0)
+                lines.append(
+                    f'{self.name}_bucket{_format_labels(labels + [["le", bound]])} '
+                    f'{_format_value(cumulative)}'
+                )
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(entry["sum"])}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {_format_value(entry["count"])}')
+        return lines
+
+
+class CallbackGauge(Metric):
+    """
+    Gauge calculado al hacer scrape (ej: un COUNT en DB)
+
+    callback() devuelve un número o un dict {(valores de labels): número}.
+    """
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self, values):
+        result = self.callback()
+        if not isinstance(result, dict):
+            result = {(): result}
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} gauge',
+        ]
+        for label_values, value in sorted(result.items()):
+            labels = list(zip(self.labelnames, label_values))
+            lines.append(f'{self.name}{_format_labels(labels)} {_format_value(value)}')
+        return lines
+
+
+def generate_latest():
+    """Texto de exposición de Prometheus (formato 0.0.4) de todas las métricas"""
+    values = _collect_values()
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.samples(values))
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# --- Métricas de SproutMarket ------------------------------------------------
+
+REQUEST_LATENCY = Histogram(
+    'sproutmarket_http_request_duration_seconds',
+    'Latencia de requests HTTP por ruta',
+    ['method', 'route'],
+)
+REQUESTS = Counter(
+    'sproutmarket_http_requests_total',
+    'Requests HTTP por ruta y status',
+    ['method', 'route', 'status'],
+)
+EXTERNAL_LATENCY = Histogram(
+    'sproutmarket_external_call_duration_seconds',
+    'Latencia de llamadas a servicios externos (Stripe, S3, SES, SNS, Cognito)',
+    ['service', 'operation'],
+)
+CHECKOUTS = Counter(
+    'sproutmarket_checkout_total',
+    'Intentos de checkout por paso (intent, confirm) y resultado (success, rejected, error)',
+    ['step', 'result'],
+)
+CACHE_LOOKUPS = Counter(
+    'sproutmarket_cache_lookups_total',
+    'Lecturas de cache por uso y resultado (hit, miss)',
+    ['cache', 'result'],
+)
+DB_CONNECTIONS = Gauge(
+    'sproutmarket_db_connections',
+    'Conexiones a DB por alias: open (persistentes) o size/available/waiting/max (pool)',
+    ['alias', 'state'],
+)
+
+
+def observe_external(service, operation, seconds):
+    if is_enabled():
+        EXTERNAL_LATENCY.labels(service, operation).observe(seconds)
+
+
+def record_cache_lookup(cache_name, hit):
+    if is_enabled():
+        CACHE_LOOKUPS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+def record_db_connections(**kwargs):
+    """
+    Receiver de request_finished: estado de las conexiones del proceso
+
+    Corre después de close_old_connections (conectado antes por Django),
+    así que refleja las conexiones ya devueltas al pool.
+    """
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        # Se lee el pool ya creado: connection.pool lo crearía si no existe
+        pool = getattr(type(connection), '_connection_pools', {}).get(connection.alias)
+        if pool is not None:
+            stats = pool.get_stats()
+            DB_CONNECTIONS.labels(connection.alias, 'size').set(stats.get('pool_size', 0))
+            DB_CONNECTIONS.labels(connection.alias, 'available').set(stats.get('pool_available', 0))
+            DB_CONNECTIONS.labels(connection.alias, 'waiting').set(stats.get('requests_waiting', 0))
+            DB_CONNECTIONS.labels(connection.alias, 'max').set(pool.max_size)
+        else:
+            DB_CONNECTIONS.labels(connection.alias, 'open').set(
+                int(connection.connection is not None)
+            )
+
+
+class MetricsMiddleware:
+    """Latencia y conteo de requests por ruta (patrón de URL, no el path)"""
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route).observe(elapsed)
+        REQUESTS.labels(request.method, route, response.status_code).inc()
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Key del objeto en el bucket', max_length=255, unique=True, verbose_name='key')),
+                ('sha256', models.CharField(db_index=True, max_length=64, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(default=0, verbose_name='tamaño (bytes)')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='content type')),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Número de campos que usan este objeto', verbose_name='referencias')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creado en')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='actualizado en')),
+            ],
+            options={
+                'verbose_name': 'objeto almacenado',
+                'verbose_name_plural': 'objetos almacenados',
+                'db_table': 'stored_objects',
+            },
+        ),
+    ]
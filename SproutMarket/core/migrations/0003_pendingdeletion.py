@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_storedobject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Key del objeto en el bucket', max_length=255, unique=True, verbose_name='key')),
+                ('reason', models.CharField(blank=True, max_length=50, verbose_name='motivo')),
+                ('not_before', models.DateTimeField(help_text='Periodo de gracia antes de eliminar el objeto', verbose_name='eliminar después de')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='intentos')),
+                ('last_error', models.TextField(blank=True, verbose_name='último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creado en')),
+            ],
+            options={
+                'verbose_name': 'eliminación pendiente',
+                'verbose_name_plural': 'eliminaciones pendientes',
+                'db_table': 'pending_deletions',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['not_before'], name='pending_del_not_bef_c80f2c_idx')],
+            },
+        ),
+    ]
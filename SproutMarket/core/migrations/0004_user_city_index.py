@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0003_pendingdeletion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['city'], name='users_city_9c6023_idx'),
+        ),
+    ]
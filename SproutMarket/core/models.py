@@ -1,9 +1,12 @@
 # core/models.py
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 
+from core.auth_cache import invalidate_user
+
 
 class User(AbstractUser):
     """
@@ -119,11 +122,24 @@ class User(AbstractUser):
             models.Index(fields=['email']),
             models.Index(fields=['is_premium']),
             models.Index(fields=['is_email_verified']),
+            models.Index(fields=['city']),
         ]
     
     def __str__(self):
         return self.email
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Perfil, premium, is_active...: descartar el snapshot de autenticación
+        user_id = self.pk
+        transaction.on_commit(lambda: invalidate_user(user_id))
+    
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(lambda: invalidate_user(user_id))
+        return result
+    
     @property
     def product_limit(self):
         """Límite de productos según plan (10 gratis, 40 premium)"""
@@ -195,4 +211,130 @@ class Category(models.Model):
         ]
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class StoredObject(models.Model):
+    """
+    Objeto de S3 direccionado por contenido (key = hash SHA-256).
+    Varias imágenes idénticas comparten un solo objeto; ref_count cuenta
+    cuántos campos lo usan y el objeto se elimina cuando llega a 0.
+    """
+    
+    key = models.CharField(
+        _('key'),
+        max_length=255,
+        unique=True,
+        help_text='Key del objeto en el bucket'
+    )
+    sha256 = models.CharField(
+        _('SHA-256'),
+        max_length=64,
+        db_index=True
+    )
+    size = models.BigIntegerField(_('tamaño (bytes)'), default=0)
+    content_type = models.CharField(_('content type'), max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(
+        _('referencias'),
+        default=0,
+        help_text='Número de campos que usan este objeto'
+    )
+    
+    created_at = models.DateTimeField(_('creado en'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('actualizado en'), auto_now=True)
+    
+    class Meta:
+        db_table = 'stored_objects'
+        verbose_name = _('objeto almacenado')
+        verbose_name_plural = _('objetos almacenados')
+    
+    def __str__(self):
+        return f"{self.key} ({self.ref_count})"
+    
+    @classmethod
+    def acquire(cls, key, sha256, size=0, content_type=''):
+        """Registra una referencia más al objeto (lo crea si no existe)"""
+        with transaction.atomic():
+            stored, created = cls.objects.select_for_update().get_or_create(
+                key=key,
+                defaults={
+                    'sha256': sha256,
+                    'size': size,
+                    'content_type': content_type,
+                    'ref_count': 1,
+                }
+            )
+            if not created:
+                cls.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') + 1)
+    
+    @classmethod
+    def release(cls, key):
+        """
+        Quita una referencia al objeto
+        
+        Returns:
+            int: Referencias restantes (el registro se elimina al llegar a 0),
+                 o None si el objeto no está registrado (subidas anteriores)
+        """
+        with transaction.atomic():
+            stored = cls.objects.select_for_update().filter(key=key).first()
+            if stored is None:
+                return None
+            
+            remaining = max(stored.ref_count - 1, 0)
+            if remaining:
+                cls.objects.filter(pk=stored.pk).update(ref_count=remaining)
+            else:
+                stored.delete()
+            return remaining
+    
+    @classmethod
+    def is_referenced(cls, key):
+        return cls.objects.filter(key=key, ref_count__gt=0).exists()
+
+
+class PendingDeletion(models.Model):
+    """
+    Cola de objetos de S3 por eliminar. Las imágenes reemplazadas o
+    eliminadas se encolan aquí y el comando gc_images las borra por lotes
+    (delete_objects, hasta 1000 keys por llamada).
+    """
+    
+    key = models.CharField(
+        _('key'),
+        max_length=255,
+        unique=True,
+        help_text='Key del objeto en el bucket'
+    )
+    reason = models.CharField(_('motivo'), max_length=50, blank=True)
+    not_before = models.DateTimeField(
+        _('eliminar después de'),
+        help_text='Periodo de gracia antes de eliminar el objeto'
+    )
+    attempts = models.PositiveIntegerField(_('intentos'), default=0)
+    last_error = models.TextField(_('último error'), blank=True)
+    created_at = models.DateTimeField(_('creado en'), auto_now_add=True)
+    
+    class Meta:
+        db_table = 'pending_deletions'
+        verbose_name = _('eliminación pendiente')
+        verbose_name_plural = _('eliminaciones pendientes')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['not_before']),
+        ]
+    
+    def __str__(self):
+        return self.key
+    
+    @classmethod
+    def enqueue(cls, keys, reason=''):
+        """Encola keys para el GC (los ya encolados se ignoran)"""
+        from datetime import timedelta
+        from django.conf import settings
+        from django.utils import timezone
+        
+        not_before = timezone.now() + timedelta(seconds=settings.IMAGE_GC_GRACE_SECONDS)
+        cls.objects.bulk_create(
+            [cls(key=key, reason=reason, not_before=not_before) for key in set(keys) if key],
+            ignore_conflicts=True
+        )
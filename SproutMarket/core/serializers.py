@@ -3,7 +3,13 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from .authentication import CognitoClient, sync_cognito_user_to_db
+from django.db import transaction
+from .authentication import (
+    CognitoClient,
+    get_login_token,
+    get_user_data_from_id_token,
+    sync_cognito_user_to_db
+)
 
 User = get_user_model()
 
@@ -126,20 +132,23 @@ class UserLoginSerializer(serializers.Serializer):
                 'non_field_errors': 'Credenciales inválidas'
             })
         
-        # Obtener info del usuario desde Cognito
-        user_data = cognito.get_user(tokens['access_token'])
+        # Info del usuario desde el ID token (evita la llamada get_user)
+        user_data = get_user_data_from_id_token(tokens['id_token'])
+        if not user_data:
+            user_data = cognito.get_user(tokens['access_token'])
         
         if not user_data:
             raise serializers.ValidationError({
                 'non_field_errors': 'Error al obtener información del usuario'
             })
         
-        # Sincronizar con DB local
+        # Sincronizar con DB local (solo escribe si cambió algo)
         user = sync_cognito_user_to_db(user_data)
         
         # Agregar tokens y usuario a los datos validados
         attrs['tokens'] = tokens
         attrs['user'] = user
+        attrs['django_token'] = get_login_token(user)
         
         return attrs
 
@@ -177,22 +186,29 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Actualizar perfil y subir imagen a S3 si es necesario"""
         
-        # Si hay imagen nueva, subirla a S3
-        if 'profile_image' in validated_data:
-            from core.utils.s3_utils import upload_profile_image
-            
-            image_file = validated_data['profile_image']
-            if image_file:
-                # Eliminar imagen anterior si existe
-                if instance.profile_image:
-                    from core.utils.s3_utils import delete_image
-                    delete_image(instance.profile_image)
+        old_image = str(instance.profile_image) if instance.profile_image else ''
+        
+        with transaction.atomic():
+            # Si hay imagen nueva, subirla a S3 (la anterior sigue intacta si falla)
+            if 'profile_image' in validated_data:
+                from core.utils.s3_utils import upload_profile_image
                 
-                # Subir nueva imagen
-                image_url = upload_profile_image(image_file)
-                validated_data['profile_image'] = image_url
+                image_file = validated_data['profile_image']
+                if image_file:
+                    validated_data['profile_image'] = upload_profile_image(image_file)
+                else:
+                    old_image = old_image if image_file is None else ''
+            else:
+                old_image = ''
+            
+            instance = super().update(instance, validated_data)
+            
+            # Liberar la imagen anterior solo si el perfil se guardó
+            if old_image:
+                from core.utils.s3_utils import delete_image
+                transaction.on_commit(lambda: delete_image(old_image))
         
-        return super().update(instance, validated_data)
+        return instance
 
 
 class PasswordResetRequestSerializer(serializers.Serializer):
@@ -251,4 +267,89 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
         if not success:
             raise serializers.ValidationError('Código inválido o expirado')
         
-        return {'message': 'Contraseña actualizada exitosamente'}
\ No newline at end of file
+        return {'message': 'Contraseña actualizada exitosamente'}
+
+class DirectUploadRequestSerializer(serializers.Serializer):
+    """Serializer para solicitar una subida directa al almacenamiento"""
+    
+    target = serializers.ChoiceField(choices=['product', 'exchange', 'offer'])
+    content_type = serializers.ChoiceField(choices=['image/jpeg', 'image/png', 'image/webp'])
+    
+    def save(self):
+        """Firma la subida para el usuario autenticado"""
+        from .utils.direct_uploads import create_upload
+        
+        return create_upload(
+            user=self.context['request'].user,
+            target=self.validated_data['target'],
+            content_type=self.validated_data['content_type']
+        )
+
+
+class DirectUploadFinalizeSerializer(serializers.Serializer):
+    """
+    Serializer para asignar una imagen subida directamente a un
+    producto, intercambio u oferta del usuario
+    """
+    
+    # Destino -> (modelo, campo del dueño)
+    TARGET_MODELS = {
+        'product': ('products.Product', 'seller'),
+        'exchange': ('exchanges.Exchange', 'user'),
+        'offer': ('exchanges.ExchangeOffer', 'offeror'),
+    }
+    
+    target = serializers.ChoiceField(choices=list(TARGET_MODELS))
+    object_id = serializers.IntegerField()
+    field = serializers.ChoiceField(choices=['image1', 'image2', 'image3'])
+    key = serializers.CharField(max_length=500)
+    
+    def validate(self, attrs):
+        """Validar que el objeto sea del usuario y que el archivo exista (HEAD)"""
+        from django.apps import apps
+        from .utils.direct_uploads import verify_upload, DirectUploadError
+        
+        user = self.context['request'].user
+        model_label, owner_field = self.TARGET_MODELS[attrs['target']]
+        model = apps.get_model(model_label)
+        
+        instance = model.objects.filter(
+            id=attrs['object_id'],
+            **{owner_field: user}
+        ).first()
+        if instance is None:
+            raise serializers.ValidationError({
+                'object_id': 'El objeto no existe o no te pertenece'
+            })
+        
+        try:
+            attrs['url'] = verify_upload(user, attrs['target'], attrs['key'])
+        except DirectUploadError as e:
+            raise serializers.ValidationError({'key': str(e)})
+        
+        attrs['instance'] = instance
+        return attrs
+    
+    def save(self):
+        """Reemplaza la imagen del campo y programa sus versiones"""
+        from .utils.direct_uploads import get_backend
+        from .utils.images import release_replaced_images, schedule_renditions
+        
+        instance = self.validated_data['instance']
+        field = self.validated_data['field']
+        url = self.validated_data['url']
+        
+        old_image = getattr(instance, field)
+        
+        with transaction.atomic():
+            setattr(instance, field, url)
+            instance.save(update_fields=[field, 'updated_at'])
+            # La imagen anterior se libera después del commit
+            release_replaced_images(instance, {
+                field: str(old_image) if old_image and str(old_image) != url else ''
+            })
+            
+            if get_backend().supports_renditions:
+                schedule_renditions(instance, {field: (url, None)})
+        
+        return instance
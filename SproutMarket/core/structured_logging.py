@@ -0,0 +1,255 @@
+# core/structured_logging.py
+
+"""
+Logging sin bloquear los requests: QueueHandler + QueueListener.
+
+Los threads de los requests solo encolan el record (ya filtrado y con el
+mensaje resuelto); un thread del QueueListener formatea y escribe a consola
+y al archivo. Si la cola se llena (disco lento) los records se descartan y
+se reporta cuántos, en lugar de frenar al request.
+
+- JSONFormatter: una línea JSON por record, con los extra (ej: metrics)
+- RequestIDMiddleware + RequestIDFilter: request_id en cada log del request
+  (X-Request-ID entrante o uno nuevo, devuelto en la respuesta)
+- SamplingFilter: muestreo de logs INFO/DEBUG de alto volumen
+- SizedTimedRotatingFileHandler: rota por tiempo y por tamaño
+
+Con varios workers de gunicorn cada proceso rota su propio handler sobre el
+mismo archivo; en ese caso conviene LOG_FILE vacío (solo consola, la
+recolecta el supervisor o CloudWatch) o un archivo por proceso.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+_request_id = ContextVar('request_id', default='-')
+
+# X-Request-ID entrante: se acepta solo si es un identificador razonable
+_VALID_REQUEST_ID = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+# Atributos propios de LogRecord: el resto son extra del llamador
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'sample',
+}
+
+
+def get_request_id():
+    """ID del request en curso ('-' fuera de un request)"""
+    return _request_id.get()
+
+
+class RequestIDMiddleware:
+    """
+    Asigna un ID a cada request para correlacionar sus logs
+
+    Reutiliza X-Request-ID si viene del balanceador o del frontend.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.META.get('HTTP_X_REQUEST_ID', '')
+        request_id = incoming if _VALID_REQUEST_ID.fullmatch(incoming) else uuid.uuid4().hex
+        request.request_id = request_id
+        token = _request_id.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_id.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class RequestIDFilter(logging.Filter):
+    """Agrega record.request_id (corre en el thread del request, antes de encolar)"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los logs INFO/DEBUG
+
+    WARNING o mayor siempre pasa. loggers limita el muestreo a esos
+    prefijos (vacío = todos). Un record con extra={'sample': False} nunca
+    se descarta.
+    """
+
+    def __init__(self, rate=1.0, loggers=()):
+        super().__init__()
+        self.rate = rate
+        self.loggers = tuple(loggers)
+
+    def filter(self, record):
+        if (
+            self.rate >= 1
+            or record.levelno >= logging.WARNING
+            or not getattr(record, 'sample', True)
+        ):
+            return True
+        if self.loggers and not record.name.startswith(self.loggers):
+            return True
+        return random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por record: timestamp, nivel, logger, mensaje y extra"""
+
+    def format(self, record):
+        data = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc)
+            .isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'process': record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rota al cumplirse el intervalo (ej: medianoche) o al pasar de max_bytes,
+    lo que ocurra primero
+
+    Las rotaciones por tamaño del mismo periodo se numeran
+    (django.log.2026-10-19, django.log.2026-10-19.1, ...) en lugar de
+    sobrescribirse.
+    """
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def rotation_filename(self, default_name):
+        name = super().rotation_filename(default_name)
+        candidate, index = name, 1
+        while os.path.exists(candidate):
+            candidate = f'{name}.{index}'
+            index += 1
+        return candidate
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    Handler de dictConfig: encola los records y un QueueListener los escribe
+    a consola y (opcional) a un archivo con rotación
+
+    Args:
+        filename (str): Archivo de log ('' = solo consola)
+        max_bytes (int): Tamaño máximo antes de rotar (0 = sin límite)
+        when (str): Intervalo de rotación por tiempo (TimedRotatingFileHandler)
+        backup_count (int): Archivos rotados que se conservan
+        json_format (bool): JSON por línea o texto legible (desarrollo)
+        queue_size (int): Records en espera antes de empezar a descartar
+    """
+
+    def __init__(self, filename='', max_bytes=0, when='midnight', backup_count=14,
+                 json_format=True, queue_size=10000):
+        if json_format:
+            formatter = JSONFormatter()
+        else:
+            formatter = logging.Formatter(
+                '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+            )
+
+        self.targets = [logging.StreamHandler()]
+        if filename:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            self.targets.append(SizedTimedRotatingFileHandler(
+                filename,
+                max_bytes=max_bytes,
+                when=when,
+                backupCount=backup_count,
+                encoding='utf-8',
+                delay=True,
+            ))
+        for target in self.targets:
+            target.setFormatter(formatter)
+
+        self.queue_size = queue_size
+        self.dropped = 0
+        super().__init__(queue.Queue(queue_size))
+        self._start_listener()
+        atexit.register(self.stop)
+        # Un fork (gunicorn --preload) no hereda el thread del listener
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _start_listener(self):
+        self.listener = QueueListener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+
+    def _restart_in_child(self):
+        self.queue = queue.Queue(self.queue_size)
+        self.dropped = 0
+        self._start_listener()
+
+    def stop(self):
+        """Escribe lo pendiente y detiene el listener (al salir del proceso)"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        """
+        Resuelve mensaje y traceback en el thread del request (los args
+        podrían cambiar después), sin formatear el JSON aquí
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            warning = logging.makeLogRecord({
+                'name': __name__,
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': f'Logging queue full: dropped {dropped} records',
+                'request_id': '-',
+            })
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                self.dropped += dropped
@@ -1,3 +1,96 @@
+# core/tests.py
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import User
+from exchanges.models import Exchange, ExchangeOffer
+from products.models import Cart, Order, Product
+
+
+class AdminChangelistQueryCountTest(TestCase):
+    """
+    Las páginas de listado del admin deben hacer un número acotado de
+    consultas, sin importar cuántas filas tenga la página
+    """
+
+    MAX_QUERIES = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+
+    def create_rows(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(
+                username=f'user{i}', email=f'user{i}@example.com', city=f'Ciudad {i % 3}'
+            )
+            Cart.objects.create(user=user, items=[{'product_id': 1, 'quantity': 2}])
+            Product.objects.create(
+                seller=user, common_name=f'Planta {i}', scientific_name='Planta',
+                description='-', quantity=1, price_mxn=10, width_cm=1, height_cm=1,
+                image1='products/x.jpg'
+            )
+            Order.objects.create(
+                buyer=user, buyer_name='Comprador', buyer_phone='6140000000',
+                buyer_address='-', items=[], subtotal_mxn=10, commission_mxn=1,
+                total_mxn=10, stripe_payment_id=f'pi_{i}', status='completed'
+            )
+            exchange = Exchange.objects.create(
+                user=user, plant_common_name=f'Planta {i}', plant_scientific_name='Planta',
+                description='-', width_cm=1, height_cm=1, location='-',
+                image1='exchanges/x.jpg', status='active'
+            )
+            ExchangeOffer.objects.create(
+                exchange=exchange, offeror=self.admin, plant_common_name='Oferta',
+                plant_scientific_name='Oferta', description='-', width_cm=1,
+                height_cm=1, image1='exchanges/y.jpg', status='pending'
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_are_bounded(self):
+        self.client.force_login(self.admin)
+        urls = [
+            reverse('admin:core_user_changelist'),
+            reverse('admin:products_product_changelist'),
+            reverse('admin:products_cart_changelist'),
+            reverse('admin:products_order_changelist'),
+            reverse('admin:exchanges_exchange_changelist'),
+            reverse('admin:exchanges_exchangeoffer_changelist'),
+        ]
+
+        self.create_rows(2)
+        for url in urls:
+            # Primera carga: llena caches (ej: valores del filtro de ciudad)
+            self.client.get(url)
+        few = {url: self.count_queries(url) for url in urls}
+
+        self.create_rows(10)
+        for url in urls:
+            many = self.count_queries(url)
+            self.assertLessEqual(many, self.MAX_QUERIES, url)
+            # Sin consultas por fila: el número no crece con las filas
+            self.assertEqual(many, few[url], url)
+
+    def test_search_routes(self):
+        self.client.force_login(self.admin)
+        self.create_rows(3)
+        url = reverse('admin:products_order_changelist')
+
+        response = self.client.get(url, {'q': 'user1@example.com'})
+        self.assertEqual(list(response.context['cl'].result_list), list(
+            Order.objects.filter(buyer__email='user1@example.com')
+        ))
 
-# Create your tests here.
+        response = self.client.get(url, {'q': 'pi_2'})
+        self.assertEqual(response.context['cl'].result_count, 1)
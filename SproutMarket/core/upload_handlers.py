@@ -0,0 +1,42 @@
+# core/upload_handlers.py
+
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingUploadHandlerMixin:
+    """
+    Calcula el SHA-256 del archivo mientras Django lo recibe (sin una
+    segunda lectura) y lo deja en `file.sha256` para las subidas
+    direccionadas por contenido de S3Handler.
+    """
+    
+    def new_file(self, *args, **kwargs):
+        # Antes de super(): MemoryFileUploadHandler lanza StopFutureHandlers
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+    
+    def receive_data_chunk(self, raw_data, start):
+        result = super().receive_data_chunk(raw_data, start)
+        if result is None:
+            # Este handler consumió el chunk
+            self.sha256.update(raw_data)
+        return result
+    
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
@@ -9,7 +9,10 @@ from .views import (
     UserProfileUpdateView,
     PasswordResetRequestView,
     PasswordResetConfirmView,
-    UserLogoutView
+    UserLogoutView,
+    DirectUploadPresignView,
+    DirectUploadFinalizeView,
+    LocalDirectUploadView
 )
 
 app_name = 'core'
@@ -28,4 +31,9 @@ urlpatterns = [
     # Password reset
     path('auth/password-reset/', PasswordResetRequestView.as_view(), name='password-reset'),
     path('auth/password-reset/confirm/', PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
+    
+    # Subidas directas al almacenamiento
+    path('uploads/presign/', DirectUploadPresignView.as_view(), name='direct-upload-presign'),
+    path('uploads/finalize/', DirectUploadFinalizeView.as_view(), name='direct-upload-finalize'),
+    path('uploads/local/', LocalDirectUploadView.as_view(), name='direct-upload-local'),
 ]
\ No newline at end of file
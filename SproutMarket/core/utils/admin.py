@@ -0,0 +1,153 @@
+# core/utils/admin.py
+
+"""
+Utilidades para que las páginas de listado del admin escalen con tablas
+grandes (cientos de miles de filas):
+
+- EstimatedCountPaginator: sin COUNT(*) exacto sobre toda la tabla
+- OptimizedAdminMixin: sin segundo COUNT(*), búsquedas dirigidas a columnas
+  indexadas (email exacto, ID, prefijos) o al índice full-text
+"""
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import BooleanField, Count, Q
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from core.metrics import record_cache_lookup
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator del admin que no cuenta la tabla completa
+
+    - Listado sin filtros en PostgreSQL: usa la estimación de pg_class
+      (reltuples) si la tabla es grande
+    - Con filtros: COUNT(*) acotado a ADMIN_COUNT_LIMIT filas; más allá de
+      ese límite hay que refinar la búsqueda
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        limit = getattr(settings, 'ADMIN_COUNT_LIMIT', 10000)
+
+        if not queryset.query.where and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] > limit:
+                return row[0]
+
+        # SELECT COUNT(*) FROM (SELECT ... LIMIT n): se detiene en el límite
+        return queryset.order_by()[:limit].count()
+
+
+class OptimizedAdminMixin:
+    """
+    Mixin para ModelAdmin de tablas grandes
+
+    Atributos:
+        exact_search_fields: Campos (indexados) para términos con '@'
+            (emails), ej: ['buyer__email']
+        numeric_search_fields: Campos de igualdad exacta, además del ID,
+            para términos numéricos, ej: ['buyer_phone']
+        prefix_search_fields: {prefijo: campo} para IDs externos, ej:
+            {'pi_': 'stripe_payment_id'}
+        fulltext_search: Expresión SQL del índice GIN de búsqueda en
+            PostgreSQL (debe coincidir con la del índice para usarlo)
+
+    El resto de términos usa search_fields (búsqueda normal del admin).
+    """
+
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
+
+    exact_search_fields = []
+    numeric_search_fields = []
+    prefix_search_fields = {}
+    fulltext_search = None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        if term.isdigit():
+            query = Q(pk=int(term))
+            for field in self.numeric_search_fields:
+                query |= Q(**{field: term})
+            return queryset.filter(query), False
+
+        if '@' in term and self.exact_search_fields:
+            query = Q()
+            for field in self.exact_search_fields:
+                query |= Q(**{field: term})
+            return queryset.filter(query), False
+
+        for prefix, field in self.prefix_search_fields.items():
+            if term.startswith(prefix):
+                return queryset.filter(**{field: term}), False
+
+        if self.fulltext_search and connections[queryset.db].vendor == 'postgresql':
+            match = RawSQL(
+                f"{self.fulltext_search} @@ plainto_tsquery('spanish', %s)",
+                (term,),
+                output_field=BooleanField()
+            )
+            return queryset.filter(match), False
+
+        return super().get_search_results(request, queryset, search_term)
+
+
+class CachedValuesListFilter(admin.SimpleListFilter):
+    """
+    Base para filtros de valores (ej: ciudad) cuyo SELECT DISTINCT se cachea
+
+    Subclases: definir title, parameter_name y field. Por defecto se
+    listan todos los valores; con limit solo los más frecuentes (más el
+    seleccionado, para que el filtro activo siempre aparezca).
+    """
+
+    field = None
+    limit = None
+
+    def get_values(self, model_admin):
+        queryset = model_admin.model.objects.order_by()
+        if self.limit is None:
+            return list(
+                queryset.order_by(self.field)
+                .values_list(self.field, flat=True)
+                .distinct()
+            )
+        return sorted(
+            queryset.values(self.field)
+            .annotate(rows=Count('pk'))
+            .order_by('-rows')
+            .values_list(self.field, flat=True)[:self.limit]
+        )
+
+    def lookups(self, request, model_admin):
+        key = f'admin:filter:{model_admin.model._meta.db_table}:{self.field}:{self.limit}'
+        values = cache.get(key)
+        record_cache_lookup('admin_filter', values is not None)
+        if values is None:
+            values = self.get_values(model_admin)
+            cache.set(key, values, getattr(settings, 'ADMIN_FILTER_CACHE_TTL', 3600))
+        if self.value() and self.value() not in values:
+            values = sorted([*values, self.value()])
+        return [(value, value) for value in values if value]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field: self.value()})
+        return queryset
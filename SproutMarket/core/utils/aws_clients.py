@@ -0,0 +1,98 @@
+# core/utils/aws_clients.py
+
+import threading
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+
+from core.instrumentation import register_boto3_hooks
+
+
+# Registro de clientes boto3 compartidos por todo el proceso.
+# Los clientes de boto3 son thread-safe, pero crearlos es caro (decenas de ms)
+# y cada uno mantiene su propio pool de conexiones HTTP, así que se crean una
+# sola vez (de forma perezosa) y se reutilizan entre requests.
+_clients = {}
+_lock = threading.Lock()
+_session = None
+
+
+def _get_session():
+    """Sesión boto3 dedicada (la sesión por defecto no es thread-safe)"""
+    global _session
+    if _session is None:
+        _session = boto3.session.Session(
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+        )
+        # Tiempo de las llamadas a AWS en las métricas del request
+        register_boto3_hooks(_session)
+    return _session
+
+
+def _build_config(service_name):
+    """Configuración de botocore: tamaño del pool, timeouts y reintentos"""
+    pool_sizes = getattr(settings, 'AWS_CLIENT_POOL_SIZES', {})
+    max_pool = pool_sizes.get(
+        service_name,
+        getattr(settings, 'AWS_MAX_POOL_CONNECTIONS', 10)
+    )
+    return Config(
+        max_pool_connections=max_pool,
+        connect_timeout=getattr(settings, 'AWS_CONNECT_TIMEOUT', 5),
+        read_timeout=getattr(settings, 'AWS_READ_TIMEOUT', 30),
+        retries={
+            'max_attempts': getattr(settings, 'AWS_MAX_ATTEMPTS', 3),
+            'mode': 'standard',
+        },
+    )
+
+
+def _create_client(service_name, region_name):
+    kwargs = {
+        'region_name': region_name,
+        'config': _build_config(service_name),
+    }
+
+    # Endpoint local (ej: moto_server) para pruebas y benchmarks sin AWS
+    endpoint_url = getattr(settings, 'AWS_ENDPOINT_URL', '')
+    if endpoint_url:
+        kwargs['endpoint_url'] = endpoint_url
+
+    return _get_session().client(service_name, **kwargs)
+
+
+def get_client(service_name, region_name=None):
+    """
+    Obtiene un cliente boto3 compartido para el servicio y región indicados
+
+    Args:
+        service_name (str): Servicio de AWS ('s3', 'ses', 'sns', 'cognito-idp')
+        region_name (str, optional): Región; por defecto settings.AWS_REGION
+
+    Returns:
+        botocore.client.BaseClient: Cliente reutilizable entre threads
+    """
+    region = region_name or settings.AWS_REGION
+    key = (service_name, region)
+
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _create_client(service_name, region)
+                _clients[key] = client
+    return client
+
+
+def reset_clients():
+    """
+    Descarta los clientes creados (tests, cambio de credenciales o después
+    de un fork del proceso)
+    """
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
@@ -0,0 +1,240 @@
+# core/utils/direct_uploads.py
+
+"""
+Subidas directas del cliente al almacenamiento (sin pasar por Django).
+
+1. POST /api/uploads/presign/  -> el servidor firma un POST con límite de
+   tamaño y content type para un key único del usuario.
+2. El cliente sube la imagen directo a S3 (o al stand-in local).
+3. POST /api/uploads/finalize/ (o image_keys al crear) -> el servidor
+   verifica el objeto con HEAD y lo asigna al producto/intercambio/oferta.
+
+El backend se elige con settings.DIRECT_UPLOAD_BACKEND; sin bucket se usa
+LocalDirectUploadBackend, que guarda en MEDIA_ROOT y firma la política
+con django.core.signing.
+"""
+
+import mimetypes
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .s3_utils import S3Handler
+
+
+class DirectUploadError(Exception):
+    """El objeto subido no existe o no cumple las restricciones"""
+    pass
+
+
+ALLOWED_CONTENT_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}
+
+# Destino -> carpeta del bucket
+TARGET_FOLDERS = {
+    'product': 'products',
+    'exchange': 'exchanges',
+    'offer': 'exchanges',
+}
+
+
+class S3DirectUploadBackend:
+    """Presigned POST de S3"""
+    
+    supports_renditions = True
+    
+    def __init__(self):
+        self.handler = S3Handler()
+    
+    def create_post(self, key, content_type, max_size, expires_in):
+        return self.handler.s3_client.generate_presigned_post(
+            Bucket=self.handler.bucket_name,
+            Key=key,
+            Fields={
+                'Content-Type': content_type,
+                'acl': 'public-read',
+            },
+            Conditions=[
+                {'Content-Type': content_type},
+                {'acl': 'public-read'},
+                ['content-length-range', 1, max_size],
+            ],
+            ExpiresIn=expires_in
+        )
+    
+    def head(self, key):
+        """Tamaño y content type del objeto, o None si no existe"""
+        try:
+            response = self.handler.s3_client.head_object(
+                Bucket=self.handler.bucket_name,
+                Key=key
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {
+            'size': response['ContentLength'],
+            'content_type': response.get('ContentType', ''),
+        }
+    
+    def get_url(self, key):
+        return self.handler.get_public_url(key)
+
+
+class LocalDirectUploadBackend:
+    """
+    Stand-in local: el POST va a /api/uploads/local/ y se guarda en MEDIA_ROOT
+    
+    La política (key, content type, tamaño máximo) viaja firmada en el
+    formulario, igual que la policy de S3.
+    """
+    
+    supports_renditions = False
+    SIGNING_SALT = 'core.direct_uploads'
+    
+    @property
+    def root(self):
+        return str(getattr(settings, 'MEDIA_ROOT', settings.BASE_DIR / 'media'))
+    
+    def create_post(self, key, content_type, max_size, expires_in):
+        policy = signing.dumps(
+            {'key': key, 'content_type': content_type, 'max_size': max_size},
+            salt=self.SIGNING_SALT
+        )
+        return {
+            'url': reverse('core:direct-upload-local'),
+            'fields': {
+                'key': key,
+                'Content-Type': content_type,
+                'policy': policy,
+            },
+        }
+    
+    def load_policy(self, policy):
+        """Valida firma y expiración de la política"""
+        return signing.loads(
+            policy,
+            salt=self.SIGNING_SALT,
+            max_age=settings.DIRECT_UPLOAD_EXPIRES
+        )
+    
+    def _path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise DirectUploadError('Key inválido')
+        return path
+    
+    def save(self, key, file):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as destination:
+            for chunk in file.chunks():
+                destination.write(chunk)
+    
+    def head(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        return {
+            'size': os.path.getsize(path),
+            'content_type': content_type or '',
+        }
+    
+    def get_url(self, key):
+        # Se guarda el key relativo: FieldFile.url le antepone MEDIA_URL
+        return key
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.DIRECT_UPLOAD_BACKEND)()
+    return _backend
+
+
+def create_upload(user, target, content_type):
+    """
+    Firma una subida directa para el usuario
+    
+    Returns:
+        dict: key, url y fields del formulario, max_size y expires_in
+    """
+    key = (
+        f'{TARGET_FOLDERS[target]}/direct/{user.id}/'
+        f'{uuid.uuid4().hex}.{ALLOWED_CONTENT_TYPES[content_type]}'
+    )
+    max_size = settings.DIRECT_UPLOAD_MAX_SIZE
+    expires_in = settings.DIRECT_UPLOAD_EXPIRES
+    
+    post = get_backend().create_post(key, content_type, max_size, expires_in)
+    return {
+        'key': key,
+        'url': post['url'],
+        'fields': post['fields'],
+        'max_size': max_size,
+        'expires_in': expires_in,
+    }
+
+
+def verify_upload(user, target, key):
+    """
+    Comprueba con HEAD que el objeto exista y cumpla las restricciones
+    
+    Returns:
+        str: URL pública del objeto
+    
+    Raises:
+        DirectUploadError: Si el key no es del usuario o el objeto no es válido
+    """
+    if not key.startswith(f'{TARGET_FOLDERS[target]}/direct/{user.id}/'):
+        raise DirectUploadError('El archivo no pertenece a este usuario')
+    
+    backend = get_backend()
+    info = backend.head(key)
+    if info is None:
+        raise DirectUploadError('El archivo no se ha subido')
+    if info['size'] > settings.DIRECT_UPLOAD_MAX_SIZE:
+        raise DirectUploadError('El archivo excede el tamaño máximo')
+    if info['content_type'] not in ALLOWED_CONTENT_TYPES:
+        raise DirectUploadError('Tipo de archivo no permitido')
+    
+    return backend.get_url(key)
+
+
+def verify_uploads(user, target, keys):
+    """
+    Verifica varios keys en paralelo (un HEAD por key)
+    
+    Returns:
+        list: URLs en el mismo orden que keys
+    """
+    if len(keys) <= 1:
+        return [verify_upload(user, target, key) for key in keys]
+    
+    with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+        return list(executor.map(lambda key: verify_upload(user, target, key), keys))
+
+
+def resolve_image_keys(user, target, keys):
+    """
+    URLs de image1, image2 e image3 a partir de keys subidos directamente
+    
+    Returns:
+        list: Tres elementos (None para los campos sin imagen)
+    """
+    urls = verify_uploads(user, target, keys)
+    return urls + [None] * (3 - len(urls))
@@ -0,0 +1,403 @@
+# core/utils/images.py
+
+"""
+Pipeline de imágenes de productos, intercambios y ofertas.
+
+Cada imagen subida genera versiones thumb/medium/full en WebP y JPEG
+(orientación corregida y sin EXIF). El procesamiento con Pillow corre en
+un pool de procesos para no bloquear la request ni el GIL; la subida de
+las versiones y la actualización de `image_renditions` corren después del
+commit en un pool de threads propio (no compite con las subidas a S3 de
+las requests).
+
+Estructura de `image_renditions`:
+    {
+        "image1": {
+            "source": "<URL original>",
+            "thumb": {"width": 320, "webp": "<URL>", "jpeg": "<URL>"},
+            "medium": {...},
+            "full": {...}
+        },
+        ...
+    }
+"""
+
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = ['image1', 'image2', 'image3']
+
+# Lado mayor (px) de cada versión
+RENDITIONS = {
+    'thumb': 320,
+    'medium': 800,
+    'full': 1600,
+}
+
+FORMATS = {
+    'webp': {'format': 'WEBP', 'content_type': 'image/webp', 'options': {'quality': 80, 'method': 4}},
+    'jpeg': {'format': 'JPEG', 'content_type': 'image/jpeg', 'options': {'quality': 82, 'optimize': True, 'progressive': True}},
+}
+
+
+def process_image(data):
+    """
+    Genera las versiones de una imagen (se ejecuta en el pool de procesos)
+    
+    Args:
+        data (bytes): Imagen original
+    
+    Returns:
+        dict: {(rendition, format): (bytes, width, height)}
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        # Aplicar la orientación EXIF a los pixeles; al guardar sin exif=
+        # los metadatos (GPS, cámara) no se copian
+        image = ImageOps.exif_transpose(original)
+        
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            # JPEG no soporta transparencia: fondo blanco
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        results = {}
+        for name, max_side in RENDITIONS.items():
+            rendition = image.copy()
+            # thumbnail() nunca agranda la imagen
+            rendition.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            
+            for fmt, spec in FORMATS.items():
+                buffer = io.BytesIO()
+                rendition.save(buffer, spec['format'], **spec['options'])
+                results[(name, fmt)] = (buffer.getvalue(), rendition.width, rendition.height)
+        
+        return results
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """Pool de procesos compartido (spawn: seguro aunque el servidor use threads)"""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                from django.conf import settings
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _process_pool
+
+
+_rendition_executor = None
+_rendition_executor_lock = threading.Lock()
+
+
+def get_rendition_executor():
+    """
+    Pool de threads para generar versiones (IMAGE_RENDITION_WORKERS)
+
+    Separado de get_upload_executor(): una ráfaga de versiones (descarga,
+    procesamiento y 6 put_object por imagen) no retrasa las subidas que una
+    request está esperando.
+    """
+    global _rendition_executor
+    if _rendition_executor is None:
+        with _rendition_executor_lock:
+            if _rendition_executor is None:
+                from django.conf import settings
+                _rendition_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+                    thread_name_prefix='renditions'
+                )
+    return _rendition_executor
+
+
+def rendition_key(source_key, name, fmt):
+    """products/<uuid>.jpg -> products/<uuid>/thumb.webp"""
+    stem = source_key.rsplit('.', 1)[0]
+    extension = 'jpg' if fmt == 'jpeg' else fmt
+    return f'{stem}/{name}.{extension}'
+
+
+def rendition_urls(renditions):
+    """Todas las URLs de versiones guardadas para un campo"""
+    urls = []
+    for name in RENDITIONS:
+        for fmt in FORMATS:
+            url = (renditions or {}).get(name, {}).get(fmt)
+            if url:
+                urls.append(url)
+    return urls
+
+
+def unreferenced_rendition_urls(handler, entries):
+    """
+    URLs de versiones que se pueden eliminar: las versiones se derivan del
+    key del original, así que imágenes deduplicadas las comparten y solo se
+    eliminan cuando el original ya no tiene referencias
+    """
+    from core.models import StoredObject
+    
+    urls = []
+    for entry in entries:
+        if StoredObject.is_referenced(handler.get_key_from_url(entry['source'])):
+            continue
+        urls.extend(rendition_urls(entry))
+    return urls
+
+
+def get_rendition_url(obj, field, name='thumb', fmt='webp'):
+    """
+    URL de una versión de la imagen, o la original si aún no se generó
+    """
+    image = getattr(obj, field)
+    if not image:
+        return None
+    
+    renditions = (obj.image_renditions or {}).get(field, {})
+    url = renditions.get(name, {}).get(fmt)
+    if url:
+        return url
+    return image.url if hasattr(image, 'url') else str(image)
+
+
+def get_srcset(obj, field, fmt='webp'):
+    """
+    srcset para <img>/<picture> de un campo de imagen
+    
+    Returns:
+        dict: {'src', 'srcset', 'srcset_jpeg'} o None si no hay imagen
+    """
+    image = getattr(obj, field)
+    if not image:
+        return None
+    
+    renditions = (obj.image_renditions or {}).get(field, {})
+    
+    def build(fmt):
+        return ', '.join(
+            f"{renditions[name][fmt]} {renditions[name]['width']}w"
+            for name in RENDITIONS
+            if name in renditions
+        )
+    
+    return {
+        'src': get_rendition_url(obj, field, 'medium', 'jpeg'),
+        'srcset': build('webp'),
+        'srcset_jpeg': build('jpeg'),
+    }
+
+
+def _generate(model, pk, sources):
+    """
+    Procesa, sube y guarda las versiones de varios campos de una instancia
+    
+    Args:
+        model: Clase del modelo (Product, Exchange, ExchangeOffer)
+        pk: ID de la instancia
+        sources (dict): {campo: (url original, bytes o None para leerla de S3)}
+    """
+    from django.db import transaction
+    from core.utils.s3_utils import S3Handler
+    
+    handler = S3Handler()
+    pool = get_process_pool()
+    
+    futures = {}
+    for field, (source_url, data) in sources.items():
+        if data is None:
+            response = handler.s3_client.get_object(
+                Bucket=handler.bucket_name,
+                Key=handler.get_key_from_url(source_url)
+            )
+            data = response['Body'].read()
+        futures[field] = pool.submit(process_image, data)
+    
+    generated = {}
+    for field, future in futures.items():
+        source_url = sources[field][0]
+        source_key = handler.get_key_from_url(source_url)
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error(f"Error processing {source_url}: {str(e)}")
+            continue
+        
+        entry = {'source': source_url}
+        for (name, fmt), (content, width, height) in results.items():
+            key = rendition_key(source_key, name, fmt)
+            handler.s3_client.put_object(
+                Bucket=handler.bucket_name,
+                Key=key,
+                Body=content,
+                ContentType=FORMATS[fmt]['content_type'],
+                CacheControl='public, max-age=31536000, immutable',
+                ACL='public-read'
+            )
+            entry.setdefault(name, {'width': width, 'height': height})[fmt] = handler.get_public_url(key)
+        generated[field] = entry
+    
+    if not generated:
+        return
+    
+    with transaction.atomic():
+        instance = model.objects.select_for_update().filter(pk=pk).first()
+        if instance is None:
+            # La instancia se eliminó mientras se procesaba
+            handler.schedule_deletion(
+                [handler.get_key_from_url(url) for url in unreferenced_rendition_urls(handler, generated.values())],
+                reason='renditions'
+            )
+            return
+        
+        renditions = dict(instance.image_renditions or {})
+        stale_entries = []
+        for field, entry in generated.items():
+            # str() de un FieldFile es el valor guardado (la URL de S3)
+            current = getattr(instance, field)
+            if not current or str(current) != entry['source']:
+                # La imagen se reemplazó mientras se procesaba
+                stale_entries.append(entry)
+                continue
+            renditions[field] = entry
+        
+        model.objects.filter(pk=pk).update(image_renditions=renditions)
+    
+    if stale_entries:
+        handler.schedule_deletion(
+            [handler.get_key_from_url(url) for url in unreferenced_rendition_urls(handler, stale_entries)],
+            reason='renditions'
+        )
+
+
+def generate_renditions(model, pk, sources):
+    """Ejecuta _generate atrapando errores (para el pool de threads)"""
+    try:
+        _generate(model, pk, sources)
+    except Exception as e:
+        logger.error(f"Error generating renditions for {model.__name__} {pk}: {str(e)}")
+
+
+def schedule_renditions(instance, sources):
+    """
+    Programa la generación de versiones después del commit
+    
+    Args:
+        instance: Instancia guardada con image_renditions
+        sources (dict): {campo: (url subida, archivo subido o None)}
+    """
+    from django.conf import settings
+    from django.db import transaction
+    from core.utils.s3_utils import S3Handler
+    
+    # Las versiones se guardan en S3: sin bucket no hay pipeline
+    if not settings.AWS_STORAGE_BUCKET_NAME:
+        return
+    
+    bucket_url = S3Handler().base_url
+    
+    prepared = {}
+    for field, (url, file) in sources.items():
+        if not url:
+            continue
+        data = None
+        if file is None and not url.startswith(bucket_url):
+            # Sin bytes solo se puede leer el original desde el bucket
+            continue
+        if file is not None:
+            # El archivo de la request se cierra al terminar: copiar los bytes
+            file.seek(0)
+            data = file.read()
+        prepared[field] = (url, data)
+    
+    if not prepared:
+        return
+    
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(
+        lambda: get_rendition_executor().submit(generate_renditions, model, pk, prepared)
+    )
+
+
+def remove_renditions(instance, fields):
+    """
+    Quita de image_renditions en la base de datos las versiones de fields
+
+    Se relee la fila con bloqueo: las versiones de otros campos que un
+    thread de get_rendition_executor() guardó mientras tanto se conservan
+    (guardar image_renditions desde la instancia las perdería).
+    
+    Returns:
+        list: Entradas quitadas (para encolar sus archivos)
+    """
+    if not fields:
+        return []
+    
+    from django.db import transaction
+    
+    model = type(instance)
+    # Sin savepoint propio: normalmente corre dentro del atomic del update
+    with transaction.atomic(savepoint=False):
+        current = (
+            model.objects.select_for_update()
+            .filter(pk=instance.pk)
+            .values_list('image_renditions', flat=True)
+            .first()
+        )
+        renditions = dict(current or {})
+        removed = [renditions.pop(field) for field in fields if renditions.get(field)]
+        if removed:
+            model.objects.filter(pk=instance.pk).update(image_renditions=renditions)
+    instance.image_renditions = renditions
+    return removed
+
+
+def release_replaced_images(instance, replaced):
+    """
+    Quita las versiones de los campos reemplazados y, al confirmar la
+    transacción, libera las imágenes anteriores y encola las versiones que
+    ya nadie usa
+
+    Llamar dentro de la transacción del update, después de guardar: si la
+    subida de una imagen nueva o el save fallan, las anteriores conservan
+    su referencia.
+
+    Args:
+        instance: Instancia ya guardada con las imágenes nuevas
+        replaced (dict): {campo: URL anterior ('' si no había o no cambió)}
+    """
+    if not replaced:
+        return
+    
+    from django.db import transaction
+    from core.utils.s3_utils import S3Handler
+    
+    entries = remove_renditions(instance, list(replaced))
+    old_urls = [url for url in replaced.values() if url]
+    
+    def release():
+        handler = S3Handler()
+        # Primero los originales: las versiones solo se encolan si su
+        # original quedó sin referencias
+        handler.release_files(old_urls, reason='image_replaced')
+        handler.schedule_deletion(
+            [handler.get_key_from_url(url) for url in unreferenced_rendition_urls(handler, entries)],
+            reason='renditions'
+        )
+    
+    transaction.on_commit(release)
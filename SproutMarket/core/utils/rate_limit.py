@@ -0,0 +1,59 @@
+# core/utils/rate_limit.py
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe para limitar la tasa de llamadas a APIs externas
+
+    Args:
+        rate (float): Tokens que se reponen por segundo
+        capacity (float, optional): Ráfaga máxima; por defecto igual a rate
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Consume tokens, esperando lo necesario para respetar la tasa
+
+        Si se piden más tokens que la capacidad, el bucket queda en negativo
+        y las siguientes llamadas esperan proporcionalmente.
+
+        Args:
+            tokens (int): Tokens a consumir
+            timeout (float, optional): Espera máxima en segundos
+
+        Returns:
+            bool: True si se consumieron los tokens, False si venció el timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        needed = min(tokens, self.capacity)
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return True
+                wait = (needed - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
@@ -1,24 +1,97 @@
 # core/utils/s3_utils.py
 
-import boto3
-import uuid
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from django.conf import settings
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 import mimetypes
 
+from .aws_clients import get_client
+
+logger = logging.getLogger(__name__)
+
+
+class S3UploadError(Exception):
+    """Error al subir uno o más archivos a S3"""
+    pass
+
+
+def file_sha256(file):
+    """
+    SHA-256 del archivo
+    
+    Usa el hash calculado durante la recepción (core/upload_handlers.py);
+    si no existe, lo calcula leyendo el archivo por chunks.
+    """
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    
+    sha256 = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(1024 * 1024), b''):
+        sha256.update(chunk)
+    file.seek(0)
+    file.sha256 = sha256.hexdigest()
+    return file.sha256
+
+
+# Multipart para archivos grandes: partes de 8 MB subidas en paralelo
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def get_upload_executor():
+    """
+    Pool de threads compartido por el proceso para subidas a S3
+    
+    Es acotado (S3_UPLOAD_MAX_WORKERS) para que muchas requests simultáneas
+    no abran más conexiones que las del pool del cliente S3.
+    """
+    global _upload_executor
+    if _upload_executor is None:
+        with _upload_executor_lock:
+            if _upload_executor is None:
+                _upload_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'S3_UPLOAD_MAX_WORKERS', 8),
+                    thread_name_prefix='s3-upload'
+                )
+    return _upload_executor
+
 
 class S3Handler:
     """Clase para manejar operaciones con S3"""
     
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
+        # Cliente compartido por el proceso (ver core/utils/aws_clients.py)
+        self.s3_client = get_client('s3')
         self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
     
+    @property
+    def base_url(self):
+        """URL base pública del bucket (o del endpoint local si está configurado)"""
+        endpoint_url = getattr(settings, 'AWS_ENDPOINT_URL', '')
+        if endpoint_url:
+            return f"{endpoint_url.rstrip('/')}/{self.bucket_name}/"
+        return f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/"
+    
+    def get_public_url(self, key):
+        """Construye la URL pública de un objeto"""
+        return f"{self.base_url}{key}"
+    
+    def get_key_from_url(self, file_url):
+        """Extrae el key de S3 a partir de su URL pública"""
+        return str(file_url).split(self.base_url)[-1]
+    
     def upload_file(self, file, folder='uploads'):
         """
         Sube un archivo a S3 y retorna la URL pública
@@ -31,33 +104,125 @@ class S3Handler:
             str: URL pública del archivo subido
         """
         try:
-            # Generar nombre único
-            extension = file.name.split('.')[-1]
-            file_name = f"{folder}/{uuid.uuid4()}.{extension}"
-            
-            # Detectar content type
-            content_type, _ = mimetypes.guess_type(file.name)
-            if not content_type:
-                content_type = 'application/octet-stream'
-            
-            # Subir archivo
-            self.s3_client.upload_fileobj(
-                file,
-                self.bucket_name,
-                file_name,
-                ExtraArgs={
-                    'ContentType': content_type,
-                    'ACL': 'public-read'
+            return self.store_file(file, folder)
+        except ClientError as e:
+            logger.error(f"Error uploading to S3: {e}", extra={'s3_folder': folder})
+            return None
+    
+    def build_key(self, file, folder='uploads'):
+        """
+        Key direccionado por contenido: mismo archivo, mismo key
+        
+        Returns:
+            tuple: (key, sha256, content_type)
+        """
+        extension = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else 'bin'
+        if extension == 'jpeg':
+            extension = 'jpg'
+        
+        # Detectar content type
+        content_type, _ = mimetypes.guess_type(file.name)
+        if not content_type:
+            content_type = 'application/octet-stream'
+        
+        sha256 = file_sha256(file)
+        return f"{folder}/{sha256}.{extension}", sha256, content_type
+    
+    def put_file(self, file, folder='uploads', key=None, content_type=None):
+        """
+        Sube un archivo (multipart si es grande) y retorna su URL pública
+        
+        Solo hace la operación en S3 (sin DB, apto para threads) y propaga
+        los errores. Para subir con deduplicación usar store_file.
+        """
+        if key is None:
+            key, _, content_type = self.build_key(file, folder)
+        
+        file.seek(0)
+        self.s3_client.upload_fileobj(
+            file,
+            self.bucket_name,
+            key,
+            ExtraArgs={
+                'ContentType': content_type or 'application/octet-stream',
+                'ACL': 'public-read',
+                # El contenido de un key nunca cambia
+                'CacheControl': 'public, max-age=31536000, immutable'
+            },
+            Config=TRANSFER_CONFIG
+        )
+        
+        # Construir URL pública
+        return self.get_public_url(key)
+    
+    def store_file(self, file, folder='uploads'):
+        """
+        Sube un archivo con deduplicación: si el mismo contenido ya está en
+        el bucket solo se registra una referencia más (sin subir bytes)
+        
+        Returns:
+            str: URL pública del objeto
+        """
+        from core.models import StoredObject
+        
+        key, sha256, content_type = self.build_key(file, folder)
+        if not StoredObject.is_referenced(key):
+            self.put_file(file, folder, key=key, content_type=content_type)
+        StoredObject.acquire(key, sha256, size=file.size, content_type=content_type)
+        return self.get_public_url(key)
+    
+    def release_files(self, file_urls, reason='released'):
+        """
+        Quita una referencia a cada archivo y encola para el GC los que
+        quedan sin referencias (o que no están registrados, subidas anteriores)
+        
+        La eliminación real la hace el comando gc_images por lotes.
+        """
+        from core.models import StoredObject
+        
+        to_delete = []
+        for url in file_urls:
+            if not url:
+                continue
+            key = self.get_key_from_url(url)
+            if not StoredObject.release(key):
+                to_delete.append(key)
+        self.schedule_deletion(to_delete, reason=reason)
+    
+    def schedule_deletion(self, keys, reason=''):
+        """Encola keys en la tabla de eliminaciones pendientes"""
+        from core.models import PendingDeletion
+        PendingDeletion.enqueue(keys, reason=reason)
+    
+    def delete_files(self, file_urls):
+        """
+        Elimina varios archivos con una sola llamada a delete_objects
+        
+        Returns:
+            bool: True si todos se eliminaron
+        """
+        keys = [self.get_key_from_url(url) for url in file_urls if url]
+        if not keys:
+            return True
+        
+        try:
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={
+                    'Objects': [{'Key': key} for key in keys],
+                    'Quiet': True
                 }
             )
-            
-            # Construir URL pública
-            url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{file_name}"
-            return url
-            
         except ClientError as e:
-            print(f"Error uploading to S3: {e}")
-            return None
+            logger.error(f"Error deleting from S3: {e}", extra={'s3_keys': len(keys)})
+            return False
+        
+        for error in response.get('Errors', []):
+            logger.error(
+                f"Error deleting from S3: {error['Key']} {error['Message']}",
+                extra={'s3_key': error['Key'], 'aws_error_code': error.get('Code', '')}
+            )
+        return not response.get('Errors')
     
     def delete_file(self, file_url):
         """
@@ -71,7 +236,7 @@ class S3Handler:
         """
         try:
             # Extraer key del URL
-            key = file_url.split(f"{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/")[-1]
+            key = self.get_key_from_url(file_url)
             
             self.s3_client.delete_object(
                 Bucket=self.bucket_name,
@@ -80,7 +245,7 @@ class S3Handler:
             return True
             
         except ClientError as e:
-            print(f"Error deleting from S3: {e}")
+            logger.error(f"Error deleting from S3: {e}", extra={'s3_url': file_url})
             return False
     
     def upload_multiple(self, files, folder='uploads'):
@@ -102,6 +267,104 @@ class S3Handler:
         return urls
 
 
+class S3UploadManager:
+    """
+    Sube en paralelo las imágenes de una request y deshace las subidas
+    si algo falla después
+    
+    Uso:
+        with S3UploadManager(folder='products') as uploads:
+            image1_url, image2_url, image3_url = uploads.upload_all([image1, image2, image3])
+            Product.objects.create(...)  # si falla, se eliminan las imágenes subidas
+    """
+    
+    def __init__(self, folder='uploads', handler=None):
+        self.folder = folder
+        self.handler = handler or S3Handler()
+        self.uploaded_urls = []
+    
+    def upload_all(self, files):
+        """
+        Sube todos los archivos a la vez en el pool compartido
+        
+        Los archivos cuyo contenido ya existe en el bucket no se vuelven a
+        subir; solo se registra la referencia.
+        
+        Args:
+            files (list): Archivos (None se conserva como None)
+        
+        Returns:
+            list: URLs en el mismo orden que files
+        
+        Raises:
+            S3UploadError: Si falla alguna subida (las exitosas se eliminan)
+        """
+        from core.models import StoredObject
+        
+        # Keys por contenido (el hash ya viene calculado del upload handler)
+        entries = [self.handler.build_key(file, self.folder) if file else None for file in files]
+        keys = {entry[0] for entry in entries if entry}
+        existing = set(
+            StoredObject.objects
+            .filter(key__in=keys, ref_count__gt=0)
+            .values_list('key', flat=True)
+        )
+        
+        # Una subida por key distinto que aún no está en el bucket
+        executor = get_upload_executor()
+        futures = {}
+        for file, entry in zip(files, entries):
+            if entry is None or entry[0] in existing or entry[0] in futures:
+                continue
+            key, _, content_type = entry
+            futures[key] = executor.submit(
+                self.handler.put_file, file, self.folder, key, content_type
+            )
+        wait(futures.values())
+        
+        errors = []
+        for future in futures.values():
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+        
+        if errors:
+            # Encolar lo que sí se subió (aún sin referencias registradas);
+            # el GC no lo elimina si otra request lo registró mientras tanto
+            self.handler.schedule_deletion(
+                [key for key, future in futures.items() if future.exception() is None],
+                reason='upload_rollback'
+            )
+            raise S3UploadError(str(errors[0])) from errors[0]
+        
+        urls = []
+        for file, entry in zip(files, entries):
+            if entry is None:
+                urls.append(None)
+                continue
+            key, sha256, content_type = entry
+            StoredObject.acquire(key, sha256, size=file.size, content_type=content_type)
+            url = self.handler.get_public_url(key)
+            urls.append(url)
+            self.uploaded_urls.append(url)
+        return urls
+    
+    def rollback(self):
+        """Libera las referencias registradas por este manager"""
+        if self.uploaded_urls:
+            self.handler.release_files(self.uploaded_urls, reason='upload_rollback')
+            self.uploaded_urls = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.rollback()
+        return False
+
+
 # Funciones helper para usar en views
 def upload_product_image(image_file):
     """Sube imagen de producto a S3"""
@@ -122,6 +385,9 @@ def upload_exchange_image(image_file):
 
 
 def delete_image(image_url):
-    """Elimina imagen de S3"""
+    """
+    Libera una referencia a la imagen; cuando ningún otro registro la usa
+    se encola para que gc_images la elimine de S3
+    """
     handler = S3Handler()
-    return handler.delete_file(image_url)
\ No newline at end of file
+    handler.release_files([image_url], reason='image_replaced')
\ No newline at end of file
@@ -1,10 +1,17 @@
 # core/views.py
 
+import hmac
+
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.authtoken.models import Token
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+
+from core import auth_cache, metrics
 
 from .serializers import (
     UserRegistrationSerializer,
@@ -13,7 +20,9 @@ from .serializers import (
     UserProfileSerializer,
     UserProfileUpdateSerializer,
     PasswordResetRequestSerializer,
-    PasswordResetConfirmSerializer
+    PasswordResetConfirmSerializer,
+    DirectUploadRequestSerializer,
+    DirectUploadFinalizeSerializer
 )
 
 User = get_user_model()
@@ -75,8 +84,8 @@ class UserLoginView(APIView):
             user = serializer.validated_data['user']
             tokens = serializer.validated_data['tokens']
             
-            # Crear o obtener token de Django REST Framework (opcional)
-            django_token, _ = Token.objects.get_or_create(user=user)
+            # Token de Django REST Framework (opcional), obtenido en el login
+            django_token = serializer.validated_data['django_token']
             
             return Response({
                 'message': 'Login exitoso',
@@ -159,9 +168,125 @@ class UserLogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        # Eliminar token de Django
-        request.user.auth_token.delete()
+        # Eliminar token de Django (y su entrada en el cache de autenticación)
+        tokens = Token.objects.filter(user=request.user)
+        for key in tokens.values_list('key', flat=True):
+            auth_cache.invalidate_token(key)
+        tokens.delete()
         
         return Response({
             'message': 'Logout exitoso'
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+
+class DirectUploadPresignView(APIView):
+    """
+    POST /api/uploads/presign/
+    Firma una subida directa al almacenamiento (la imagen no pasa por Django)
+    
+    Body: {"target": "product", "content_type": "image/jpeg"}
+    Respuesta: url y fields del formulario POST, key, max_size, expires_in
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = DirectUploadRequestSerializer(
+            data=request.data,
+            context={'request': request}
+        )
+        
+        if serializer.is_valid():
+            return Response(serializer.save(), status=status.HTTP_201_CREATED)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class DirectUploadFinalizeView(APIView):
+    """
+    POST /api/uploads/finalize/
+    Asigna una imagen ya subida a un producto, intercambio u oferta
+    
+    Body: {"target": "product", "object_id": 1, "field": "image1", "key": "..."}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = DirectUploadFinalizeSerializer(
+            data=request.data,
+            context={'request': request}
+        )
+        
+        if serializer.is_valid():
+            instance = serializer.save()
+            field = serializer.validated_data['field']
+            return Response({
+                'message': 'Imagen asignada exitosamente',
+                'field': field,
+                'url': str(getattr(instance, field))
+            }, status=status.HTTP_200_OK)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class LocalDirectUploadView(APIView):
+    """
+    POST /api/uploads/local/
+    Stand-in local del presigned POST de S3 (LocalDirectUploadBackend)
+    
+    La autorización es la política firmada del formulario, como en S3.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        from django.core import signing
+        from .utils.direct_uploads import get_backend, LocalDirectUploadBackend
+        
+        backend = get_backend()
+        if not isinstance(backend, LocalDirectUploadBackend):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            policy = backend.load_policy(request.data.get('policy', ''))
+        except signing.BadSignature:
+            return Response({'error': 'Política inválida o expirada'}, status=status.HTTP_403_FORBIDDEN)
+        
+        file = request.FILES.get('file')
+        if (
+            file is None
+            or request.data.get('key') != policy['key']
+            or request.data.get('Content-Type') != policy['content_type']
+            or file.size > policy['max_size']
+        ):
+            return Response({'error': 'El archivo no cumple la política'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        backend.save(policy['key'], file)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsView(APIView):
+    """
+    GET /metrics
+    Métricas en formato de texto de Prometheus (suma de todos los workers)
+    
+    Con METRICS_TOKEN configurado requiere 'Authorization: Bearer <token>'.
+    Sin token solo responde con DEBUG o a las IPs de METRICS_ALLOWED_IPS.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    
+    def get(self, request):
+        if not metrics.is_enabled():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        
+        token = settings.METRICS_TOKEN
+        if token:
+            if not hmac.compare_digest(
+                request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+            ):
+                return Response(status=status.HTTP_401_UNAUTHORIZED)
+        elif not settings.DEBUG and request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        
+        return HttpResponse(metrics.generate_latest(), content_type=metrics.CONTENT_TYPE)
@@ -1,13 +1,15 @@
 # exchanges/admin.py
 
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
+from core.utils.admin import OptimizedAdminMixin
 from .models import Exchange, ExchangeOffer
 
 
 @admin.register(Exchange)
-class ExchangeAdmin(admin.ModelAdmin):
+class ExchangeAdmin(OptimizedAdminMixin, admin.ModelAdmin):
     """Admin para intercambios"""
     
     list_display = [
@@ -15,10 +17,10 @@ class ExchangeAdmin(admin.ModelAdmin):
         'pending_offers', 'image_thumbnail', 'created_at'
     ]
     list_filter = ['status', 'created_at']
-    search_fields = [
-        'plant_common_name', 'plant_scientific_name', 
-        'user__email', 'location'
-    ]
+    list_select_related = ['user']
+    search_fields = ['plant_common_name', 'plant_scientific_name', 'location']
+    exact_search_fields = ['user__email']
+    prefix_search_fields = {'pi_': 'stripe_payment_id'}
     ordering = ['-created_at']
     
     fieldsets = (
@@ -54,14 +56,27 @@ class ExchangeAdmin(admin.ModelAdmin):
         return '-'
     image_thumbnail.short_description = 'Imagen'
     
+    def get_queryset(self, request):
+        """
+        Ofertas pendientes como subconsulta correlacionada: solo se evalúa
+        para las filas de la página (usa el índice exchange, status)
+        """
+        pending = ExchangeOffer.objects.filter(
+            exchange=OuterRef('pk'),
+            status='pending'
+        ).order_by().values('exchange').annotate(total=Count('id')).values('total')
+        return super().get_queryset(request).annotate(
+            pending_offers_total=Subquery(pending, output_field=IntegerField())
+        )
+    
     def pending_offers(self, obj):
         """Muestra el número de ofertas pendientes"""
-        return f"{obj.pending_offers_count}/4"
+        return f"{obj.pending_offers_total or 0}/4"
     pending_offers.short_description = 'Ofertas pendientes'
 
 
 @admin.register(ExchangeOffer)
-class ExchangeOfferAdmin(admin.ModelAdmin):
+class ExchangeOfferAdmin(OptimizedAdminMixin, admin.ModelAdmin):
     """Admin para ofertas de intercambio"""
     
     list_display = [
@@ -69,10 +84,9 @@ class ExchangeOfferAdmin(admin.ModelAdmin):
         'status', 'image_thumbnail', 'created_at'
     ]
     list_filter = ['status', 'created_at']
-    search_fields = [
-        'plant_common_name', 'plant_scientific_name',
-        'offeror__email', 'exchange__plant_common_name'
-    ]
+    list_select_related = ['exchange__user', 'offeror']  # Exchange.__str__ usa user.email
+    search_fields = ['plant_common_name', 'plant_scientific_name']
+    exact_search_fields = ['offeror__email']
     ordering = ['-created_at']
     
     fieldsets = (
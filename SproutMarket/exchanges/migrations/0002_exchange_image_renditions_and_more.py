@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exchanges', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exchange',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='URLs de las versiones thumb/medium/full (WebP y JPEG) por campo de imagen', verbose_name='versiones de imágenes'),
+        ),
+        migrations.AddField(
+            model_name='exchangeoffer',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='URLs de las versiones thumb/medium/full (WebP y JPEG) por campo de imagen', verbose_name='versiones de imágenes'),
+        ),
+    ]
@@ -91,6 +91,12 @@ class Exchange(models.Model):
         null=True,
         help_text='Tercera imagen de la planta'
     )
+    image_renditions = models.JSONField(
+        _('versiones de imágenes'),
+        default=dict,
+        blank=True,
+        help_text='URLs de las versiones thumb/medium/full (WebP y JPEG) por campo de imagen'
+    )
     
     # Pago y estado
     stripe_payment_id = models.CharField(
@@ -224,6 +230,12 @@ class ExchangeOffer(models.Model):
         blank=True,
         null=True
     )
+    image_renditions = models.JSONField(
+        _('versiones de imágenes'),
+        default=dict,
+        blank=True,
+        help_text='URLs de las versiones thumb/medium/full (WebP y JPEG) por campo de imagen'
+    )
     
     # Estado
     status = models.CharField(
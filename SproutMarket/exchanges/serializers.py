@@ -3,9 +3,12 @@
 from rest_framework import serializers
 from decimal import Decimal
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from .models import Exchange, ExchangeOffer
 from core.serializers import UserProfileSerializer
-from core.utils.s3_utils import upload_exchange_image, delete_image
+from core.utils.s3_utils import upload_exchange_image, S3UploadManager, S3UploadError
+from core.utils.direct_uploads import resolve_image_keys, DirectUploadError
+from core.utils.images import IMAGE_FIELDS, get_rendition_url, get_srcset, schedule_renditions, release_replaced_images
 
 User = get_user_model()
 
@@ -32,10 +35,8 @@ class ExchangeListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_main_image(self, obj):
-        """Retorna la primera imagen disponible"""
-        if obj.image1:
-            return obj.image1.url if hasattr(obj.image1, 'url') else obj.image1
-        return None
+        """Retorna la miniatura de la primera imagen (o la original si aún no se generó)"""
+        return get_rendition_url(obj, 'image1', 'thumb')
     
     def get_can_receive_offers(self, obj):
         """Indica si puede recibir más ofertas"""
@@ -49,12 +50,13 @@ class ExchangeOfferListSerializer(serializers.ModelSerializer):
     
     offeror = UserProfileSerializer(read_only=True)
     images = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
     
     class Meta:
         model = ExchangeOffer
         fields = [
             'id', 'offeror', 'plant_common_name', 'plant_scientific_name',
-            'description', 'width_cm', 'height_cm', 'images',
+            'description', 'width_cm', 'height_cm', 'images', 'image_srcsets',
             'status', 'created_at'
         ]
         read_only_fields = ['id', 'status', 'created_at']
@@ -67,6 +69,14 @@ class ExchangeOfferListSerializer(serializers.ModelSerializer):
             if img:
                 images.append(img.url if hasattr(img, 'url') else img)
         return images
+    
+    def get_image_srcsets(self, obj):
+        """srcset (WebP y JPEG) de cada imagen, en el mismo orden que images"""
+        return [
+            get_srcset(obj, img_field)
+            for img_field in IMAGE_FIELDS
+            if getattr(obj, img_field)
+        ]
 
 
 class ExchangeDetailSerializer(serializers.ModelSerializer):
@@ -77,6 +87,7 @@ class ExchangeDetailSerializer(serializers.ModelSerializer):
     
     user = UserProfileSerializer(read_only=True)
     images = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
     offers = serializers.SerializerMethodField()
     pending_offers_count = serializers.ReadOnlyField()
     can_receive_offers = serializers.SerializerMethodField()
@@ -87,7 +98,7 @@ class ExchangeDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'plant_common_name', 'plant_scientific_name',
             'description', 'width_cm', 'height_cm', 'location',
-            'images', 'stripe_payment_id', 'status',
+            'images', 'image_srcsets', 'stripe_payment_id', 'status',
             'pending_offers_count', 'can_receive_offers', 'is_owner',
             'offers', 'created_at', 'updated_at'
         ]
@@ -102,6 +113,14 @@ class ExchangeDetailSerializer(serializers.ModelSerializer):
                 images.append(img.url if hasattr(img, 'url') else img)
         return images
     
+    def get_image_srcsets(self, obj):
+        """srcset (WebP y JPEG) de cada imagen, en el mismo orden que images"""
+        return [
+            get_srcset(obj, img_field)
+            for img_field in IMAGE_FIELDS
+            if getattr(obj, img_field)
+        ]
+    
     def get_offers(self, obj):
         """Retorna las ofertas solo si el usuario es el owner"""
         request = self.context.get('request')
@@ -130,10 +149,20 @@ class ExchangeCreateSerializer(serializers.ModelSerializer):
     """
     
     # Imágenes como archivos
-    image1 = serializers.ImageField(required=True, help_text='Primera imagen (requerida)')
+    image1 = serializers.ImageField(required=False, help_text='Primera imagen (requerida si no se envía image_keys)')
     image2 = serializers.ImageField(required=False, allow_null=True)
     image3 = serializers.ImageField(required=False, allow_null=True)
     
+    # Alternativa a los archivos: keys subidos con /api/uploads/presign/
+    image_keys = serializers.ListField(
+        child=serializers.CharField(max_length=500),
+        write_only=True,
+        required=False,
+        min_length=1,
+        max_length=3,
+        help_text='Keys de imágenes subidas directamente (en lugar de image1-3)'
+    )
+    
     # Payment Intent ID de Stripe
     stripe_payment_id = serializers.CharField(
         write_only=True,
@@ -145,7 +174,7 @@ class ExchangeCreateSerializer(serializers.ModelSerializer):
         fields = [
             'plant_common_name', 'plant_scientific_name', 'description',
             'width_cm', 'height_cm', 'location',
-            'image1', 'image2', 'image3', 'stripe_payment_id'
+            'image1', 'image2', 'image3', 'image_keys', 'stripe_payment_id'
         ]
     
     def validate_stripe_payment_id(self, value):
@@ -208,6 +237,20 @@ class ExchangeCreateSerializer(serializers.ModelSerializer):
                 'height_cm': 'El alto debe ser mayor a 0'
             })
         
+        # Imágenes: archivos o keys de subidas directas (verificados con HEAD)
+        image_keys = attrs.get('image_keys')
+        if image_keys:
+            try:
+                attrs['image_keys'] = resolve_image_keys(
+                    self.context['request'].user, 'exchange', image_keys
+                )
+            except DirectUploadError as e:
+                raise serializers.ValidationError({'image_keys': str(e)})
+        elif not attrs.get('image1'):
+            raise serializers.ValidationError({
+                'image1': 'Se requiere image1 o image_keys'
+            })
+        
         return attrs
     
     def create(self, validated_data):
@@ -215,40 +258,46 @@ class ExchangeCreateSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         
         # Extraer imágenes
-        image1 = validated_data.pop('image1')
+        image1 = validated_data.pop('image1', None)
         image2 = validated_data.pop('image2', None)
         image3 = validated_data.pop('image3', None)
+        image_urls = validated_data.pop('image_keys', None)
         
-        # Crear exchange
-        exchange = Exchange.objects.create(
-            user=user,
-            **validated_data
-        )
-        
-        # Subir imágenes a S3
+        # Subir las imágenes a S3 en paralelo y después crear la publicación;
+        # si algo falla, el manager elimina las imágenes subidas
         try:
-            exchange.image1 = upload_exchange_image(image1)
-            
-            if image2:
-                exchange.image2 = upload_exchange_image(image2)
-            
-            if image3:
-                exchange.image3 = upload_exchange_image(image3)
-            
-            exchange.save()
-            
-            # Registrar transacción
-            from payments.models import Transaction
-            Transaction.record_exchange_publication(
-                user=user,
-                exchange=exchange,
-                amount=Decimal('90.00'),
-                stripe_id=validated_data['stripe_payment_id']
-            )
-            
-        except Exception as e:
-            # Si falla el upload, eliminar exchange
-            exchange.delete()
+            with S3UploadManager(folder='exchanges') as uploads:
+                if image_urls:
+                    # Ya están en el almacenamiento (subida directa)
+                    image1_url, image2_url, image3_url = image_urls
+                else:
+                    image1_url, image2_url, image3_url = uploads.upload_all([image1, image2, image3])
+                
+                with transaction.atomic():
+                    exchange = Exchange.objects.create(
+                        user=user,
+                        image1=image1_url,
+                        image2=image2_url,
+                        image3=image3_url,
+                        **validated_data
+                    )
+                    
+                    # Registrar transacción
+                    from payments.models import Transaction
+                    Transaction.record_exchange_publication(
+                        user=user,
+                        exchange=exchange,
+                        amount=Decimal('90.00'),
+                        stripe_id=validated_data['stripe_payment_id']
+                    )
+                    
+                    # Miniaturas y versiones WebP/JPEG en segundo plano
+                    schedule_renditions(exchange, {
+                        'image1': (image1_url, image1),
+                        'image2': (image2_url, image2),
+                        'image3': (image3_url, image3),
+                    })
+        except S3UploadError as e:
             raise serializers.ValidationError({
                 'images': f'Error al subir imágenes: {str(e)}'
             })
@@ -297,44 +346,51 @@ class ExchangeUpdateSerializer(serializers.ModelSerializer):
         return attrs
     
     def update(self, instance, validated_data):
-        """Actualizar exchange y manejar imágenes"""
-        
-        # Manejar actualización de imágenes
-        for img_field in ['image1', 'image2', 'image3']:
-            if img_field in validated_data:
-                new_image = validated_data.pop(img_field)
-                
-                if new_image:
-                    # Eliminar imagen anterior si existe
+        """
+        Actualizar exchange y manejar imágenes
+        
+        Todo en una transacción: las imágenes anteriores se liberan solo
+        después de subir las nuevas y guardar (ver release_replaced_images)
+        """
+        with transaction.atomic():
+            # Manejar actualización de imágenes
+            new_images = {}
+            replaced = {}
+            for img_field in ['image1', 'image2', 'image3']:
+                if img_field in validated_data:
+                    new_image = validated_data.pop(img_field)
                     old_image = getattr(instance, img_field)
-                    if old_image:
-                        try:
-                            delete_image(old_image)
-                        except:
-                            pass
                     
-                    # Subir nueva imagen
-                    try:
-                        setattr(instance, img_field, upload_exchange_image(new_image))
-                    except Exception as e:
-                        raise serializers.ValidationError({
-                            img_field: f'Error al subir imagen: {str(e)}'
-                        })
-                elif new_image is None:
-                    # Eliminar imagen si se envió null
-                    old_image = getattr(instance, img_field)
-                    if old_image:
+                    if new_image:
+                        # Subir nueva imagen (si falla, la anterior sigue intacta)
                         try:
-                            delete_image(old_image)
-                        except:
-                            pass
-                    setattr(instance, img_field, None)
-        
-        # Actualizar otros campos
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
+                            url = upload_exchange_image(new_image)
+                        except Exception as e:
+                            raise serializers.ValidationError({
+                                img_field: f'Error al subir imagen: {str(e)}'
+                            })
+                        setattr(instance, img_field, url)
+                        new_images[img_field] = (str(url or ''), new_image)
+                    elif new_image is None:
+                        # Eliminar imagen si se envió null
+                        setattr(instance, img_field, None)
+                    else:
+                        continue
+                    replaced[img_field] = str(old_image) if old_image else ''
+            
+            # Actualizar otros campos
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            
+            # Solo los campos recibidos: image_renditions lo escribe el pool de
+            # versiones y un save() completo podría pisar lo que guardó
+            instance.save(update_fields=[*replaced, *validated_data, 'updated_at'])
+            
+            # Imágenes anteriores (y sus versiones) al GC después del commit
+            release_replaced_images(instance, replaced)
+            
+            # Generar versiones de las imágenes nuevas en segundo plano
+            schedule_renditions(instance, new_images)
         return instance
 
 
@@ -347,16 +403,26 @@ class ExchangeOfferCreateSerializer(serializers.ModelSerializer):
     exchange_id = serializers.IntegerField(write_only=True)
     
     # Imágenes como archivos
-    image1 = serializers.ImageField(required=True, help_text='Primera imagen (requerida)')
+    image1 = serializers.ImageField(required=False, help_text='Primera imagen (requerida si no se envía image_keys)')
     image2 = serializers.ImageField(required=False, allow_null=True)
     image3 = serializers.ImageField(required=False, allow_null=True)
     
+    # Alternativa a los archivos: keys subidos con /api/uploads/presign/
+    image_keys = serializers.ListField(
+        child=serializers.CharField(max_length=500),
+        write_only=True,
+        required=False,
+        min_length=1,
+        max_length=3,
+        help_text='Keys de imágenes subidas directamente (en lugar de image1-3)'
+    )
+    
     class Meta:
         model = ExchangeOffer
         fields = [
             'exchange_id', 'plant_common_name', 'plant_scientific_name',
             'description', 'width_cm', 'height_cm',
-            'image1', 'image2', 'image3'
+            'image1', 'image2', 'image3', 'image_keys'
         ]
     
     def validate_exchange_id(self, value):
@@ -408,6 +474,20 @@ class ExchangeOfferCreateSerializer(serializers.ModelSerializer):
                 'height_cm': 'El alto debe ser mayor a 0'
             })
         
+        # Imágenes: archivos o keys de subidas directas (verificados con HEAD)
+        image_keys = attrs.get('image_keys')
+        if image_keys:
+            try:
+                attrs['image_keys'] = resolve_image_keys(
+                    self.context['request'].user, 'offer', image_keys
+                )
+            except DirectUploadError as e:
+                raise serializers.ValidationError({'image_keys': str(e)})
+        elif not attrs.get('image1'):
+            raise serializers.ValidationError({
+                'image1': 'Se requiere image1 o image_keys'
+            })
+        
         return attrs
     
     def create(self, validated_data):
@@ -417,28 +497,35 @@ class ExchangeOfferCreateSerializer(serializers.ModelSerializer):
         exchange = Exchange.objects.get(id=exchange_id)
         
         # Extraer imágenes
-        image1 = validated_data.pop('image1')
+        image1 = validated_data.pop('image1', None)
         image2 = validated_data.pop('image2', None)
         image3 = validated_data.pop('image3', None)
+        image_urls = validated_data.pop('image_keys', None)
         
-        # Crear oferta
-        offer = ExchangeOffer.objects.create(
-            exchange=exchange,
-            offeror=user,
-            **validated_data
-        )
-        
-        # Subir imágenes a S3
+        # Subir las imágenes a S3 en paralelo y después crear la oferta
         try:
-            offer.image1 = upload_exchange_image(image1)
-            
-            if image2:
-                offer.image2 = upload_exchange_image(image2)
-            
-            if image3:
-                offer.image3 = upload_exchange_image(image3)
-            
-            offer.save()
+            with S3UploadManager(folder='exchanges') as uploads:
+                if image_urls:
+                    # Ya están en el almacenamiento (subida directa)
+                    image1_url, image2_url, image3_url = image_urls
+                else:
+                    image1_url, image2_url, image3_url = uploads.upload_all([image1, image2, image3])
+                
+                offer = ExchangeOffer.objects.create(
+                    exchange=exchange,
+                    offeror=user,
+                    image1=image1_url,
+                    image2=image2_url,
+                    image3=image3_url,
+                    **validated_data
+                )
+                
+                # Miniaturas y versiones WebP/JPEG en segundo plano
+                schedule_renditions(offer, {
+                    'image1': (image1_url, image1),
+                    'image2': (image2_url, image2),
+                    'image3': (image3_url, image3),
+                })
             
             # TODO: Enviar notificación al publisher (Día 6-7)
             # from notifications.models import Notification
@@ -450,9 +537,7 @@ class ExchangeOfferCreateSerializer(serializers.ModelSerializer):
             #     metadata={'exchange_id': exchange.id, 'offer_id': offer.id}
             # )
             
-        except Exception as e:
-            # Si falla el upload, eliminar oferta
-            offer.delete()
+        except S3UploadError as e:
             raise serializers.ValidationError({
                 'images': f'Error al subir imágenes: {str(e)}'
             })
@@ -507,11 +592,11 @@ class ExchangeOfferResponseSerializer(serializers.Serializer):
         if action == 'accept':
             # Aceptar oferta
             offer.status = 'accepted'
-            offer.save()
+            offer.save(update_fields=['status', 'updated_at'])
             
             # Marcar exchange como intercambiado
             exchange.status = 'exchanged'
-            exchange.save()
+            exchange.save(update_fields=['status', 'updated_at'])
             
             # Rechazar automáticamente todas las demás ofertas pendientes
             other_offers = exchange.offers.filter(status='pending').exclude(id=offer.id)
@@ -544,7 +629,7 @@ class ExchangeOfferResponseSerializer(serializers.Serializer):
         else:  # reject
             # Rechazar oferta
             offer.status = 'rejected'
-            offer.save()
+            offer.save(update_fields=['status', 'updated_at'])
             
             # TODO: Notificar al offeror (rechazado)
             
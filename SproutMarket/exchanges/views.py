@@ -9,6 +9,8 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 
+from analytics.buffer import track
+from core.db_router import ReplicaReadMixin
 from .models import Exchange, ExchangeOffer
 from .serializers import (
     ExchangeListSerializer,
@@ -24,7 +26,7 @@ from .serializers import (
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
-class ExchangeViewSet(viewsets.ModelViewSet):
+class ExchangeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet para publicaciones de intercambio
     
@@ -124,7 +126,7 @@ class ExchangeViewSet(viewsets.ModelViewSet):
         
         # Marcar como cancelado
         instance.status = 'canceled'
-        instance.save()
+        instance.save(update_fields=['status', 'updated_at'])
     
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def create_payment_intent(self, request):
@@ -204,7 +206,7 @@ class ExchangeViewSet(viewsets.ModelViewSet):
         
         if exchange.status == 'canceled':
             exchange.status = 'active'
-            exchange.save()
+            exchange.save(update_fields=['status', 'updated_at'])
             
             return Response({
                 'message': 'Intercambio reactivado exitosamente',
@@ -256,6 +258,7 @@ class ExchangeOfferViewSet(viewsets.ViewSet):
             )
         
         offer = serializer.save()
+        track('exchange_offer', request=request, object_id=offer.exchange_id)
         
         return Response({
             'message': 'Oferta creada exitosamente',
@@ -3,7 +3,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from .models import Notification
+from .counters import invalidate_unread_counts
+from .models import Notification, PushDevice
 
 
 @admin.register(Notification)
@@ -33,10 +34,10 @@ class NotificationAdmin(admin.ModelAdmin):
             'fields': ('is_read', 'read_at')
         }),
         (_('Envío Email'), {
-            'fields': ('email_sent', 'email_sent_at')
+            'fields': ('email_sent', 'email_sent_at', 'email_pending', 'email_template')
         }),
         (_('Envío Push'), {
-            'fields': ('push_sent', 'push_sent_at')
+            'fields': ('push_pending', 'push_sent', 'push_sent_at', 'push_attempts', 'push_next_attempt_at')
         }),
         (_('Metadata'), {
             'fields': ('metadata',)
@@ -73,6 +74,19 @@ class NotificationAdmin(admin.ModelAdmin):
     
     def mark_as_unread(self, request, queryset):
         """Acción: marcar como no leídas"""
+        user_ids = list(queryset.values_list('user_id', flat=True).distinct())
         count = queryset.update(is_read=False, read_at=None)
+        invalidate_unread_counts(user_ids)
         self.message_user(request, f'{count} notificaciones marcadas como no leídas.')
-    mark_as_unread.short_description = 'Marcar como no leídas'
\ No newline at end of file
+    mark_as_unread.short_description = 'Marcar como no leídas'
+
+
+@admin.register(PushDevice)
+class PushDeviceAdmin(admin.ModelAdmin):
+    """Admin para dispositivos push"""
+    
+    list_display = ['id', 'user', 'platform', 'is_enabled', 'created_at']
+    list_filter = ['platform', 'is_enabled']
+    search_fields = ['user__email', 'endpoint_arn']
+    raw_id_fields = ['user']
+    readonly_fields = ['endpoint_arn', 'subscription_arn', 'created_at', 'updated_at']
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class NotificationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "notifications"
+
+    def ready(self):
+        from core.metrics import CallbackGauge
+        from notifications.models import Notification
+
+        # Cola del worker de push: COUNT sobre el índice parcial push_pending
+        CallbackGauge(
+            'sproutmarket_push_outbox_depth',
+            'Notificaciones push en cola para el worker',
+            lambda: Notification.objects.filter(push_pending=True).count(),
+        )
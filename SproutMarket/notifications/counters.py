@@ -0,0 +1,69 @@
+# notifications/counters.py
+
+"""
+Contador de notificaciones no leídas por usuario.
+
+El frontend consulta unread_count constantemente; en lugar de un COUNT(*)
+por request se mantiene el valor en cache y se ajusta al crear, leer o
+eliminar notificaciones. Si la llave no existe (cache vacío, expirado o
+reiniciado) se recalcula desde DB. El TTL fuerza una reconciliación
+periódica con DB aunque algún ajuste se haya perdido.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metrics import record_cache_lookup
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'NOTIFICATIONS_UNREAD_CACHE_TTL', 300)
+
+
+def count_unread_from_db(user_id):
+    """COUNT(*) de no leídas (usa el índice user, is_read)"""
+    from notifications.models import Notification
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user_id):
+    """Número de no leídas del usuario; cache con respaldo en DB"""
+    count = cache.get(_key(user_id))
+    record_cache_lookup('unread_count', count is not None)
+    if count is None:
+        count = count_unread_from_db(user_id)
+        # add() no pisa un valor que otro proceso haya ajustado mientras tanto
+        cache.add(_key(user_id), count, _timeout())
+    return max(count, 0)
+
+
+def set_unread_count(user_id, count):
+    cache.set(_key(user_id), count, _timeout())
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Suma delta al contador si está en cache; si no existe, no hace nada
+    (se recalculará desde DB en la siguiente lectura)
+    """
+    if not delta:
+        return
+    try:
+        value = cache.incr(_key(user_id), delta)
+    except ValueError:
+        return
+    if value < 0:
+        # Desfase con DB: descartar y recalcular en la siguiente lectura
+        invalidate_unread_count(user_id)
+
+
+def invalidate_unread_count(user_id):
+    cache.delete(_key(user_id))
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([_key(user_id) for user_id in set(user_ids)])
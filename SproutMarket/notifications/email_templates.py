@@ -0,0 +1,220 @@
+# notifications/email_templates.py
+
+"""
+Plantillas de los emails transaccionales de SproutMarket.
+
+Las mismas plantillas se registran en SES (comando sync_email_templates) para
+los envíos masivos con send_bulk_templated_email y se renderizan localmente
+para guardar el texto de la notificación en DB. Usan la sintaxis de
+Handlebars de SES: {{{variable}}} (sin escapar HTML).
+"""
+
+import re
+
+from django.conf import settings
+
+
+TEMPLATES = {
+    'purchase_confirmation': {
+        'subject': 'Confirmación de compra - Orden #{{{order_id}}}',
+        'text': """Hola {{{buyer_name}}},
+
+Tu orden ha sido confirmada exitosamente.
+
+DETALLES DE LA ORDEN:
+- Número de orden: #{{{order_id}}}
+- Total pagado: ${{{total_mxn}}} MXN
+- Productos: {{{items_count}}} artículo(s)
+
+INFORMACIÓN DE ENTREGA:
+- Nombre: {{{buyer_name}}}
+- Teléfono: {{{buyer_phone}}}
+- Dirección: {{{buyer_address}}}
+
+Los vendedores han sido notificados y se pondrán en contacto contigo para coordinar la entrega.
+
+Gracias por tu compra en SproutMarket.
+
+Saludos,
+Equipo SproutMarket""",
+    },
+    'sale_notification': {
+        'subject': '¡Nueva venta! - Orden #{{{order_id}}}',
+        'text': """Hola {{{seller_name}}},
+
+¡Felicidades! Has realizado una venta en SproutMarket.
+
+PRODUCTOS VENDIDOS:
+{{{products_list}}}
+
+GANANCIAS:
+- Subtotal: ${{{subtotal}}} MXN
+- Tu ganancia (90%): ${{{seller_earnings}}} MXN
+- Comisión plataforma (10%): ${{{commission}}} MXN
+
+INFORMACIÓN DEL COMPRADOR:
+- Nombre: {{{buyer_name}}}
+- Teléfono: {{{buyer_phone}}}
+- Dirección: {{{buyer_address}}}
+
+PRÓXIMOS PASOS:
+1. Contacta al comprador para coordinar la entrega
+2. Tus ganancias estarán disponibles en tu balance
+3. Podrás solicitar un retiro cuando lo desees
+
+Gracias por vender en SproutMarket.
+
+Saludos,
+Equipo SproutMarket""",
+    },
+    'exchange_offer': {
+        'subject': 'Nueva oferta de intercambio - {{{plant_common_name}}}',
+        'text': """Hola {{{publisher_name}}},
+
+Has recibido una nueva oferta para tu publicación de intercambio.
+
+TU PLANTA:
+- Nombre: {{{plant_common_name}}}
+- Nombre científico: {{{plant_scientific_name}}}
+
+PLANTA OFRECIDA:
+- Usuario: {{{offeror_name}}}
+- Nombre: {{{offer_common_name}}}
+- Nombre científico: {{{offer_scientific_name}}}
+- Tamaño: {{{offer_width_cm}}} cm x {{{offer_height_cm}}} cm
+- Descripción: {{{offer_description}}}
+
+Tienes {{{pending_offers_count}}}/4 ofertas pendientes.
+
+Puedes aceptar o rechazar esta oferta desde tu perfil.
+
+Saludos,
+Equipo SproutMarket""",
+    },
+    'offer_accepted_offeror': {
+        'subject': '¡Tu oferta fue aceptada! - {{{plant_common_name}}}',
+        'text': """Hola {{{offeror_name}}},
+
+¡Excelentes noticias! Tu oferta de intercambio ha sido aceptada.
+
+PLANTA QUE OFRECISTE:
+- {{{offer_common_name}}} ({{{offer_scientific_name}}})
+
+PLANTA QUE RECIBIRÁS:
+- {{{plant_common_name}}} ({{{plant_scientific_name}}})
+
+INFORMACIÓN DE CONTACTO:
+- Nombre: {{{publisher_name}}}
+- Email: {{{publisher_email}}}
+- Teléfono: {{{publisher_phone}}}
+- Ubicación: {{{location}}}
+
+PRÓXIMOS PASOS:
+1. Contacta al usuario para coordinar fecha y lugar del intercambio
+2. Asegúrate de que tu planta esté en buenas condiciones
+3. Realiza el intercambio en el lugar acordado
+
+¡Disfruta tu nueva planta!
+
+Saludos,
+Equipo SproutMarket""",
+    },
+    'offer_accepted_publisher': {
+        'subject': 'Intercambio confirmado - {{{plant_common_name}}}',
+        'text': """Hola {{{publisher_name}}},
+
+Has aceptado una oferta de intercambio.
+
+TU PLANTA:
+- {{{plant_common_name}}} ({{{plant_scientific_name}}})
+
+PLANTA QUE RECIBIRÁS:
+- {{{offer_common_name}}} ({{{offer_scientific_name}}})
+
+INFORMACIÓN DE CONTACTO:
+- Nombre: {{{offeror_name}}}
+- Email: {{{offeror_email}}}
+- Teléfono: {{{offeror_phone}}}
+
+PRÓXIMOS PASOS:
+1. El usuario te contactará para coordinar el intercambio
+2. Coordina fecha y lugar para realizar el intercambio
+3. Asegúrate de que tu planta esté en buenas condiciones
+
+¡Disfruta tu nueva planta!
+
+Saludos,
+Equipo SproutMarket""",
+    },
+    'offer_rejected': {
+        'subject': 'Oferta no aceptada - {{{plant_common_name}}}',
+        'text': """Hola {{{offeror_name}}},
+
+Tu oferta de intercambio no fue aceptada en esta ocasión.
+
+PLANTA QUE OFRECISTE:
+- {{{offer_common_name}}} ({{{offer_scientific_name}}})
+
+PUBLICACIÓN:
+- {{{plant_common_name}}} ({{{plant_scientific_name}}})
+
+No te desanimes, puedes:
+- Hacer otra oferta con una planta diferente
+- Explorar otras publicaciones de intercambio
+- Crear tu propia publicación de intercambio ($90 MXN)
+
+Gracias por participar en SproutMarket.
+
+Saludos,
+Equipo SproutMarket""",
+    },
+    'low_stock': {
+        'subject': 'Alerta de stock bajo - {{{product_name}}}',
+        'text': """Hola {{{seller_name}}},
+
+Tu producto tiene stock bajo y podría agotarse pronto.
+
+PRODUCTO:
+- Nombre: {{{product_name}}}
+- Stock actual: {{{quantity}}} unidades
+- Precio: ${{{price_mxn}}} MXN
+
+RECOMENDACIÓN:
+- Actualiza tu inventario si tienes más unidades disponibles
+- Si se agota, el producto aparecerá como "Agotado" hasta que agregues más stock
+
+Gracias por vender en SproutMarket.
+
+Saludos,
+Equipo SproutMarket""",
+    },
+}
+
+_VARIABLE_RE = re.compile(r'\{\{\{?\s*(\w+)\s*\}?\}\}')
+
+
+def get_ses_template_name(name):
+    """Nombre de la plantilla en SES (con prefijo del proyecto/entorno)"""
+    prefix = getattr(settings, 'SES_TEMPLATE_PREFIX', 'sproutmarket')
+    return f'{prefix}-{name}'
+
+
+def render_template(name, data):
+    """
+    Renderiza localmente una plantilla (mismo resultado que SES)
+
+    Args:
+        name (str): Clave de la plantilla en TEMPLATES
+        data (dict): Variables de la plantilla
+
+    Returns:
+        tuple: (subject, text)
+    """
+    template = TEMPLATES[name]
+
+    def replace(match):
+        return str(data.get(match.group(1), ''))
+
+    subject = _VARIABLE_RE.sub(replace, template['subject'])
+    text = _VARIABLE_RE.sub(replace, template['text'])
+    return subject, text
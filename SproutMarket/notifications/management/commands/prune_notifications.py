@@ -0,0 +1,189 @@
+# notifications/management/commands/prune_notifications.py
+
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from notifications.models import Notification
+
+
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'type', 'title', 'message', 'is_read', 'metadata',
+    'email_sent', 'push_sent', 'email_sent_at', 'push_sent_at',
+    'created_at', 'read_at',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva en JSONL comprimido y elimina por lotes las notificaciones '
+        'leídas más antiguas que el periodo de retención'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.NOTIFICATIONS_RETENTION_DAYS,
+            help='Conservar las notificaciones de los últimos N días'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Filas revisadas por lote (cada lote es una transacción corta)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Pausa en segundos entre lotes para no saturar la DB'
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Eliminar sin escribir el archivo JSONL'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar lo que se eliminaría'
+        )
+        parser.add_argument(
+            '--reindex',
+            action='store_true',
+            help='Al terminar, REINDEX CONCURRENTLY y ANALYZE de la tabla (solo PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        """Recorre la tabla por rangos de id (índice de la PK, sin OFFSET)"""
+        
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old_notifications = Notification.objects.filter(created_at__lt=cutoff, is_read=True)
+        
+        if options['dry_run']:
+            count = old_notifications.count()
+            self.stdout.write(
+                self.style.WARNING(f'Dry run: se eliminarían {count} notificaciones anteriores a {cutoff:%Y-%m-%d}')
+            )
+            return
+        
+        archive = None
+        archive_path = None
+        if not options['no_archive']:
+            os.makedirs(settings.NOTIFICATIONS_ARCHIVE_DIR, exist_ok=True)
+            archive_path = os.path.join(
+                settings.NOTIFICATIONS_ARCHIVE_DIR,
+                f'notifications-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz'
+            )
+            archive = gzip.open(archive_path, 'wt', encoding='utf-8')
+        
+        started_at = time.monotonic()
+        last_id = 0
+        scanned_count = 0
+        deleted_count = 0
+        
+        try:
+            while True:
+                # Los ids crecen con created_at: se revisan en orden hasta
+                # encontrar la primera fila dentro del periodo de retención
+                rows = list(
+                    Notification.objects
+                    .filter(id__gt=last_id)
+                    .order_by('id')
+                    .values(*ARCHIVE_FIELDS)[:options['chunk_size']]
+                )
+                if not rows:
+                    break
+                
+                reached_cutoff = False
+                expired = []
+                for row in rows:
+                    if row['created_at'] >= cutoff:
+                        reached_cutoff = True
+                        break
+                    last_id = row['id']
+                    scanned_count += 1
+                    if row['is_read']:
+                        expired.append(row)
+                
+                if expired:
+                    with transaction.atomic():
+                        if archive:
+                            for row in expired:
+                                archive.write(json.dumps(row, default=str, ensure_ascii=False))
+                                archive.write('\n')
+                            archive.flush()
+                        Notification.objects.filter(id__in=[row['id'] for row in expired]).delete()
+                    deleted_count += len(expired)
+                
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(
+                    f'  {scanned_count} revisadas, {deleted_count} eliminadas '
+                    f'({deleted_count / elapsed if elapsed else 0:.0f}/s), último id {last_id}'
+                )
+                
+                if reached_cutoff:
+                    break
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        finally:
+            if archive:
+                archive.close()
+        
+        if archive_path:
+            if deleted_count:
+                self.stdout.write(self.style.SUCCESS(f'✓ Archivo: {archive_path}'))
+                self.upload_archive(archive_path)
+            else:
+                os.remove(archive_path)
+        
+        if options['reindex']:
+            self.reindex()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Proceso completado: {deleted_count} notificaciones eliminadas '
+                f'en {time.monotonic() - started_at:.1f}s'
+            )
+        )
+
+    def upload_archive(self, archive_path):
+        """Copia el archivo a S3 si NOTIFICATIONS_ARCHIVE_BUCKET está configurado"""
+        bucket = settings.NOTIFICATIONS_ARCHIVE_BUCKET
+        if not bucket:
+            return
+        
+        from core.utils.aws_clients import get_client
+        
+        key = f'archive/notifications/{os.path.basename(archive_path)}'
+        get_client('s3').upload_file(archive_path, bucket, key)
+        self.stdout.write(self.style.SUCCESS(f'✓ Subido a s3://{bucket}/{key}'))
+
+    def reindex(self):
+        """
+        Reconstruye los índices de la tabla sin bloquear escrituras
+        
+        Los DELETE masivos dejan páginas vacías en los índices de
+        (user, created_at) que VACUUM no devuelve; REINDEX CONCURRENTLY las
+        compacta. Debe correr fuera de una transacción (autocommit).
+        """
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('REINDEX omitido: solo disponible en PostgreSQL'))
+            return
+        
+        table = Notification._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+            for name, info in constraints.items():
+                if info['index'] and not info['primary_key']:
+                    cursor.execute(f'REINDEX INDEX CONCURRENTLY {connection.ops.quote_name(name)}')
+                    self.stdout.write(f'  ↻ Índice reconstruido: {name}')
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
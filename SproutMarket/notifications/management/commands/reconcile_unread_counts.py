@@ -0,0 +1,49 @@
+# notifications/management/commands/reconcile_unread_counts.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from notifications.counters import get_unread_count, set_unread_count
+from notifications.models import Notification
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde DB los contadores de notificaciones no leídas en cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='Reconciliar solo el usuario con este ID'
+        )
+
+    def handle(self, *args, **options):
+        """Un solo GROUP BY user para todos los usuarios con no leídas"""
+        
+        queryset = Notification.objects.filter(is_read=False)
+        if options['user']:
+            queryset = queryset.filter(user_id=options['user'])
+        
+        counts = dict(
+            queryset.order_by()
+            .values('user_id')
+            .annotate(count=Count('id'))
+            .values_list('user_id', 'count')
+        )
+        if options['user']:
+            counts.setdefault(options['user'], 0)
+        
+        fixed_count = 0
+        for user_id, count in counts.items():
+            if get_unread_count(user_id) != count:
+                fixed_count += 1
+                self.stdout.write(
+                    self.style.WARNING(f'↻ Usuario {user_id}: contador corregido a {count}')
+                )
+            set_unread_count(user_id, count)
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Proceso completado: {len(counts)} usuarios, {fixed_count} corregidos'
+            )
+        )
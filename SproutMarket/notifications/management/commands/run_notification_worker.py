@@ -0,0 +1,218 @@
+# notifications/management/commands/run_notification_worker.py
+
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from notifications.models import Notification, UserPushTopic
+from notifications.services import EmailBatch, PushNotificationService
+
+
+class Command(BaseCommand):
+    help = 'Publica en SNS las notificaciones push en cola (publish_batch por usuario) y envía los emails diferidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesa la cola una sola vez y termina'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PUSH_WORKER_BATCH_SIZE,
+            help='Notificaciones tomadas de la cola por iteración'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.PUSH_WORKER_POLL_INTERVAL,
+            help='Segundos de espera cuando la cola está vacía'
+        )
+
+    def handle(self, *args, **options):
+        """Loop principal del worker"""
+        
+        self.push_service = PushNotificationService()
+        prune_interval = settings.PUSH_PRUNE_INTERVAL
+        last_prune = 0
+        
+        self.stdout.write(self.style.SUCCESS('✓ Worker de notificaciones iniciado'))
+        
+        try:
+            while True:
+                if time.monotonic() - last_prune >= prune_interval:
+                    pruned = self.push_service.prune_disabled_endpoints()
+                    last_prune = time.monotonic()
+                    if pruned:
+                        self.stdout.write(
+                            self.style.WARNING(f'↻ {pruned} dispositivo(s) deshabilitado(s)')
+                        )
+                
+                processed = self.process_batch(options['batch_size'])
+                processed += self.process_email_batch(options['batch_size'])
+                
+                if options['once']:
+                    break
+                if not processed:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        
+        self.stdout.write(self.style.SUCCESS('✓ Worker de notificaciones detenido'))
+
+    def claim_batch(self, batch_size):
+        """
+        Toma un lote de la cola en una transacción corta: cuenta el intento y
+        lo oculta a otros workers PUSH_WORKER_CLAIM_TIMEOUT segundos (si este
+        worker muere, el lote vuelve a la cola al vencer ese plazo)
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            # skip_locked permite correr varios workers en paralelo
+            notifications = list(
+                Notification.objects
+                .select_for_update(skip_locked=True)
+                .filter(push_pending=True)
+                .filter(Q(push_next_attempt_at__isnull=True) | Q(push_next_attempt_at__lte=now))
+                .only('id', 'user_id', 'type', 'title', 'message', 'push_attempts')
+                .order_by('id')[:batch_size]
+            )
+            if notifications:
+                Notification.objects.filter(id__in=[n.id for n in notifications]).update(
+                    push_attempts=F('push_attempts') + 1,
+                    push_next_attempt_at=now + timedelta(seconds=settings.PUSH_WORKER_CLAIM_TIMEOUT)
+                )
+        for notification in notifications:
+            notification.push_attempts += 1
+        return notifications
+
+    def schedule_retries(self, notifications):
+        """
+        Reprograma los push con error temporal (backoff exponencial) y
+        descarta los que llegaron a PUSH_WORKER_MAX_ATTEMPTS
+
+        Returns:
+            list: IDs descartados
+        """
+        now = timezone.now()
+        by_attempts = defaultdict(list)
+        discarded_ids = []
+        for notification in notifications:
+            if notification.push_attempts >= settings.PUSH_WORKER_MAX_ATTEMPTS:
+                discarded_ids.append(notification.id)
+            else:
+                by_attempts[notification.push_attempts].append(notification.id)
+        
+        for attempts, ids in by_attempts.items():
+            delay = settings.PUSH_WORKER_RETRY_BACKOFF * 2 ** (attempts - 1)
+            Notification.objects.filter(id__in=ids).update(
+                push_next_attempt_at=now + timedelta(seconds=delay)
+            )
+        Notification.objects.filter(id__in=discarded_ids).update(
+            push_pending=False,
+            push_next_attempt_at=None
+        )
+        return discarded_ids
+
+    def process_batch(self, batch_size):
+        """
+        Toma un lote de la cola y lo publica en el topic de cada usuario
+
+        La publicación en SNS corre fuera de la transacción: las filas no
+        quedan bloqueadas mientras se espera a AWS.
+        
+        Returns:
+            int: Notificaciones que salieron de la cola (las de reintento no cuentan)
+        """
+        notifications = self.claim_batch(batch_size)
+        if not notifications:
+            return 0
+        
+        by_user = defaultdict(list)
+        for notification in notifications:
+            by_user[notification.user_id].append(notification)
+        
+        # Solo usuarios con dispositivos registrados tienen topic
+        topics = dict(
+            UserPushTopic.objects
+            .filter(user_id__in=by_user.keys())
+            .values_list('user_id', 'topic_arn')
+        )
+        
+        sent_ids, done_ids, retry_ids = [], [], []
+        for user_id, user_notifications in by_user.items():
+            topic_arn = topics.get(user_id)
+            if not topic_arn:
+                done_ids.extend(n.id for n in user_notifications)
+                continue
+            
+            sent, failed, retry = self.push_service.publish_batch(topic_arn, user_notifications)
+            sent_ids.extend(sent)
+            done_ids.extend(failed)
+            retry_ids.extend(retry)
+        
+        Notification.objects.filter(id__in=sent_ids).update(
+            push_pending=False,
+            push_sent=True,
+            push_sent_at=timezone.now(),
+            push_next_attempt_at=None
+        )
+        Notification.objects.filter(id__in=done_ids).update(
+            push_pending=False,
+            push_next_attempt_at=None
+        )
+        retry_ids = set(retry_ids)
+        discarded_ids = self.schedule_retries([n for n in notifications if n.id in retry_ids])
+        
+        self.stdout.write(
+            f'Push: {len(sent_ids)} enviadas, {len(done_ids) + len(discarded_ids)} descartadas, '
+            f'{len(retry_ids) - len(discarded_ids)} en reintento'
+        )
+        return len(sent_ids) + len(done_ids) + len(discarded_ids)
+
+    def process_email_batch(self, batch_size):
+        """
+        Envía los emails que un request difirió por falta de cupo de SES
+
+        Se toman en una transacción corta y se envían fuera de ella, esperando
+        el cupo necesario. Igual que en el envío inline, un email que SES
+        rechaza no se reintenta.
+
+        Returns:
+            int: Emails tomados de la cola
+        """
+        with transaction.atomic():
+            notifications = list(
+                Notification.objects
+                .select_for_update(skip_locked=True, of=('self',))
+                .filter(email_pending=True)
+                .select_related('user')
+                .only('id', 'email_template', 'email_template_data', 'user__email')
+                .order_by('id')[:batch_size]
+            )
+            if not notifications:
+                return 0
+            Notification.objects.filter(id__in=[n.id for n in notifications]).update(
+                email_pending=False,
+                email_template_data=None
+            )
+        
+        email_batch = EmailBatch()
+        for notification in notifications:
+            email_batch.add(
+                notification.user.email,
+                notification.email_template,
+                notification.email_template_data or {},
+                notification
+            )
+        sent = email_batch.flush()
+        
+        self.stdout.write(f'Email: {sent} enviados de {len(notifications)} diferidos')
+        return len(notifications)
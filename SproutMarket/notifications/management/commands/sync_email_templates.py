@@ -0,0 +1,48 @@
+# notifications/management/commands/sync_email_templates.py
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.utils.aws_clients import get_client
+from notifications.email_templates import TEMPLATES, get_ses_template_name
+
+
+class Command(BaseCommand):
+    help = 'Crea o actualiza en SES las plantillas de email de notifications/email_templates.py'
+
+    def handle(self, *args, **kwargs):
+        """Sincroniza las plantillas locales con SES"""
+        
+        ses_client = get_client('ses', region_name=settings.AWS_SES_REGION)
+        
+        created_count = 0
+        updated_count = 0
+        
+        for name, template in TEMPLATES.items():
+            ses_template = {
+                'TemplateName': get_ses_template_name(name),
+                'SubjectPart': template['subject'],
+                'TextPart': template['text'],
+            }
+            
+            try:
+                ses_client.update_template(Template=ses_template)
+                updated_count += 1
+                self.stdout.write(
+                    self.style.WARNING(f'↻ Plantilla actualizada: {ses_template["TemplateName"]}')
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TemplateDoesNotExist':
+                    raise
+                ses_client.create_template(Template=ses_template)
+                created_count += 1
+                self.stdout.write(
+                    self.style.SUCCESS(f'✓ Plantilla creada: {ses_template["TemplateName"]}')
+                )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Proceso completado: {created_count} creadas, {updated_count} actualizadas'
+            )
+        )
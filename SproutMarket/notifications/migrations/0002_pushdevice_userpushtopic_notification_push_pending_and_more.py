@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushDevice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('android', 'Android (FCM)'), ('ios', 'iOS (APNs)')], max_length=10, verbose_name='plataforma')),
+                ('token', models.CharField(help_text='Token de FCM/APNs del dispositivo', max_length=512, unique=True, verbose_name='token del dispositivo')),
+                ('endpoint_arn', models.CharField(blank=True, help_text='Platform endpoint en SNS', max_length=512, verbose_name='ARN del endpoint')),
+                ('subscription_arn', models.CharField(blank=True, help_text='Suscripción del endpoint al topic del usuario', max_length=512, verbose_name='ARN de la suscripción')),
+                ('is_enabled', models.BooleanField(default=True, help_text='SNS deshabilita el endpoint cuando el proveedor rechaza el token', verbose_name='habilitado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creado en')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='actualizado en')),
+            ],
+            options={
+                'verbose_name': 'dispositivo push',
+                'verbose_name_plural': 'dispositivos push',
+                'db_table': 'push_devices',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserPushTopic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic_arn', models.CharField(max_length=512, unique=True, verbose_name='ARN del topic')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creado en')),
+            ],
+            options={
+                'verbose_name': 'topic push de usuario',
+                'verbose_name_plural': 'topics push de usuarios',
+                'db_table': 'user_push_topics',
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='push_pending',
+            field=models.BooleanField(default=False, help_text='Push en cola para el worker de notificaciones', verbose_name='push pendiente'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('push_pending', True)), fields=['id'], name='notifications_push_pending'),
+        ),
+        migrations.AddField(
+            model_name='pushdevice',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='push_devices', to=settings.AUTH_USER_MODEL, verbose_name='usuario'),
+        ),
+        migrations.AddField(
+            model_name='userpushtopic',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='push_topic', to=settings.AUTH_USER_MODEL, verbose_name='usuario'),
+        ),
+        migrations.AddIndex(
+            model_name='pushdevice',
+            index=models.Index(fields=['user', 'is_enabled'], name='push_device_user_id_b69337_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pushdevice',
+            index=models.Index(fields=['endpoint_arn'], name='push_device_endpoin_d43e03_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_pushdevice_userpushtopic_notification_push_pending_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='push_attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Veces que el worker tomó el push (tope PUSH_WORKER_MAX_ATTEMPTS)', verbose_name='intentos de push'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='push_next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='El worker no toma el push antes de esta fecha (reintento o tomado por otro worker)', null=True, verbose_name='próximo intento de push'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:07
+
+import django.core.serializers.json
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notification_push_attempts_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_pending',
+            field=models.BooleanField(default=False, help_text='Email diferido al worker (sin cupo de SES durante el request)', verbose_name='email pendiente'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='email_template',
+            field=models.CharField(blank=True, help_text='Plantilla del email diferido (ver email_templates.py)', max_length=100, verbose_name='plantilla de email'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='email_template_data',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Datos del email diferido; se borran al tomarlo el worker', null=True, verbose_name='datos de la plantilla'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('email_pending', True)), fields=['id'], name='notifications_email_pending'),
+        ),
+    ]
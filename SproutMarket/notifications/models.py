@@ -1,7 +1,8 @@
 # notifications/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import gettext_lazy as _
 
 
@@ -71,11 +72,45 @@ class Notification(models.Model):
         default=False,
         help_text='Si se envió por email (SES)'
     )
+    email_pending = models.BooleanField(
+        _('email pendiente'),
+        default=False,
+        help_text='Email diferido al worker (sin cupo de SES durante el request)'
+    )
+    email_template = models.CharField(
+        _('plantilla de email'),
+        max_length=100,
+        blank=True,
+        help_text='Plantilla del email diferido (ver email_templates.py)'
+    )
+    email_template_data = models.JSONField(
+        _('datos de la plantilla'),
+        encoder=DjangoJSONEncoder,
+        null=True,
+        blank=True,
+        help_text='Datos del email diferido; se borran al tomarlo el worker'
+    )
     push_sent = models.BooleanField(
         _('push enviado'),
         default=False,
         help_text='Si se envió notificación push (SNS)'
     )
+    push_pending = models.BooleanField(
+        _('push pendiente'),
+        default=False,
+        help_text='Push en cola para el worker de notificaciones'
+    )
+    push_attempts = models.PositiveIntegerField(
+        _('intentos de push'),
+        default=0,
+        help_text='Veces que el worker tomó el push (tope PUSH_WORKER_MAX_ATTEMPTS)'
+    )
+    push_next_attempt_at = models.DateTimeField(
+        _('próximo intento de push'),
+        null=True,
+        blank=True,
+        help_text='El worker no toma el push antes de esta fecha (reintento o tomado por otro worker)'
+    )
     email_sent_at = models.DateTimeField(
         _('email enviado en'),
         null=True,
@@ -104,18 +139,63 @@ class Notification(models.Model):
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['type', '-created_at']),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(push_pending=True),
+                name='notifications_push_pending'
+            ),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(email_pending=True),
+                name='notifications_email_pending'
+            ),
         ]
     
     def __str__(self):
         return f"{self.get_type_display()} - {self.user.email}"
     
+    def save(self, *args, **kwargs):
+        """Al crear una notificación actualiza el contador y avisa al stream"""
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        
+        if created:
+            from notifications.counters import adjust_unread_count
+            from notifications.streams import publish_notification
+            user_id, notification_id = self.user_id, self.id
+            if not self.is_read:
+                transaction.on_commit(lambda: adjust_unread_count(user_id, 1))
+            # Avisar a las conexiones del stream SSE del usuario
+            transaction.on_commit(lambda: publish_notification(user_id, notification_id))
+    
+    def delete(self, *args, **kwargs):
+        """Al eliminar una notificación no leída, decrementa el contador"""
+        was_unread = not self.is_read
+        user_id = self.user_id
+        result = super().delete(*args, **kwargs)
+        
+        if was_unread:
+            from notifications.counters import adjust_unread_count
+            transaction.on_commit(lambda: adjust_unread_count(user_id, -1))
+        return result
+    
     def mark_as_read(self):
         """Marca la notificación como leída"""
         if not self.is_read:
             self.is_read = True
             from django.utils import timezone
             self.read_at = timezone.now()
-            self.save(update_fields=['is_read', 'read_at'])
+            # UPDATE condicional: si dos requests la marcan a la vez, solo
+            # una descuenta del contador
+            updated = type(self).objects.filter(pk=self.pk, is_read=False).update(
+                is_read=True,
+                read_at=self.read_at
+            )
+            
+            if updated:
+                from notifications.counters import adjust_unread_count
+                user_id = self.user_id
+                transaction.on_commit(lambda: adjust_unread_count(user_id, -1))
     
     @classmethod
     def create_and_send(cls, user, type, title, message, metadata=None):
@@ -136,4 +216,96 @@ class Notification(models.Model):
         # send_email(notification)
         # send_push(notification)
         
-        return notification
\ No newline at end of file
+        return notification
+
+
+class PushDevice(models.Model):
+    """
+    Dispositivo registrado para recibir notificaciones push.
+    Cada dispositivo es un platform endpoint de SNS suscrito al topic
+    propio de su usuario.
+    """
+    
+    PLATFORM_CHOICES = [
+        ('android', 'Android (FCM)'),
+        ('ios', 'iOS (APNs)'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='push_devices',
+        verbose_name=_('usuario')
+    )
+    platform = models.CharField(
+        _('plataforma'),
+        max_length=10,
+        choices=PLATFORM_CHOICES
+    )
+    token = models.CharField(
+        _('token del dispositivo'),
+        max_length=512,
+        unique=True,
+        help_text='Token de FCM/APNs del dispositivo'
+    )
+    endpoint_arn = models.CharField(
+        _('ARN del endpoint'),
+        max_length=512,
+        blank=True,
+        help_text='Platform endpoint en SNS'
+    )
+    subscription_arn = models.CharField(
+        _('ARN de la suscripción'),
+        max_length=512,
+        blank=True,
+        help_text='Suscripción del endpoint al topic del usuario'
+    )
+    is_enabled = models.BooleanField(
+        _('habilitado'),
+        default=True,
+        help_text='SNS deshabilita el endpoint cuando el proveedor rechaza el token'
+    )
+    
+    created_at = models.DateTimeField(_('creado en'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('actualizado en'), auto_now=True)
+    
+    class Meta:
+        db_table = 'push_devices'
+        verbose_name = _('dispositivo push')
+        verbose_name_plural = _('dispositivos push')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_enabled']),
+            models.Index(fields=['endpoint_arn']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_platform_display()} - {self.user.email}"
+
+
+class UserPushTopic(models.Model):
+    """
+    Topic de SNS propio de cada usuario. Sus dispositivos están suscritos
+    y el worker publica en él con publish_batch (hasta 10 mensajes por llamada).
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='push_topic',
+        verbose_name=_('usuario')
+    )
+    topic_arn = models.CharField(
+        _('ARN del topic'),
+        max_length=512,
+        unique=True
+    )
+    created_at = models.DateTimeField(_('creado en'), auto_now_add=True)
+    
+    class Meta:
+        db_table = 'user_push_topics'
+        verbose_name = _('topic push de usuario')
+        verbose_name_plural = _('topics push de usuarios')
+    
+    def __str__(self):
+        return f"{self.topic_arn} - {self.user.email}"
@@ -1,7 +1,10 @@
 # notifications/serializers.py
 
 from rest_framework import serializers
-from .models import Notification
+from django.utils import timezone
+
+from .counters import adjust_unread_count, set_unread_count
+from .models import Notification, PushDevice
 from core.serializers import UserProfileSerializer
 
 
@@ -63,7 +66,7 @@ class NotificationDetailSerializer(serializers.ModelSerializer):
             'push_sent', 'push_sent_at', 'push_sent_status',
             'created_at'
         ]
-        read_only_fields = '__all__'
+        read_only_fields = fields
     
     def get_email_sent_status(self, obj):
         """Status de envío de email"""
@@ -126,13 +129,29 @@ class NotificationMarkReadSerializer(serializers.Serializer):
                 is_read=False
             )
         
-        # Actualizar en bulk
-        count = 0
-        for notification in queryset:
-            notification.mark_as_read()
-            count += 1
+        # Actualizar en bulk (un solo UPDATE)
+        count = queryset.update(is_read=True, read_at=timezone.now())
+        
+        if notification_ids:
+            adjust_unread_count(user.id, -count)
+        else:
+            set_unread_count(user.id, 0)
         
         return {
             'marked_count': count,
             'message': f'{count} notificación(es) marcada(s) como leída(s)'
-        }
\ No newline at end of file
+        }
+
+class PushDeviceSerializer(serializers.ModelSerializer):
+    """
+    Serializer para registrar dispositivos push
+    """
+    
+    class Meta:
+        model = PushDevice
+        fields = ['id', 'platform', 'token', 'is_enabled', 'created_at']
+        read_only_fields = ['id', 'is_enabled', 'created_at']
+        extra_kwargs = {
+            # El registro es idempotente por token (se reasigna al usuario actual)
+            'token': {'validators': []},
+        }
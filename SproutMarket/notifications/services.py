@@ -1,12 +1,47 @@
 # notifications/services.py
 
-import boto3
+import json
+import threading
+import time
+from collections import defaultdict
+
 from django.conf import settings
 from botocore.exceptions import ClientError
 import logging
 
+from core.utils.aws_clients import get_client
+from core.utils.rate_limit import TokenBucket
+from .email_templates import get_ses_template_name, render_template
+
 logger = logging.getLogger(__name__)
 
+# Máximo de destinos por llamada a send_bulk_templated_email (límite de SES)
+SES_BULK_MAX_DESTINATIONS = 50
+
+_send_rate_bucket = None
+_send_rate_lock = threading.Lock()
+
+
+def get_send_rate_bucket(ses_client):
+    """
+    Token bucket compartido por el proceso con la tasa máxima de envío de SES
+
+    La tasa se consulta una sola vez con get_send_quota; si falla se usa
+    settings.SES_MAX_SEND_RATE.
+    """
+    global _send_rate_bucket
+    if _send_rate_bucket is None:
+        with _send_rate_lock:
+            if _send_rate_bucket is None:
+                rate = getattr(settings, 'SES_MAX_SEND_RATE', 1)
+                try:
+                    quota = ses_client.get_send_quota()
+                    rate = quota['MaxSendRate'] or rate
+                except Exception as e:
+                    logger.warning(f"Could not read SES send quota, using {rate}/s: {str(e)}")
+                _send_rate_bucket = TokenBucket(rate=rate)
+    return _send_rate_bucket
+
 
 class EmailService:
     """
@@ -15,12 +50,7 @@ class EmailService:
     """
     
     def __init__(self):
-        self.ses_client = boto3.client(
-            'ses',
-            region_name=settings.AWS_SES_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        )
+        self.ses_client = get_client('ses', region_name=settings.AWS_SES_REGION)
         self.from_email = settings.DEFAULT_FROM_EMAIL
     
     def send_email(self, to_email, subject, message):
@@ -64,25 +94,93 @@ class EmailService:
         except Exception as e:
             logger.error(f"Unexpected error sending email to {to_email}: {str(e)}")
             return None
+    
+    def send_bulk_templated_email(self, template_name, destinations, max_wait=None):
+        """
+        Enviar un email con plantilla de SES a varios destinatarios
+        
+        Agrupa los destinos en llamadas de hasta 50 y respeta la tasa de
+        envío de la cuenta (token bucket).
+        
+        Args:
+            template_name (str): Clave de la plantilla (ver email_templates.py)
+            destinations (list): Lista de tuplas (to_email, template_data)
+            max_wait (float, optional): Espera máxima total por cupo de envío
+                en segundos (None = esperar lo necesario)
+        
+        Returns:
+            list: Por destino, en el mismo orden: True si SES lo aceptó,
+                  False si falló, None si no se intentó por falta de cupo
+        """
+        results = []
+        bucket = get_send_rate_bucket(self.ses_client)
+        ses_template = get_ses_template_name(template_name)
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        
+        for start in range(0, len(destinations), SES_BULK_MAX_DESTINATIONS):
+            chunk = destinations[start:start + SES_BULK_MAX_DESTINATIONS]
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not bucket.acquire(len(chunk), timeout=timeout):
+                logger.info(
+                    f"Bulk email {template_name}: send rate exhausted, "
+                    f"{len(destinations) - start} not attempted"
+                )
+                results.extend([None] * (len(destinations) - start))
+                break
+            
+            try:
+                response = self.ses_client.send_bulk_templated_email(
+                    Source=self.from_email,
+                    Template=ses_template,
+                    DefaultTemplateData='{}',
+                    Destinations=[
+                        {
+                            'Destination': {'ToAddresses': [to_email]},
+                            'ReplacementTemplateData': json.dumps(data, default=str)
+                        }
+                        for to_email, data in chunk
+                    ]
+                )
+                statuses = [item['Status'] == 'Success' for item in response['Status']]
+                
+                logger.info(
+                    f"Bulk email {template_name}: {sum(statuses)}/{len(chunk)} accepted"
+                )
+                results.extend(statuses)
+                
+            except ClientError as e:
+                logger.error(f"Error sending bulk email {template_name}: {e.response['Error']['Message']}")
+                results.extend([False] * len(chunk))
+            except Exception as e:
+                logger.error(f"Unexpected error sending bulk email {template_name}: {str(e)}")
+                results.extend([False] * len(chunk))
+        
+        return results
 
 
 class PushNotificationService:
     """
     Servicio para enviar notificaciones push usando AWS SNS
+    
+    Cada dispositivo se registra como platform endpoint y se suscribe al
+    topic propio de su usuario; las notificaciones se publican en ese topic
+    con publish_batch (ver run_notification_worker).
     """
     
+    # Máximo de mensajes por llamada a publish_batch (límite de SNS)
+    PUBLISH_BATCH_SIZE = 10
+    
     def __init__(self):
-        self.sns_client = boto3.client(
-            'sns',
-            region_name=settings.AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        )
+        self.sns_client = get_client('sns')
         self.topic_arn = getattr(settings, 'SNS_TOPIC_ARN', None)
+        self.platform_applications = getattr(settings, 'SNS_PLATFORM_APPLICATIONS', {})
     
     def send_push(self, subject, message):
         """
-        Enviar notificación push via SNS
+        Enviar notificación push via SNS al topic global
+        
+        Llega a TODOS los suscriptores de SNS_TOPIC_ARN; usar solo para
+        anuncios generales. Las notificaciones de un usuario van a su topic.
         
         Args:
             subject (str): Asunto/título de la notificación
@@ -111,6 +209,289 @@ class PushNotificationService:
         except Exception as e:
             logger.error(f"Unexpected error sending push notification: {str(e)}")
             return None
+    
+    def get_user_topic_arn(self, user, create=True):
+        """
+        Obtener (o crear) el topic SNS propio del usuario
+        
+        Returns:
+            str: ARN del topic o None si no existe y create=False
+        """
+        from notifications.models import UserPushTopic
+        
+        topic = UserPushTopic.objects.filter(user=user).first()
+        if topic:
+            return topic.topic_arn
+        if not create:
+            return None
+        
+        prefix = getattr(settings, 'SNS_USER_TOPIC_PREFIX', 'sproutmarket-user')
+        # create_topic es idempotente: retorna el mismo ARN si ya existe
+        response = self.sns_client.create_topic(Name=f'{prefix}-{user.id}')
+        topic, _ = UserPushTopic.objects.get_or_create(
+            user=user,
+            defaults={'topic_arn': response['TopicArn']}
+        )
+        return topic.topic_arn
+    
+    def register_device(self, user, platform, token):
+        """
+        Registrar (o reactivar) un dispositivo del usuario
+        
+        Args:
+            user: Instancia del modelo User
+            platform (str): 'android' o 'ios'
+            token (str): Token de FCM/APNs
+        
+        Returns:
+            PushDevice: Dispositivo registrado
+        
+        Raises:
+            ValueError: Si la plataforma no tiene platform application configurada
+            ClientError: Si SNS rechaza el registro
+        """
+        from notifications.models import PushDevice
+        
+        application_arn = self.platform_applications.get(platform)
+        if not application_arn:
+            raise ValueError(f'Plataforma push no configurada: {platform}')
+        
+        device = PushDevice.objects.filter(token=token).first()
+        
+        if device and device.endpoint_arn:
+            # El endpoint ya existe: reactivarlo (SNS lo deshabilita si el token falló)
+            self.sns_client.set_endpoint_attributes(
+                EndpointArn=device.endpoint_arn,
+                Attributes={'Token': token, 'Enabled': 'true', 'CustomUserData': str(user.id)}
+            )
+            # Si el dispositivo cambió de usuario, quitarlo del topic anterior
+            if device.user_id != user.id and device.subscription_arn:
+                self._unsubscribe(device.subscription_arn)
+                device.subscription_arn = ''
+        else:
+            response = self.sns_client.create_platform_endpoint(
+                PlatformApplicationArn=application_arn,
+                Token=token,
+                CustomUserData=str(user.id)
+            )
+            device = device or PushDevice(token=token)
+            device.endpoint_arn = response['EndpointArn']
+            device.subscription_arn = ''
+        
+        if not device.subscription_arn:
+            response = self.sns_client.subscribe(
+                TopicArn=self.get_user_topic_arn(user),
+                Protocol='application',
+                Endpoint=device.endpoint_arn,
+                ReturnSubscriptionArn=True
+            )
+            device.subscription_arn = response['SubscriptionArn']
+        
+        device.user = user
+        device.platform = platform
+        device.is_enabled = True
+        device.save()
+        return device
+    
+    def unregister_device(self, device):
+        """Eliminar el endpoint de SNS y su suscripción"""
+        if device.subscription_arn:
+            self._unsubscribe(device.subscription_arn)
+        if device.endpoint_arn:
+            try:
+                self.sns_client.delete_endpoint(EndpointArn=device.endpoint_arn)
+            except ClientError as e:
+                logger.warning(f"Error deleting SNS endpoint {device.endpoint_arn}: {e.response['Error']['Message']}")
+        device.delete()
+    
+    def _unsubscribe(self, subscription_arn):
+        try:
+            self.sns_client.unsubscribe(SubscriptionArn=subscription_arn)
+        except ClientError as e:
+            logger.warning(f"Error unsubscribing {subscription_arn}: {e.response['Error']['Message']}")
+    
+    @staticmethod
+    def build_message(notification):
+        """Payload JSON por plataforma para una notificación"""
+        data = {'notification_id': notification.id, 'type': notification.type}
+        body = notification.message[:240]
+        return json.dumps({
+            'default': notification.title,
+            'GCM': json.dumps({
+                'notification': {'title': notification.title, 'body': body},
+                'data': data
+            }),
+            'APNS': json.dumps({
+                'aps': {'alert': {'title': notification.title, 'body': body}},
+                **data
+            }),
+        })
+    
+    def publish_batch(self, topic_arn, notifications):
+        """
+        Publicar notificaciones en el topic de un usuario, 10 por llamada
+        
+        Args:
+            topic_arn (str): Topic del usuario
+            notifications (list): Instancias de Notification
+        
+        Returns:
+            tuple: (ids publicados, ids con error permanente, ids a reintentar)
+        """
+        sent_ids, failed_ids, retry_ids = [], [], []
+        
+        for start in range(0, len(notifications), self.PUBLISH_BATCH_SIZE):
+            chunk = notifications[start:start + self.PUBLISH_BATCH_SIZE]
+            
+            try:
+                response = self.sns_client.publish_batch(
+                    TopicArn=topic_arn,
+                    PublishBatchRequestEntries=[
+                        {
+                            'Id': str(notification.id),
+                            'Subject': notification.title[:100],
+                            'Message': self.build_message(notification),
+                            'MessageStructure': 'json',
+                        }
+                        for notification in chunk
+                    ]
+                )
+            except ClientError as e:
+                logger.error(f"Error publishing push batch to {topic_arn}: {e.response['Error']['Message']}")
+                if e.response['Error']['Code'] == 'NotFound':
+                    # El topic ya no existe: se recreará en el próximo registro
+                    from notifications.models import UserPushTopic
+                    UserPushTopic.objects.filter(topic_arn=topic_arn).delete()
+                    failed_ids.extend(n.id for n in chunk)
+                else:
+                    retry_ids.extend(n.id for n in chunk)
+                continue
+            
+            sent_ids.extend(int(entry['Id']) for entry in response.get('Successful', []))
+            for entry in response.get('Failed', []):
+                logger.warning(f"Push {entry['Id']} failed: {entry.get('Code')} {entry.get('Message', '')}")
+                if entry.get('SenderFault'):
+                    failed_ids.append(int(entry['Id']))
+                else:
+                    retry_ids.append(int(entry['Id']))
+        
+        return sent_ids, failed_ids, retry_ids
+    
+    def prune_disabled_endpoints(self):
+        """
+        Deshabilitar y eliminar los endpoints que SNS marcó como inactivos
+        
+        SNS deshabilita un endpoint cuando FCM/APNs rechaza su token; aquí se
+        recorren los endpoints de cada platform application (100 por página)
+        y se eliminan los muertos para que no sigan suscritos.
+        
+        Returns:
+            int: Número de dispositivos deshabilitados
+        """
+        from notifications.models import PushDevice
+        
+        disabled_arns = []
+        paginator = self.sns_client.get_paginator('list_endpoints_by_platform_application')
+        
+        for application_arn in self.platform_applications.values():
+            if not application_arn:
+                continue
+            for page in paginator.paginate(PlatformApplicationArn=application_arn):
+                for endpoint in page.get('Endpoints', []):
+                    if endpoint.get('Attributes', {}).get('Enabled') == 'false':
+                        disabled_arns.append(endpoint['EndpointArn'])
+        
+        devices = list(PushDevice.objects.filter(endpoint_arn__in=disabled_arns, is_enabled=True))
+        for device in devices:
+            if device.subscription_arn:
+                self._unsubscribe(device.subscription_arn)
+            try:
+                self.sns_client.delete_endpoint(EndpointArn=device.endpoint_arn)
+            except ClientError as e:
+                logger.warning(f"Error deleting SNS endpoint {device.endpoint_arn}: {e.response['Error']['Message']}")
+        
+        PushDevice.objects.filter(id__in=[d.id for d in devices]).update(
+            is_enabled=False,
+            endpoint_arn='',
+            subscription_arn=''
+        )
+        return len(devices)
+
+
+class EmailBatch:
+    """
+    Acumula emails con plantilla y los envía agrupados por plantilla
+    con send_bulk_templated_email en lugar de un send_email por destinatario
+
+    Con flush(max_wait=...) los emails que no alcanzan cupo de SES a tiempo
+    se difieren al worker de notificaciones (email_pending) en lugar de
+    bloquear al request.
+    """
+    
+    def __init__(self, email_service=None):
+        self.email_service = email_service or EmailService()
+        self._pending = defaultdict(list)
+    
+    def __len__(self):
+        return sum(len(items) for items in self._pending.values())
+    
+    def add(self, to_email, template_name, template_data, notification=None):
+        """Agregar un email pendiente (opcionalmente ligado a una Notification)"""
+        self._pending[template_name].append((to_email, template_data, notification))
+    
+    def flush(self, max_wait=None):
+        """
+        Enviar todos los emails pendientes y marcar sus notificaciones
+        
+        Args:
+            max_wait (float, optional): Espera máxima por cupo de SES en
+                segundos; los emails sin cupo se difieren al worker
+                (None = esperar lo necesario)
+        
+        Returns:
+            int: Número de emails aceptados por SES
+        """
+        from notifications.models import Notification
+        from django.utils import timezone
+        
+        sent_ids = []
+        deferred = []
+        sent_count = 0
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        
+        for template_name, items in self._pending.items():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            statuses = self.email_service.send_bulk_templated_email(
+                template_name,
+                [(to_email, data) for to_email, data, _ in items],
+                max_wait=remaining
+            )
+            for (_, data, notification), accepted in zip(items, statuses):
+                if accepted:
+                    sent_count += 1
+                    if notification is not None:
+                        sent_ids.append(notification.id)
+                elif accepted is None and notification is not None:
+                    notification.email_pending = True
+                    notification.email_template = template_name
+                    notification.email_template_data = data
+                    deferred.append(notification)
+        
+        self._pending.clear()
+        
+        if deferred:
+            Notification.objects.bulk_update(
+                deferred, ['email_pending', 'email_template', 'email_template_data']
+            )
+            logger.info(f"Deferred {len(deferred)} emails to the notification worker")
+        
+        if sent_ids:
+            Notification.objects.filter(id__in=sent_ids).update(
+                email_sent=True,
+                email_sent_at=timezone.now()
+            )
+        
+        return sent_count
 
 
 class NotificationService:
@@ -123,7 +504,8 @@ class NotificationService:
         self.email_service = EmailService()
         self.push_service = PushNotificationService()
     
-    def notify_user(self, user, notification_type, subject, message, metadata=None, send_email=True, send_push=False):
+    def notify_user(self, user, notification_type, subject, message, metadata=None, send_email=True, send_push=False,
+                    email_template=None, email_batch=None):
         """
         Enviar notificación a un usuario (email y/o push) y guardar en DB
         
@@ -135,16 +517,23 @@ class NotificationService:
             metadata (dict, optional): Datos adicionales
             send_email (bool): Si enviar email
             send_push (bool): Si enviar push
+            email_template (tuple, optional): (nombre, datos) de la plantilla SES
+            email_batch (EmailBatch, optional): Si se indica junto con
+                email_template, el email se encola en el batch en lugar de
+                enviarse de inmediato
         
         Returns:
-            dict: Resultado del envío
+            dict: Resultado del envío. email_queued indica que el email quedó
+            en el batch y email_sent se confirma hasta su flush()
         """
         from notifications.models import Notification
         from django.utils import timezone
         
         results = {
             'email_sent': False,
+            'email_queued': False,
             'push_sent': False,
+            'push_queued': False,
             'notification_id': None
         }
         
@@ -154,12 +543,19 @@ class NotificationService:
             type=notification_type,
             title=subject,
             message=message,
-            metadata=metadata or {}
+            metadata=metadata or {},
+            push_pending=send_push
         )
         results['notification_id'] = notification.id
         
+        # Encolar email en el batch (se envía en bloque con flush())
+        if send_email and user.email and user.is_email_verified and email_batch is not None and email_template:
+            template_name, template_data = email_template
+            email_batch.add(user.email, template_name, template_data, notification)
+            results['email_queued'] = True
+        
         # Enviar email si está habilitado
-        if send_email and user.email and user.is_email_verified:
+        elif send_email and user.email and user.is_email_verified:
             email_response = self.email_service.send_email(
                 to_email=user.email,
                 subject=subject,
@@ -171,72 +567,77 @@ class NotificationService:
                 notification.email_sent_at = timezone.now()
                 results['email_sent'] = True
         
-        # Enviar push si está habilitado
-        if send_push:
-            push_response = self.push_service.send_push(
-                subject=subject,
-                message=message
-            )
-            
-            if push_response:
-                notification.push_sent = True
-                notification.push_sent_at = timezone.now()
-                results['push_sent'] = True
+        # El push no se publica aquí: queda en cola (push_pending) y el worker
+        # de notificaciones lo publica en el topic del usuario con publish_batch
+        results['push_queued'] = send_push
         
-        notification.save()
+        if results['email_sent']:
+            notification.save(update_fields=['email_sent', 'email_sent_at'])
         return results
+    
+    def notify_from_template(self, user, notification_type, template_name, template_data, metadata=None,
+                             send_email=True, send_push=False, email_batch=None):
+        """
+        Enviar notificación usando una plantilla de email_templates.py
+        
+        El asunto y el mensaje guardados en DB se renderizan localmente con
+        la misma plantilla que usa SES.
+        
+        Returns:
+            dict: Resultado del envío (ver notify_user)
+        """
+        subject, message = render_template(template_name, template_data)
+        
+        return self.notify_user(
+            user=user,
+            notification_type=notification_type,
+            subject=subject,
+            message=message,
+            metadata=metadata,
+            send_email=send_email,
+            send_push=send_push,
+            email_template=(template_name, template_data),
+            email_batch=email_batch
+        )
 
 
 # ==========================================
 # FUNCIONES HELPER PARA USAR EN VIEWS
 # ==========================================
 
-def send_purchase_confirmation(order, buyer):
+def send_purchase_confirmation(order, buyer, email_batch=None):
     """
     Enviar confirmación de compra al comprador
     
     Args:
         order: Instancia del modelo Order
         buyer: Instancia del modelo User (comprador)
+        email_batch (EmailBatch, optional): Batch donde encolar el email
     """
     service = NotificationService()
     
-    subject = f'Confirmación de compra - Orden #{order.id}'
-    message = f"""
-Hola {order.buyer_name},
-
-Tu orden ha sido confirmada exitosamente.
-
-DETALLES DE LA ORDEN:
-- Número de orden: #{order.id}
-- Total pagado: ${order.total_mxn} MXN
-- Productos: {len(order.items)} artículo(s)
-
-INFORMACIÓN DE ENTREGA:
-- Nombre: {order.buyer_name}
-- Teléfono: {order.buyer_phone}
-- Dirección: {order.buyer_address}
-
-Los vendedores han sido notificados y se pondrán en contacto contigo para coordinar la entrega.
-
-Gracias por tu compra en SproutMarket.
-
-Saludos,
-Equipo SproutMarket
-    """
+    template_data = {
+        'order_id': order.id,
+        'buyer_name': order.buyer_name,
+        'buyer_phone': order.buyer_phone,
+        'buyer_address': order.buyer_address,
+        'total_mxn': order.total_mxn,
+        'items_count': len(order.items),
+    }
     
-    return service.notify_user(
+    return service.notify_from_template(
         user=buyer,
         notification_type='purchase_confirmation',
-        subject=subject,
-        message=message.strip(),
+        template_name='purchase_confirmation',
+        template_data=template_data,
         metadata={'order_id': order.id},
         send_email=True,
-        send_push=True
+        send_push=True,
+        email_batch=email_batch
     )
 
 
-def send_sale_notification(order, seller, seller_items):
+def send_sale_notification(order, seller, seller_items, email_batch=None):
     """
     Enviar notificación de venta al vendedor
     
@@ -244,6 +645,7 @@ def send_sale_notification(order, seller, seller_items):
         order: Instancia del modelo Order
         seller: Instancia del modelo User (vendedor)
         seller_items: Lista de items vendidos por este seller
+        email_batch (EmailBatch, optional): Batch donde encolar el email
     """
     service = NotificationService()
     
@@ -258,47 +660,69 @@ def send_sale_notification(order, seller, seller_items):
         for item in seller_items
     ])
     
-    subject = f'¡Nueva venta! - Orden #{order.id}'
-    message = f"""
-Hola {seller.get_full_name() or seller.username},
-
-¡Felicidades! Has realizado una venta en SproutMarket.
-
-PRODUCTOS VENDIDOS:
-{products_list}
-
-GANANCIAS:
-- Subtotal: ${subtotal} MXN
-- Tu ganancia (90%): ${seller_earnings} MXN
-- Comisión plataforma (10%): ${subtotal * Decimal('0.10')} MXN
-
-INFORMACIÓN DEL COMPRADOR:
-- Nombre: {order.buyer_name}
-- Teléfono: {order.buyer_phone}
-- Dirección: {order.buyer_address}
-
-PRÓXIMOS PASOS:
-1. Contacta al comprador para coordinar la entrega
-2. Tus ganancias estarán disponibles en tu balance
-3. Podrás solicitar un retiro cuando lo desees
-
-Gracias por vender en SproutMarket.
-
-Saludos,
-Equipo SproutMarket
-    """
+    template_data = {
+        'order_id': order.id,
+        'seller_name': seller.get_full_name() or seller.username,
+        'products_list': products_list,
+        'subtotal': subtotal,
+        'seller_earnings': seller_earnings,
+        'commission': subtotal * Decimal('0.10'),
+        'buyer_name': order.buyer_name,
+        'buyer_phone': order.buyer_phone,
+        'buyer_address': order.buyer_address,
+    }
     
-    return service.notify_user(
+    return service.notify_from_template(
         user=seller,
         notification_type='sale_notification',
-        subject=subject,
-        message=message.strip(),
+        template_name='sale_notification',
+        template_data=template_data,
         metadata={'order_id': order.id, 'earnings': float(seller_earnings)},
         send_email=True,
-        send_push=True
+        send_push=True,
+        email_batch=email_batch
     )
 
 
+def send_order_notifications(order):
+    """
+    Notificar una orden confirmada al comprador y a todos sus vendedores
+    
+    Los emails se envían juntos con send_bulk_templated_email (un batch por
+    plantilla) en lugar de una llamada a SES por destinatario.
+    
+    Args:
+        order: Instancia del modelo Order
+    
+    Returns:
+        dict: Resultados por destinatario y número de emails enviados
+    """
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    
+    email_batch = EmailBatch()
+    results = {'buyer': None, 'sellers': {}}
+    
+    if order.buyer:
+        results['buyer'] = send_purchase_confirmation(order, order.buyer, email_batch=email_batch)
+    
+    # Agrupar items por vendedor
+    items_by_seller = defaultdict(list)
+    for item in order.items:
+        items_by_seller[item['seller_id']].append(item)
+    
+    sellers = User.objects.in_bulk(list(items_by_seller.keys()))
+    for seller_id, seller_items in items_by_seller.items():
+        seller = sellers.get(seller_id)
+        if seller:
+            results['sellers'][seller_id] = send_sale_notification(
+                order, seller, seller_items, email_batch=email_batch
+            )
+    
+    results['emails_sent'] = email_batch.flush(max_wait=settings.EMAIL_SEND_MAX_WAIT)
+    return results
+
+
 def send_exchange_offer_notification(exchange, offer):
     """
     Notificar al publisher que recibió una nueva oferta
@@ -309,36 +733,24 @@ def send_exchange_offer_notification(exchange, offer):
     """
     service = NotificationService()
     
-    subject = f'Nueva oferta de intercambio - {exchange.plant_common_name}'
-    message = f"""
-Hola {exchange.user.get_full_name() or exchange.user.username},
-
-Has recibido una nueva oferta para tu publicación de intercambio.
-
-TU PLANTA:
-- Nombre: {exchange.plant_common_name}
-- Nombre científico: {exchange.plant_scientific_name}
-
-PLANTA OFRECIDA:
-- Usuario: {offer.offeror.get_full_name() or offer.offeror.username}
-- Nombre: {offer.plant_common_name}
-- Nombre científico: {offer.plant_scientific_name}
-- Tamaño: {offer.width_cm} cm x {offer.height_cm} cm
-- Descripción: {offer.description}
-
-Tienes {exchange.pending_offers_count}/4 ofertas pendientes.
-
-Puedes aceptar o rechazar esta oferta desde tu perfil.
-
-Saludos,
-Equipo SproutMarket
-    """
+    template_data = {
+        'publisher_name': exchange.user.get_full_name() or exchange.user.username,
+        'plant_common_name': exchange.plant_common_name,
+        'plant_scientific_name': exchange.plant_scientific_name,
+        'offeror_name': offer.offeror.get_full_name() or offer.offeror.username,
+        'offer_common_name': offer.plant_common_name,
+        'offer_scientific_name': offer.plant_scientific_name,
+        'offer_width_cm': offer.width_cm,
+        'offer_height_cm': offer.height_cm,
+        'offer_description': offer.description,
+        'pending_offers_count': exchange.pending_offers_count,
+    }
     
-    return service.notify_user(
+    return service.notify_from_template(
         user=exchange.user,
         notification_type='exchange_offer',
-        subject=subject,
-        message=message.strip(),
+        template_name='exchange_offer',
+        template_data=template_data,
         metadata={'exchange_id': exchange.id, 'offer_id': offer.id},
         send_email=True,
         send_push=True
@@ -354,87 +766,49 @@ def send_offer_accepted_notification(exchange, offer):
         offer: Instancia del modelo ExchangeOffer
     """
     service = NotificationService()
+    email_batch = EmailBatch()
     
-    # Notificar al offeror (su oferta fue aceptada)
-    offeror_subject = f'¡Tu oferta fue aceptada! - {exchange.plant_common_name}'
-    offeror_message = f"""
-Hola {offer.offeror.get_full_name() or offer.offeror.username},
-
-¡Excelentes noticias! Tu oferta de intercambio ha sido aceptada.
-
-PLANTA QUE OFRECISTE:
-- {offer.plant_common_name} ({offer.plant_scientific_name})
-
-PLANTA QUE RECIBIRÁS:
-- {exchange.plant_common_name} ({exchange.plant_scientific_name})
-
-INFORMACIÓN DE CONTACTO:
-- Nombre: {exchange.user.get_full_name() or exchange.user.username}
-- Email: {exchange.user.email}
-- Teléfono: {exchange.user.phone_number or 'No proporcionado'}
-- Ubicación: {exchange.location}
-
-PRÓXIMOS PASOS:
-1. Contacta al usuario para coordinar fecha y lugar del intercambio
-2. Asegúrate de que tu planta esté en buenas condiciones
-3. Realiza el intercambio en el lugar acordado
-
-¡Disfruta tu nueva planta!
-
-Saludos,
-Equipo SproutMarket
-    """
-    
-    # Notificar al publisher (aceptó una oferta)
-    publisher_subject = f'Intercambio confirmado - {exchange.plant_common_name}'
-    publisher_message = f"""
-Hola {exchange.user.get_full_name() or exchange.user.username},
-
-Has aceptado una oferta de intercambio.
-
-TU PLANTA:
-- {exchange.plant_common_name} ({exchange.plant_scientific_name})
-
-PLANTA QUE RECIBIRÁS:
-- {offer.plant_common_name} ({offer.plant_scientific_name})
-
-INFORMACIÓN DE CONTACTO:
-- Nombre: {offer.offeror.get_full_name() or offer.offeror.username}
-- Email: {offer.offeror.email}
-- Teléfono: {offer.offeror.phone_number or 'No proporcionado'}
-
-PRÓXIMOS PASOS:
-1. El usuario te contactará para coordinar el intercambio
-2. Coordina fecha y lugar para realizar el intercambio
-3. Asegúrate de que tu planta esté en buenas condiciones
-
-¡Disfruta tu nueva planta!
-
-Saludos,
-Equipo SproutMarket
-    """
+    template_data = {
+        'plant_common_name': exchange.plant_common_name,
+        'plant_scientific_name': exchange.plant_scientific_name,
+        'location': exchange.location,
+        'publisher_name': exchange.user.get_full_name() or exchange.user.username,
+        'publisher_email': exchange.user.email,
+        'publisher_phone': exchange.user.phone_number or 'No proporcionado',
+        'offer_common_name': offer.plant_common_name,
+        'offer_scientific_name': offer.plant_scientific_name,
+        'offeror_name': offer.offeror.get_full_name() or offer.offeror.username,
+        'offeror_email': offer.offeror.email,
+        'offeror_phone': offer.offeror.phone_number or 'No proporcionado',
+    }
+    metadata = {'exchange_id': exchange.id, 'offer_id': offer.id}
     
     results = {
-        'offeror': service.notify_user(
+        # Notificar al offeror (su oferta fue aceptada)
+        'offeror': service.notify_from_template(
             user=offer.offeror,
             notification_type='offer_accepted',
-            subject=offeror_subject,
-            message=offeror_message.strip(),
-            metadata={'exchange_id': exchange.id, 'offer_id': offer.id},
+            template_name='offer_accepted_offeror',
+            template_data=template_data,
+            metadata=metadata,
             send_email=True,
-            send_push=True
+            send_push=True,
+            email_batch=email_batch
         ),
-        'publisher': service.notify_user(
+        # Notificar al publisher (aceptó una oferta)
+        'publisher': service.notify_from_template(
             user=exchange.user,
             notification_type='offer_accepted',
-            subject=publisher_subject,
-            message=publisher_message.strip(),
-            metadata={'exchange_id': exchange.id, 'offer_id': offer.id},
+            template_name='offer_accepted_publisher',
+            template_data=template_data,
+            metadata=metadata,
             send_email=True,
-            send_push=True
+            send_push=True,
+            email_batch=email_batch
         )
     }
     
+    results['emails_sent'] = email_batch.flush(max_wait=settings.EMAIL_SEND_MAX_WAIT)
     return results
 
 
@@ -448,34 +822,19 @@ def send_offer_rejected_notification(exchange, offer):
     """
     service = NotificationService()
     
-    subject = f'Oferta no aceptada - {exchange.plant_common_name}'
-    message = f"""
-Hola {offer.offeror.get_full_name() or offer.offeror.username},
-
-Tu oferta de intercambio no fue aceptada en esta ocasión.
-
-PLANTA QUE OFRECISTE:
-- {offer.plant_common_name} ({offer.plant_scientific_name})
-
-PUBLICACIÓN:
-- {exchange.plant_common_name} ({exchange.plant_scientific_name})
-
-No te desanimes, puedes:
-- Hacer otra oferta con una planta diferente
-- Explorar otras publicaciones de intercambio
-- Crear tu propia publicación de intercambio ($90 MXN)
-
-Gracias por participar en SproutMarket.
-
-Saludos,
-Equipo SproutMarket
-    """
+    template_data = {
+        'offeror_name': offer.offeror.get_full_name() or offer.offeror.username,
+        'offer_common_name': offer.plant_common_name,
+        'offer_scientific_name': offer.plant_scientific_name,
+        'plant_common_name': exchange.plant_common_name,
+        'plant_scientific_name': exchange.plant_scientific_name,
+    }
     
-    return service.notify_user(
+    return service.notify_from_template(
         user=offer.offeror,
         notification_type='offer_rejected',
-        subject=subject,
-        message=message.strip(),
+        template_name='offer_rejected',
+        template_data=template_data,
         metadata={'exchange_id': exchange.id, 'offer_id': offer.id},
         send_email=True,
         send_push=False  # No enviar push para rechazos
@@ -492,33 +851,19 @@ def send_low_stock_alert(product, seller):
     """
     service = NotificationService()
     
-    subject = f'Alerta de stock bajo - {product.common_name}'
-    message = f"""
-Hola {seller.get_full_name() or seller.username},
-
-Tu producto tiene stock bajo y podría agotarse pronto.
-
-PRODUCTO:
-- Nombre: {product.common_name}
-- Stock actual: {product.quantity} unidades
-- Precio: ${product.price_mxn} MXN
-
-RECOMENDACIÓN:
-- Actualiza tu inventario si tienes más unidades disponibles
-- Si se agota, el producto aparecerá como "Agotado" hasta que agregues más stock
-
-Gracias por vender en SproutMarket.
-
-Saludos,
-Equipo SproutMarket
-    """
+    template_data = {
+        'seller_name': seller.get_full_name() or seller.username,
+        'product_name': product.common_name,
+        'quantity': product.quantity,
+        'price_mxn': product.price_mxn,
+    }
     
-    return service.notify_user(
+    return service.notify_from_template(
         user=seller,
         notification_type='low_stock',
-        subject=subject,
-        message=message.strip(),
+        template_name='low_stock',
+        template_data=template_data,
         metadata={'product_id': product.id, 'quantity': product.quantity},
         send_email=True,
         send_push=False
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,212 @@
+# notifications/streams.py
+
+"""
+Pub/sub de notificaciones nuevas para el stream SSE (/api/notifications/stream/).
+
+Los mensajes del broker son solo avisos "el usuario X tiene la notificación
+N": cada conexión despierta y consulta en DB las notificaciones con id mayor
+al último que envió, así que ráfagas de avisos se agrupan en una sola consulta
+y nunca se pierde una notificación (misma lógica que el resume con
+Last-Event-ID). Una conexión inactiva solo ocupa un asyncio.Event.
+
+- InProcessBroker: avisos dentro del mismo proceso (desarrollo o un solo
+  proceso ASGI que también atiende las escrituras).
+- PostgresBroker: LISTEN/NOTIFY, para varios procesos/servidores.
+
+Se selecciona con settings.NOTIFICATIONS_BROKER.
+"""
+
+import asyncio
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Conexión suscrita a los avisos de un usuario"""
+    
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+    
+    def notify(self):
+        """Despierta a la conexión (thread-safe)"""
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # El loop ya se cerró: la conexión terminó
+            pass
+    
+    async def wait(self, timeout):
+        """
+        Espera un aviso hasta timeout segundos
+        
+        Returns:
+            bool: True si llegó un aviso, False si venció el timeout
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+    
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Broker en memoria del proceso"""
+    
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+    
+    def subscribe(self, user_id):
+        """Registra una conexión (llamar desde el event loop)"""
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+    
+    def publish(self, user_id, notification_id):
+        """Avisa de una notificación nueva (llamar después del commit)"""
+        self.dispatch(user_id, notification_id)
+    
+    def dispatch(self, user_id, notification_id):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.notify()
+
+
+# Parámetros de conexión de DATABASES['default']['OPTIONS'] que se pasan a la
+# conexión dedicada de LISTEN
+LIBPQ_OPTIONS = {
+    'sslmode', 'sslrootcert', 'sslcert', 'sslkey', 'sslcrl', 'connect_timeout',
+    'application_name', 'options', 'target_session_attrs', 'keepalives',
+    'keepalives_idle', 'keepalives_interval', 'keepalives_count',
+}
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Broker con LISTEN/NOTIFY de PostgreSQL
+    
+    publish() ejecuta pg_notify en la conexión de Django; cada proceso ASGI
+    mantiene un thread con una conexión dedicada que escucha el canal y
+    reparte los avisos a sus conexiones locales.
+    """
+    
+    CHANNEL = 'sproutmarket_notifications'
+    
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+    
+    def publish(self, user_id, notification_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)',
+                [self.CHANNEL, f'{user_id}:{notification_id}']
+            )
+    
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+    
+    def _ensure_listener(self):
+        if self._listener is not None:
+            return
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen,
+                    name='notifications-listen',
+                    daemon=True
+                )
+                self._listener.start()
+    
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+        
+        db = settings.DATABASES['default']
+        # Solo parámetros de libpq: OPTIONS también lleva opciones de Django
+        # (ej: 'pool' con DB_POOL) que psycopg2.connect rechaza
+        options = {
+            key: value for key, value in db.get('OPTIONS', {}).items()
+            if key in LIBPQ_OPTIONS
+        }
+        conn = psycopg2.connect(
+            dbname=db['NAME'],
+            user=db.get('USER') or None,
+            password=db.get('PASSWORD') or None,
+            host=db.get('HOST') or None,
+            port=db.get('PORT') or None,
+            **options
+        )
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.CHANNEL}')
+        return conn
+    
+    def _listen(self):
+        while True:
+            try:
+                conn = self._connect()
+                logger.info(f"Listening on Postgres channel {self.CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        payload = conn.notifies.pop(0).payload
+                        user_id, notification_id = payload.split(':')
+                        self.dispatch(int(user_id), int(notification_id))
+            except Exception as e:
+                logger.error(f"Postgres listener error, reconnecting: {str(e)}")
+                time.sleep(5)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Broker configurado en settings.NOTIFICATIONS_BROKER (uno por proceso)"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(
+                    getattr(settings, 'NOTIFICATIONS_BROKER', 'notifications.streams.InProcessBroker')
+                )
+                _broker = broker_class()
+    return _broker
+
+
+def publish_notification(user_id, notification_id):
+    """Publica el aviso sin propagar errores a quien creó la notificación"""
+    try:
+        get_broker().publish(user_id, notification_id)
+    except Exception as e:
+        logger.error(f"Error publishing notification {notification_id}: {str(e)}")
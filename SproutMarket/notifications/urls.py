@@ -2,15 +2,19 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
+from .views import NotificationViewSet, PushDeviceViewSet, notification_stream
 
 app_name = 'notifications'
 
 # Router para el ViewSet
 router = DefaultRouter()
+# 'devices' va antes que '' para que no se interprete como {id} de notificación
+router.register(r'devices', PushDeviceViewSet, basename='push-device')
 router.register(r'', NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    # Antes del router: '' capturaría 'stream/' como {id}
+    path('stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
 
@@ -20,8 +24,13 @@ urlpatterns = [
 # DELETE /api/notifications/{id}/                - Eliminar notificación
 # PUT    /api/notifications/{id}/mark_as_read/   - Marcar como leída
 # POST   /api/notifications/mark_all_read/       - Marcar todas como leídas
-# GET    /api/notifications/unread_count/        - Contador de no leídas
+# GET    /api/notifications/unread_count/        - Contador de no leídas (cache)
 # GET    /api/notifications/recent/              - Últimas 10
 # DELETE /api/notifications/clear_all/           - Eliminar todas
 # DELETE /api/notifications/clear_read/          - Eliminar leídas
-# GET    /api/notifications/stats/               - Estadísticas
\ No newline at end of file
+# GET    /api/notifications/stats/               - Estadísticas
+# POST   /api/notifications/stream_ticket/       - Ticket para abrir el stream con EventSource
+# GET    /api/notifications/stream/              - Stream SSE de notificaciones nuevas
+# GET    /api/notifications/devices/             - Mis dispositivos push
+# POST   /api/notifications/devices/             - Registrar dispositivo push
+# DELETE /api/notifications/devices/{id}/        - Dar de baja dispositivo
\ No newline at end of file
@@ -1,17 +1,33 @@
 # notifications/views.py
 
-from rest_framework import viewsets, status, permissions, filters
+from rest_framework import viewsets, mixins, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.db.models import Q, Count, Max
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from rest_framework import exceptions
+from botocore.exceptions import ClientError
+
+from core import auth_cache
+from core.authentication import CachedTokenAuthentication, CognitoJWTAuthentication
 
-from .models import Notification
+from .counters import get_unread_count, set_unread_count
+from .models import Notification, PushDevice
 from .serializers import (
     NotificationSerializer,
     NotificationDetailSerializer,
-    NotificationMarkReadSerializer
+    NotificationMarkReadSerializer,
+    PushDeviceSerializer
 )
+from .services import PushNotificationService
+from .streams import get_broker
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -157,15 +173,23 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """
         GET /api/notifications/unread_count/
         
-        Obtener el número de notificaciones no leídas
+        Obtener el número de notificaciones no leídas (contador en cache)
         """
-        count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).count()
+        return Response({
+            'unread_count': get_unread_count(request.user.id)
+        })
+    
+    @action(detail=False, methods=['post'])
+    def stream_ticket(self, request):
+        """
+        POST /api/notifications/stream_ticket/
         
+        Ticket de corta duración para abrir el stream SSE con EventSource
+        (que no permite enviar headers) sin poner el token en la URL
+        """
         return Response({
-            'unread_count': count
+            'ticket': signing.dumps(request.user.id, salt=STREAM_TICKET_SALT),
+            'expires_in': settings.NOTIFICATIONS_SSE_TICKET_TTL
         })
     
     @action(detail=False, methods=['get'])
@@ -188,8 +212,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Eliminar TODAS las notificaciones del usuario
         (Usar con precaución)
         """
-        count = Notification.objects.filter(user=request.user).count()
-        Notification.objects.filter(user=request.user).delete()
+        count, _ = Notification.objects.filter(user=request.user).delete()
+        set_unread_count(request.user.id, 0)
         
         return Response({
             'message': f'{count} notificación(es) eliminada(s) exitosamente',
@@ -203,12 +227,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
         
         Eliminar solo las notificaciones ya leídas
         """
-        queryset = Notification.objects.filter(
+        # Las leídas no afectan el contador de no leídas
+        count, _ = Notification.objects.filter(
             user=request.user,
             is_read=True
-        )
-        count = queryset.count()
-        queryset.delete()
+        ).delete()
         
         return Response({
             'message': f'{count} notificación(es) leída(s) eliminada(s)',
@@ -222,18 +245,26 @@ class NotificationViewSet(viewsets.ModelViewSet):
         
         Estadísticas de notificaciones del usuario
         """
-        user_notifications = Notification.objects.filter(user=request.user)
-        
-        total = user_notifications.count()
-        unread = user_notifications.filter(is_read=False).count()
-        read = user_notifications.filter(is_read=True).count()
+        # Una sola consulta: GROUP BY type, is_read
+        rows = (
+            Notification.objects
+            .filter(user=request.user)
+            .order_by()
+            .values('type', 'is_read')
+            .annotate(count=Count('id'))
+        )
         
-        # Notificaciones por tipo
+        total = unread = 0
         by_type = {}
-        for notification_type, _ in Notification.TYPE_CHOICES:
-            count = user_notifications.filter(type=notification_type).count()
-            if count > 0:
-                by_type[notification_type] = count
+        for row in rows:
+            total += row['count']
+            if not row['is_read']:
+                unread += row['count']
+            by_type[row['type']] = by_type.get(row['type'], 0) + row['count']
+        read = total - unread
+        
+        # Aprovechar el conteo para reconciliar el contador en cache
+        set_unread_count(request.user.id, unread)
         
         return Response({
             'total': total,
@@ -243,6 +274,71 @@ class NotificationViewSet(viewsets.ModelViewSet):
         })
 
 
+class PushDeviceViewSet(mixins.ListModelMixin,
+                        mixins.CreateModelMixin,
+                        mixins.DestroyModelMixin,
+                        viewsets.GenericViewSet):
+    """
+    ViewSet para los dispositivos push del usuario
+    
+    list: GET /api/notifications/devices/ - Mis dispositivos
+    create: POST /api/notifications/devices/ - Registrar dispositivo
+    destroy: DELETE /api/notifications/devices/{id}/ - Dar de baja dispositivo
+    """
+    
+    serializer_class = PushDeviceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    
+    def get_queryset(self):
+        """Solo dispositivos del usuario autenticado"""
+        return PushDevice.objects.filter(user=self.request.user)
+    
+    def create(self, request):
+        """
+        POST /api/notifications/devices/
+        
+        Body:
+        {
+            "platform": "android",
+            "token": "<token FCM/APNs>"
+        }
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            device = PushNotificationService().register_device(
+                user=request.user,
+                platform=serializer.validated_data['platform'],
+                token=serializer.validated_data['token']
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ClientError as e:
+            return Response(
+                {'error': f"Error al registrar el dispositivo: {e.response['Error']['Message']}"},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+        
+        return Response(
+            self.get_serializer(device).data,
+            status=status.HTTP_201_CREATED
+        )
+    
+    def destroy(self, request, pk=None):
+        """
+        DELETE /api/notifications/devices/{id}/
+        """
+        device = self.get_object()
+        PushNotificationService().unregister_device(device)
+        
+        return Response(
+            {'message': 'Dispositivo eliminado exitosamente'},
+            status=status.HTTP_204_NO_CONTENT
+        )
+
+
 class IsNotificationOwner(permissions.BasePermission):
     """
     Permiso personalizado: solo el owner de la notificación puede verla/editarla
@@ -250,4 +346,155 @@ class IsNotificationOwner(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         """Verificar que la notificación pertenece al usuario"""
-        return obj.user == request.user
\ No newline at end of file
+        return obj.user == request.user
+
+
+# Máximo de notificaciones enviadas por consulta en el stream
+STREAM_BATCH_SIZE = 50
+
+STREAM_TICKET_SALT = 'notifications.stream'
+
+# Mismos esquemas que la API (Bearer de Cognito y Token); la sesión va aparte
+STREAM_AUTHENTICATORS = (CognitoJWTAuthentication, CachedTokenAuthentication)
+
+
+def _closing_connections(func):
+    """
+    Ejecuta func y cierra las conexiones a la DB del thread: un listener
+    abierto durante horas no retiene una conexión entre consultas
+    """
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+def _authenticate_stream(request):
+    """Usuario del header Authorization o del ?ticket= de stream_ticket"""
+    for authenticator in STREAM_AUTHENTICATORS:
+        try:
+            result = authenticator().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return None
+        if result is not None:
+            return result[0]
+    
+    # EventSource del navegador no permite enviar headers
+    ticket = request.GET.get('ticket')
+    if ticket:
+        try:
+            user_id = signing.loads(
+                ticket,
+                salt=STREAM_TICKET_SALT,
+                max_age=settings.NOTIFICATIONS_SSE_TICKET_TTL
+            )
+        except signing.BadSignature:
+            return None
+        user = auth_cache.get_user(user_id)
+        return user if user is not None and user.is_active else None
+    return None
+
+
+async def _stream_user(request):
+    """
+    Autenticación del stream: Authorization (Bearer de Cognito o Token),
+    ?ticket= de corta duración o sesión
+    """
+    user = await _closing_connections(_authenticate_stream)(request)
+    if user is not None:
+        return user
+    if request.headers.get('Authorization') or request.GET.get('ticket'):
+        return None
+    
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def _fetch_new_notifications(user_id, last_id):
+    """Notificaciones posteriores a last_id ya serializadas (id ascendente)"""
+    notifications = list(
+        Notification.objects
+        .filter(user_id=user_id, id__gt=last_id)
+        .order_by('id')[:STREAM_BATCH_SIZE]
+    )
+    return NotificationSerializer(notifications, many=True).data
+
+
+def _latest_notification_id(user_id):
+    return Notification.objects.filter(user_id=user_id).aggregate(last=Max('id'))['last'] or 0
+
+
+async def notification_stream(request):
+    """
+    GET /api/notifications/stream/
+    
+    Server-Sent Events con las notificaciones nuevas del usuario.
+    Requiere servidor ASGI (uvicorn/daphne con config.asgi:application).
+    
+    Eventos:
+    - notification: una notificación (id del evento = id de la notificación)
+    - unread_count: contador de no leídas después de cada lote
+    
+    Autenticación: header Authorization (Bearer de Cognito o Token), sesión
+    o ?ticket= obtenido con POST stream_ticket/ (EventSource no envía
+    headers; el ticket expira en segundos y no expone el token en los logs;
+    al reconectar después de un error el cliente pide un ticket nuevo).
+    
+    El navegador reconecta solo y envía Last-Event-ID; también se acepta
+    ?last_event_id= para reanudar sin perder notificaciones. Cada consulta
+    abre y cierra su conexión: los listeners no retienen conexiones a la DB.
+    """
+    from .counters import get_unread_count
+    
+    user = await _stream_user(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Las credenciales de autenticación no se proveyeron.'},
+            status=401
+        )
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_event_id)
+    except (TypeError, ValueError):
+        # Conexión nueva: solo notificaciones a partir de ahora
+        last_id = await _closing_connections(_latest_notification_id)(user.id)
+    
+    heartbeat = settings.NOTIFICATIONS_SSE_HEARTBEAT
+    user_id = user.id
+    
+    async def events():
+        # Suscribirse antes de la primera consulta para no perder avisos
+        subscription = get_broker().subscribe(user_id)
+        nonlocal last_id
+        try:
+            yield 'retry: 5000\n\n'
+            pending = True
+            while True:
+                if pending:
+                    sent = False
+                    while True:
+                        batch = await _closing_connections(_fetch_new_notifications)(user_id, last_id)
+                        for data in batch:
+                            last_id = data['id']
+                            sent = True
+                            yield f'id: {last_id}\nevent: notification\ndata: {json.dumps(data, default=str)}\n\n'
+                        if len(batch) < STREAM_BATCH_SIZE:
+                            break
+                    if sent:
+                        count = await _closing_connections(get_unread_count)(user_id)
+                        yield f'event: unread_count\ndata: {json.dumps({"unread_count": count})}\n\n'
+                
+                pending = await subscription.wait(heartbeat)
+                if not pending:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    yield ': ping\n\n'
+        finally:
+            subscription.close()
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Desactiva el buffering de nginx
+    return response
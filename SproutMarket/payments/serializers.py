@@ -3,6 +3,7 @@
 from rest_framework import serializers
 from decimal import Decimal
 from django.db import transaction
+from analytics.rollups import record_order
 from products.models import Product, Order, Cart
 from .models import Transaction
 from core.serializers import UserProfileSerializer
@@ -161,7 +162,7 @@ class OrderCreateSerializer(serializers.Serializer):
                 if product.quantity == 0:
                     product.status = 'out_of_stock'
                 
-                product.save()
+                product.save(update_fields=['quantity', 'status', 'updated_at'])
             
             # Calcular comisión (10%)
             commission = subtotal * Decimal('0.10')
@@ -181,6 +182,9 @@ class OrderCreateSerializer(serializers.Serializer):
                 status='completed'
             )
             
+            # Rollups diarios de ventas por producto (misma transacción)
+            record_order(order)
+            
             # Registrar transacciones
             # 1. Transacción de compra (buyer)
             Transaction.record_purchase(
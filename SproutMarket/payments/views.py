@@ -1,14 +1,22 @@
 # payments/views.py
 
+import logging
 import stripe
 from decimal import Decimal
 from django.conf import settings
+from django.db import connections
+from django.utils import timezone
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from analytics.buffer import track
+from core.db_router import get_read_alias
+from core.metrics import CHECKOUTS
+from core.utils.csv_export import csv_response, date_range_filter
 from products.models import Order, Cart
+from notifications.services import send_order_notifications
 from .models import Transaction
 from .serializers import (
     CheckoutSerializer,
@@ -17,11 +25,28 @@ from .serializers import (
     TransactionSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 # Configurar Stripe
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
-class CheckoutView(APIView):
+class CheckoutMetricsMixin:
+    """
+    Cuenta cada intento de checkout del usuario por resultado:
+    success (2xx), rejected (4xx: datos o pago inválidos), error (5xx)
+    """
+    checkout_step = None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.user.is_authenticated:
+            code = response.status_code
+            result = 'success' if code < 400 else 'rejected' if code < 500 else 'error'
+            CHECKOUTS.labels(self.checkout_step, result).inc()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CheckoutView(CheckoutMetricsMixin, APIView):
     """
     POST /api/payments/checkout/
     
@@ -43,6 +68,7 @@ class CheckoutView(APIView):
     }
     """
     permission_classes = [permissions.IsAuthenticated]
+    checkout_step = 'intent'
     
     def post(self, request):
         serializer = CheckoutSerializer(
@@ -80,6 +106,12 @@ class CheckoutView(APIView):
                 },
                 description=f'Compra de {len(cart.items)} productos - SproutMarket'
             )
+            track(
+                'checkout',
+                request=request,
+                items=len(cart.items),
+                total=float(total)
+            )
             
             return Response({
                 'client_secret': payment_intent.client_secret,
@@ -102,7 +134,7 @@ class CheckoutView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ConfirmPaymentView(APIView):
+class ConfirmPaymentView(CheckoutMetricsMixin, APIView):
     """
     POST /api/payments/confirm/
     
@@ -124,6 +156,7 @@ class ConfirmPaymentView(APIView):
     }
     """
     permission_classes = [permissions.IsAuthenticated]
+    checkout_step = 'confirm'
     
     def post(self, request):
         payment_intent_id = request.data.get('payment_intent_id')
@@ -175,9 +208,11 @@ class ConfirmPaymentView(APIView):
             
             order = order_serializer.save()
             
-            # TODO: Enviar notificaciones (Día 7)
-            # - Email al comprador
-            # - Email a cada vendedor
+            # Notificar al comprador y a cada vendedor (emails en bloque)
+            try:
+                send_order_notifications(order)
+            except Exception as e:
+                logger.error(f"Error sending notifications for order {order.id}: {str(e)}")
             
             return Response({
                 'message': 'Orden creada exitosamente',
@@ -236,6 +271,50 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
             'total_spent': float(total_spent),
             'average_order': float(total_spent / total_orders) if total_orders > 0 else 0
         })
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        GET /api/orders/export/?start=2025-01-01&end=2025-01-31&status=completed
+        Exporta mis órdenes a CSV (streaming); staff puede usar ?all=true
+        """
+        if request.user.is_staff and request.query_params.get('all') == 'true':
+            queryset = Order.objects.all()
+        else:
+            queryset = Order.objects.filter(buyer=request.user)
+        
+        try:
+            queryset = date_range_filter(queryset, request.query_params)
+        except ValueError:
+            return Response({
+                'error': 'Fechas inválidas, usa YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.query_params.get('status'):
+            queryset = queryset.filter(status=request.query_params['status'])
+        
+        # Se ejecuta al transmitir la respuesta: la réplica se fija con using()
+        rows = queryset.using(get_read_alias(request)).order_by('-created_at').values_list(
+            'id', 'created_at', 'status', 'buyer_id', 'buyer_name', 'buyer_phone',
+            'items', 'subtotal_mxn', 'commission_mxn', 'total_mxn', 'stripe_payment_id'
+        ).iterator(chunk_size=settings.CSV_EXPORT_ROWS_PER_CHUNK)
+        
+        def encode():
+            for (order_id, created_at, order_status, buyer_id, buyer_name, buyer_phone,
+                 items, subtotal, commission, total, stripe_payment_id) in rows:
+                yield (
+                    order_id, timezone.localtime(created_at).isoformat(), order_status,
+                    buyer_id, buyer_name, buyer_phone,
+                    sum(item['quantity'] for item in items),
+                    subtotal, commission, total, stripe_payment_id
+                )
+        
+        return csv_response(
+            'ordenes.csv',
+            ['id', 'fecha', 'estado', 'comprador_id', 'comprador', 'telefono',
+             'articulos', 'subtotal_mxn', 'comision_mxn', 'total_mxn', 'stripe_payment_id'],
+            encode()
+        )
 
 
 class SalesViewSet(viewsets.ReadOnlyModelViewSet):
@@ -320,6 +399,52 @@ class SalesViewSet(viewsets.ReadOnlyModelViewSet):
             'items_sold': items_sold,
             'orders_count': len(orders)
         })
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        GET /api/sales/export/?start=2025-01-01&end=2025-01-31
+        Exporta mis ventas a CSV (una fila por producto vendido, streaming)
+        """
+        seller_id = request.user.id
+        queryset = Order.objects.filter(status='completed')
+        
+        try:
+            queryset = date_range_filter(queryset, request.query_params)
+        except ValueError:
+            return Response({
+                'error': 'Fechas inválidas, usa YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # En PostgreSQL el filtro por seller se resuelve en la DB (JSONB @>);
+        # en otros backends se filtra al recorrer las filas
+        if connections[queryset.db].features.supports_json_field_contains:
+            queryset = queryset.filter(items__contains=[{'seller_id': seller_id}])
+        
+        # Se ejecuta al transmitir la respuesta: la réplica se fija con using()
+        rows = queryset.using(get_read_alias(request)).order_by('-created_at').values_list(
+            'id', 'created_at', 'items'
+        ).iterator(chunk_size=settings.CSV_EXPORT_ROWS_PER_CHUNK)
+        
+        def encode():
+            for order_id, created_at, items in rows:
+                created = timezone.localtime(created_at).isoformat()
+                for item in items:
+                    if item.get('seller_id') != seller_id:
+                        continue
+                    subtotal = Decimal(str(item['subtotal']))
+                    yield (
+                        order_id, created, item['product_id'], item['product_name'],
+                        item['quantity'], item['unit_price'], subtotal,
+                        (subtotal * Decimal('0.90')).quantize(Decimal('0.01'))
+                    )
+        
+        return csv_response(
+            'ventas.csv',
+            ['orden_id', 'fecha', 'producto_id', 'producto', 'cantidad',
+             'precio_unitario', 'subtotal_mxn', 'ganancia_mxn'],
+            encode()
+        )
 
 
 class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -354,6 +479,44 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         queryset = self.get_queryset().filter(type=transaction_type)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        GET /api/transactions/export/?start=2025-01-01&end=2025-01-31&type=sale
+        Exporta mis transacciones a CSV (streaming); staff puede usar ?all=true
+        """
+        if request.user.is_staff and request.query_params.get('all') == 'true':
+            queryset = Transaction.objects.all()
+        else:
+            queryset = Transaction.objects.filter(user=request.user)
+        
+        try:
+            queryset = date_range_filter(queryset, request.query_params)
+        except ValueError:
+            return Response({
+                'error': 'Fechas inválidas, usa YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.query_params.get('type'):
+            queryset = queryset.filter(type=request.query_params['type'])
+        
+        # Se ejecuta al transmitir la respuesta: la réplica se fija con using()
+        rows = queryset.using(get_read_alias(request)).order_by('-created_at').values_list(
+            'id', 'created_at', 'type', 'amount_mxn', 'user_id',
+            'reference_type', 'reference_id', 'stripe_id', 'description'
+        ).iterator(chunk_size=settings.CSV_EXPORT_ROWS_PER_CHUNK)
+        
+        def encode():
+            for row in rows:
+                yield (row[0], timezone.localtime(row[1]).isoformat()) + row[2:]
+        
+        return csv_response(
+            'transacciones.csv',
+            ['id', 'fecha', 'tipo', 'monto_mxn', 'usuario_id',
+             'referencia_tipo', 'referencia_id', 'stripe_id', 'descripcion'],
+            encode()
+        )
 
 
 class BalanceView(APIView):
@@ -3,11 +3,12 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
+from core.utils.admin import OptimizedAdminMixin
 from .models import Product, Cart, Order
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(OptimizedAdminMixin, admin.ModelAdmin):
     """Admin para productos"""
     
     list_display = [
@@ -15,7 +16,14 @@ class ProductAdmin(admin.ModelAdmin):
         'quantity', 'status', 'view_count', 'image_thumbnail', 'created_at'
     ]
     list_filter = ['status', 'categories', 'created_at']
-    search_fields = ['common_name', 'scientific_name', 'description', 'seller__email']
+    list_select_related = ['seller']
+    search_fields = ['common_name', 'scientific_name']
+    exact_search_fields = ['seller__email']
+    # Misma expresión que el índice GIN products_search_fts (migración 0003)
+    fulltext_search = (
+        "to_tsvector('spanish', coalesce(\"products\".\"common_name\", '') || ' ' || "
+        "coalesce(\"products\".\"scientific_name\", ''))"
+    )
     ordering = ['-created_at']
     filter_horizontal = ['categories']
     
@@ -54,11 +62,13 @@ class ProductAdmin(admin.ModelAdmin):
 
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(OptimizedAdminMixin, admin.ModelAdmin):
     """Admin para carritos"""
     
     list_display = ['id', 'user', 'items_count', 'updated_at']
-    search_fields = ['user__email', 'user__username']
+    list_select_related = ['user']
+    search_fields = ['user__username']
+    exact_search_fields = ['user__email']
     ordering = ['-updated_at']
     
     fieldsets = (
@@ -82,7 +92,7 @@ class CartAdmin(admin.ModelAdmin):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(OptimizedAdminMixin, admin.ModelAdmin):
     """Admin para órdenes"""
     
     list_display = [
@@ -90,10 +100,11 @@ class OrderAdmin(admin.ModelAdmin):
         'status', 'stripe_payment_id', 'created_at'
     ]
     list_filter = ['status', 'created_at']
-    search_fields = [
-        'buyer__email', 'buyer_name', 'buyer_phone', 
-        'stripe_payment_id'
-    ]
+    list_select_related = ['buyer']
+    search_fields = ['buyer_name']
+    exact_search_fields = ['buyer__email']
+    numeric_search_fields = ['buyer_phone']
+    prefix_search_fields = {'pi_': 'stripe_payment_id'}
     ordering = ['-created_at']
     
     fieldsets = (
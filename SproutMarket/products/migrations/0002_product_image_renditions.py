@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='URLs de las versiones thumb/medium/full (WebP y JPEG) por campo de imagen', verbose_name='versiones de imágenes'),
+        ),
+    ]
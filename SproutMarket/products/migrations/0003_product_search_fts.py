@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:18
+
+from django.db import migrations
+
+
+# Índice GIN full-text para la búsqueda del admin (ProductAdmin.fulltext_search
+# usa exactamente esta expresión). Solo PostgreSQL.
+CREATE_INDEX = """
+CREATE INDEX IF NOT EXISTS products_search_fts ON products
+USING gin (to_tsvector('spanish', coalesce("common_name", '') || ' ' || coalesce("scientific_name", '')))
+"""
+
+DROP_INDEX = 'DROP INDEX IF EXISTS products_search_fts'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -117,6 +117,12 @@ class Product(models.Model):
         null=True,
         help_text='Tercera imagen del producto'
     )
+    image_renditions = models.JSONField(
+        _('versiones de imágenes'),
+        default=dict,
+        blank=True,
+        help_text='URLs de las versiones thumb/medium/full (WebP y JPEG) por campo de imagen'
+    )
     
     # Estado y métricas
     status = models.CharField(
@@ -153,10 +159,14 @@ class Product(models.Model):
     
     def save(self, *args, **kwargs):
         """Auto-marcar como agotado si quantity = 0"""
+        previous_status = self.status
         if self.quantity == 0 and self.status == 'active':
             self.status = 'out_of_stock'
         elif self.quantity > 0 and self.status == 'out_of_stock':
             self.status = 'active'
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.status != previous_status:
+            kwargs['update_fields'] = {*update_fields, 'status'}
         super().save(*args, **kwargs)
     
     @property
@@ -170,9 +180,15 @@ class Product(models.Model):
         return self.image1 or self.image2 or self.image3
     
     def increment_views(self):
-        """Incrementa el contador de vistas"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """
+        Incrementa el contador de vistas en el primario (UPDATE atómico: la
+        instancia puede venir de una réplica con un valor atrasado)
+
+        No cambia self.view_count.
+        """
+        from analytics.rollups import record_view  # Import aquí para evitar circular
+        Product.objects.filter(pk=self.pk).update(view_count=models.F('view_count') + 1)
+        record_view(self.id, self.seller_id)
 
 
 class Cart(models.Model):
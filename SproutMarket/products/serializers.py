@@ -2,9 +2,12 @@
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from core.models import Category
 from .models import Product, Cart, Order
-from core.utils.s3_utils import upload_product_image, delete_image
+from core.utils.s3_utils import upload_product_image, S3UploadManager, S3UploadError
+from core.utils.direct_uploads import resolve_image_keys, DirectUploadError
+from core.utils.images import IMAGE_FIELDS, get_rendition_url, get_srcset, schedule_renditions, release_replaced_images
 
 User = get_user_model()
 
@@ -48,10 +51,8 @@ class ProductListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'view_count', 'created_at']
     
     def get_main_image(self, obj):
-        """Retorna la primera imagen disponible"""
-        if obj.image1:
-            return obj.image1.url if hasattr(obj.image1, 'url') else obj.image1
-        return None
+        """Retorna la miniatura de la primera imagen (o la original si aún no se generó)"""
+        return get_rendition_url(obj, 'image1', 'thumb')
 
 
 class ProductDetailSerializer(serializers.ModelSerializer):
@@ -60,6 +61,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     seller = ProductSellerSerializer(read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
     images = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
     is_available = serializers.ReadOnlyField()
     
     class Meta:
@@ -67,7 +69,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'seller', 'categories', 'common_name', 'scientific_name',
             'description', 'quantity', 'price_mxn', 'width_cm', 'height_cm',
-            'weight_kg', 'images', 'status', 'is_available', 'view_count',
+            'weight_kg', 'images', 'image_srcsets', 'status', 'is_available', 'view_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'seller', 'view_count', 'created_at', 'updated_at']
@@ -80,6 +82,14 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             if img:
                 images.append(img.url if hasattr(img, 'url') else img)
         return images
+    
+    def get_image_srcsets(self, obj):
+        """srcset (WebP y JPEG) de cada imagen, en el mismo orden que images"""
+        return [
+            get_srcset(obj, img_field)
+            for img_field in IMAGE_FIELDS
+            if getattr(obj, img_field)
+        ]
 
 
 class ProductCreateSerializer(serializers.ModelSerializer):
@@ -94,16 +104,25 @@ class ProductCreateSerializer(serializers.ModelSerializer):
     )
     
     # Imágenes como archivos
-    image1 = serializers.ImageField(required=True, help_text='Primera imagen (requerida)')
+    image1 = serializers.ImageField(required=False, help_text='Primera imagen (requerida si no se envía image_keys)')
     image2 = serializers.ImageField(required=False, allow_null=True)
     image3 = serializers.ImageField(required=False, allow_null=True)
+    # Alternativa a los archivos: keys subidos con /api/uploads/presign/
+    image_keys = serializers.ListField(
+        child=serializers.CharField(max_length=500),
+        write_only=True,
+        required=False,
+        min_length=1,
+        max_length=3,
+        help_text='Keys de imágenes subidas directamente (en lugar de image1-3)'
+    )
     
     class Meta:
         model = Product
         fields = [
             'common_name', 'scientific_name', 'description',
             'quantity', 'price_mxn', 'width_cm', 'height_cm', 'weight_kg',
-            'category_ids', 'image1', 'image2', 'image3'
+            'category_ids', 'image1', 'image2', 'image3', 'image_keys'
         ]
     
     def validate_category_ids(self, value):
@@ -137,6 +156,20 @@ class ProductCreateSerializer(serializers.ModelSerializer):
                 'quantity': 'La cantidad no puede ser negativa'
             })
         
+        # Imágenes: archivos o keys de subidas directas (verificados con HEAD)
+        image_keys = attrs.get('image_keys')
+        if image_keys:
+            try:
+                attrs['image_keys'] = resolve_image_keys(
+                    self.context['request'].user, 'product', image_keys
+                )
+            except DirectUploadError as e:
+                raise serializers.ValidationError({'image_keys': str(e)})
+        elif not attrs.get('image1'):
+            raise serializers.ValidationError({
+                'image1': 'Se requiere image1 o image_keys'
+            })
+        
         return attrs
     
     def create(self, validated_data):
@@ -145,34 +178,41 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         
         # Extraer imágenes
-        image1 = validated_data.pop('image1')
+        image1 = validated_data.pop('image1', None)
         image2 = validated_data.pop('image2', None)
         image3 = validated_data.pop('image3', None)
+        image_urls = validated_data.pop('image_keys', None)
         
-        # Crear producto
-        product = Product.objects.create(
-            seller=user,
-            **validated_data
-        )
-        
-        # Asignar categorías
-        categories = Category.objects.filter(id__in=category_ids)
-        product.categories.set(categories)
-        
-        # Subir imágenes a S3
+        # Subir las imágenes a S3 en paralelo (salvo subida directa) y después crear el producto;
+        # si la creación falla, el manager elimina las imágenes subidas
         try:
-            product.image1 = upload_product_image(image1)
-            
-            if image2:
-                product.image2 = upload_product_image(image2)
-            
-            if image3:
-                product.image3 = upload_product_image(image3)
-            
-            product.save()
-        except Exception as e:
-            # Si falla el upload, eliminar producto
-            product.delete()
+            with S3UploadManager(folder='products') as uploads:
+                if image_urls:
+                    # Ya están en el almacenamiento (subida directa)
+                    image1_url, image2_url, image3_url = image_urls
+                else:
+                    image1_url, image2_url, image3_url = uploads.upload_all([image1, image2, image3])
+                
+                with transaction.atomic():
+                    product = Product.objects.create(
+                        seller=user,
+                        image1=image1_url,
+                        image2=image2_url,
+                        image3=image3_url,
+                        **validated_data
+                    )
+                    
+                    # Asignar categorías
+                    categories = Category.objects.filter(id__in=category_ids)
+                    product.categories.set(categories)
+                    
+                    # Miniaturas y versiones WebP/JPEG en segundo plano
+                    schedule_renditions(product, {
+                        'image1': (image1_url, image1),
+                        'image2': (image2_url, image2),
+                        'image3': (image3_url, image3),
+                    })
+        except S3UploadError as e:
             raise serializers.ValidationError({
                 'images': f'Error al subir imágenes: {str(e)}'
             })
@@ -213,50 +253,58 @@ class ProductUpdateSerializer(serializers.ModelSerializer):
         return value
     
     def update(self, instance, validated_data):
-        """Actualizar producto y manejar imágenes"""
-        category_ids = validated_data.pop('category_ids', None)
+        """
+        Actualizar producto y manejar imágenes
         
-        # Actualizar categorías si se proporcionaron
-        if category_ids is not None:
-            categories = Category.objects.filter(id__in=category_ids)
-            instance.categories.set(categories)
+        Todo en una transacción: las imágenes anteriores se liberan solo
+        después de subir las nuevas y guardar (ver release_replaced_images)
+        """
+        category_ids = validated_data.pop('category_ids', None)
         
-        # Manejar actualización de imágenes
-        for img_field in ['image1', 'image2', 'image3']:
-            if img_field in validated_data:
-                new_image = validated_data.pop(img_field)
-                
-                if new_image:
-                    # Eliminar imagen anterior si existe
+        with transaction.atomic():
+            # Actualizar categorías si se proporcionaron
+            if category_ids is not None:
+                categories = Category.objects.filter(id__in=category_ids)
+                instance.categories.set(categories)
+            
+            # Manejar actualización de imágenes
+            new_images = {}
+            replaced = {}
+            for img_field in ['image1', 'image2', 'image3']:
+                if img_field in validated_data:
+                    new_image = validated_data.pop(img_field)
                     old_image = getattr(instance, img_field)
-                    if old_image:
-                        try:
-                            delete_image(old_image)
-                        except:
-                            pass
                     
-                    # Subir nueva imagen
-                    try:
-                        setattr(instance, img_field, upload_product_image(new_image))
-                    except Exception as e:
-                        raise serializers.ValidationError({
-                            img_field: f'Error al subir imagen: {str(e)}'
-                        })
-                elif new_image is None:
-                    # Eliminar imagen si se envió null
-                    old_image = getattr(instance, img_field)
-                    if old_image:
+                    if new_image:
+                        # Subir nueva imagen (si falla, la anterior sigue intacta)
                         try:
-                            delete_image(old_image)
-                        except:
-                            pass
-                    setattr(instance, img_field, None)
-        
-        # Actualizar otros campos
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
+                            url = upload_product_image(new_image)
+                        except Exception as e:
+                            raise serializers.ValidationError({
+                                img_field: f'Error al subir imagen: {str(e)}'
+                            })
+                        setattr(instance, img_field, url)
+                        new_images[img_field] = (str(url or ''), new_image)
+                    elif new_image is None:
+                        # Eliminar imagen si se envió null
+                        setattr(instance, img_field, None)
+                    else:
+                        continue
+                    replaced[img_field] = str(old_image) if old_image else ''
+            
+            # Actualizar otros campos
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            
+            # Solo los campos recibidos: image_renditions lo escribe el pool de
+            # versiones y un save() completo podría pisar lo que guardó
+            instance.save(update_fields=[*replaced, *validated_data, 'updated_at'])
+            
+            # Imágenes anteriores (y sus versiones) al GC después del commit
+            release_replaced_images(instance, replaced)
+            
+            # Generar versiones de las imágenes nuevas en segundo plano
+            schedule_renditions(instance, new_images)
         return instance
 
 
@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 
+from analytics.buffer import track
+from core.db_router import ReplicaReadMixin
 from core.models import Category
 from .models import Product, Cart
 from .serializers import (
@@ -20,7 +22,7 @@ from .filters import ProductFilter
 from .permissions import IsSellerOrReadOnly
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para categorías (solo lectura)
     
@@ -32,7 +34,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet para productos con CRUD completo
     
@@ -57,6 +59,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     search_fields = ['common_name', 'scientific_name', 'description']
     ordering_fields = ['created_at', 'price_mxn', 'view_count']
     ordering = ['-created_at']  # Default: más recientes primero
+    replica_actions = ('list', 'retrieve', 'featured', 'by_category')
     
     def get_queryset(self):
         """
@@ -91,16 +94,34 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductUpdateSerializer
         return ProductListSerializer
     
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        
+        query = request.query_params.get('search', '').strip()
+        if query:
+            results = response.data.get('count') if isinstance(response.data, dict) else len(response.data)
+            track('search', request=request, query=query[:200], results=results)
+        
+        return response
+    
     def retrieve(self, request, *args, **kwargs):
         """Obtener detalle e incrementar contador de vistas"""
         instance = self.get_object()
         
         # Incrementar vistas (solo si no es el dueño)
-        if not request.user.is_authenticated or request.user != instance.seller:
+        count_view = not request.user.is_authenticated or request.user != instance.seller
+        if count_view:
+            instance.view_count += 1
+        
+        # Lecturas (réplica) antes del write: si fallan y la acción se repite
+        # en el primario, la vista no se cuenta dos veces
+        data = self.get_serializer(instance).data
+        
+        if count_view:
             instance.increment_views()
+            track('product_view', request=request, object_id=instance.id)
         
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return Response(data)
     
     def perform_create(self, serializer):
         """Crear producto asignando el seller automáticamente"""
@@ -109,7 +130,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         """Soft delete: cambiar status a 'deleted' en lugar de eliminar"""
         instance.status = 'deleted'
-        instance.save()
+        instance.save(update_fields=['status', 'updated_at'])
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_products(self, request):
@@ -148,7 +169,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             else:
                 product.status = 'out_of_stock'
             
-            product.save()
+            product.save(update_fields=['status', 'updated_at'])
             
             return Response({
                 'message': 'Producto reactivado exitosamente',
@@ -281,6 +302,7 @@ class CartViewSet(viewsets.ViewSet):
             })
         
         cart.save()
+        track('cart_add', request=request, object_id=product.id, quantity=quantity)
         
         serializer = CartSerializer(cart)
         return Response(serializer.data)
@@ -1,6 +1,7 @@
 # subscriptions/services.py
 
 import stripe
+from datetime import timezone as dt_timezone
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
@@ -72,11 +73,11 @@ class SubscriptionService:
             status=subscription.status,
             current_period_start=timezone.datetime.fromtimestamp(
                 subscription.current_period_start,
-                tz=timezone.utc
+                tz=dt_timezone.utc
             ),
             current_period_end=timezone.datetime.fromtimestamp(
                 subscription.current_period_end,
-                tz=timezone.utc
+                tz=dt_timezone.utc
             ),
             metadata={
                 'stripe_subscription': subscription.id
@@ -130,7 +131,7 @@ class SubscriptionService:
             'message': 'Suscripción cancelada. Mantendrás acceso premium hasta el fin del periodo.',
             'cancel_at': timezone.datetime.fromtimestamp(
                 subscription.current_period_end,
-                tz=timezone.utc
+                tz=dt_timezone.utc
             ),
             'status': 'canceled'
         }
@@ -172,7 +173,7 @@ class SubscriptionService:
             'status': 'active',
             'current_period_end': timezone.datetime.fromtimestamp(
                 subscription.current_period_end,
-                tz=timezone.utc
+                tz=dt_timezone.utc
             )
         }
     
@@ -205,11 +206,11 @@ class SubscriptionService:
                 'status': subscription.status,
                 'current_period_start': timezone.datetime.fromtimestamp(
                     subscription.current_period_start,
-                    tz=timezone.utc
+                    tz=dt_timezone.utc
                 ),
                 'current_period_end': timezone.datetime.fromtimestamp(
                     subscription.current_period_end,
-                    tz=timezone.utc
+                    tz=dt_timezone.utc
                 ),
                 'cancel_at_period_end': subscription.cancel_at_period_end
             }
@@ -253,7 +254,7 @@ class SubscriptionService:
             user.stripe_subscription_id = subscription_data['id']
             user.premium_expires_at = timezone.datetime.fromtimestamp(
                 subscription_data['current_period_end'],
-                tz=timezone.utc
+                tz=dt_timezone.utc
             )
             user.save()
             
@@ -269,7 +270,7 @@ class SubscriptionService:
                 db_subscription.status = subscription_data['status']
                 db_subscription.current_period_end = timezone.datetime.fromtimestamp(
                     subscription_data['current_period_end'],
-                    tz=timezone.utc
+                    tz=dt_timezone.utc
                 )
                 db_subscription.save()
             
@@ -277,7 +278,7 @@ class SubscriptionService:
             user.is_premium = subscription_data['status'] == 'active'
             user.premium_expires_at = timezone.datetime.fromtimestamp(
                 subscription_data['current_period_end'],
-                tz=timezone.utc
+                tz=dt_timezone.utc
             )
             user.save()
             